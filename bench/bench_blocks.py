@@ -0,0 +1,101 @@
+"""
+Compares block classification and dispatch against the previous
+implementation (per-line re.match with string patterns and an if/elif
+chain) on list- and heading-heavy documents.
+
+    python3 bench/bench_blocks.py --pages 20
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from block_type import BlockType
+from markdown_helpers import (
+    markdown_to_blocks,
+    block_to_block_type,
+    block_to_html_node,
+    block_to_paragraph,
+    block_to_heading,
+    block_to_code,
+    block_to_quote,
+    block_to_ul,
+    block_to_ol,
+)
+from corpus import huge_page, list_page
+
+
+def legacy_block_to_block_type(block):
+    lines = block.split('\n')
+    if re.match(r"^#{1,6}\s", lines[0]):
+        return BlockType.HEADING
+    if len(lines) > 1 and all(line.startswith('>') for line in lines):
+        return BlockType.QUOTE
+    if block.startswith("```") and block.endswith("```"):
+        return BlockType.CODE
+    if all(line.startswith(('* ', '- ')) for line in lines):
+        return BlockType.UNORDERED_LIST
+    if all(re.match(r"^\d+\.\s", line) for line in lines):
+        return BlockType.ORDERED_LIST
+    return BlockType.PARAGRAPH
+
+
+def legacy_block_to_html_node(block):
+    block_type = legacy_block_to_block_type(block)
+    if block_type == BlockType.PARAGRAPH:
+        return block_to_paragraph(block)
+    elif block_type == BlockType.HEADING:
+        return block_to_heading(block)
+    elif block_type == BlockType.CODE:
+        return block_to_code(block)
+    elif block_type == BlockType.QUOTE:
+        return block_to_quote(block)
+    elif block_type == BlockType.UNORDERED_LIST:
+        return block_to_ul(block)
+    elif block_type == BlockType.ORDERED_LIST:
+        return block_to_ol(block)
+    raise Exception("Invalid block type")
+
+
+def best_of(func, items, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for item in items:
+            func(item)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Block classification microbenchmark")
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    documents = {
+        "list-heavy": ["\n\n".join(list_page(rng, f"Lists {i}")) for i in range(args.pages)],
+        "heading-heavy": ["\n\n".join(huge_page(rng, f"Huge {i}", sections=100)) for i in range(args.pages)],
+    }
+
+    print(f"{'corpus':<14} {'stage':<18} {'legacy ms':>10} {'current ms':>11} {'speedup':>8}")
+    for name, docs in documents.items():
+        blocks = [block for doc in docs for block in markdown_to_blocks(doc)]
+        for stage, legacy, current in [
+            ("classify", legacy_block_to_block_type, block_to_block_type),
+            ("classify+render", legacy_block_to_html_node, block_to_html_node),
+        ]:
+            old = best_of(legacy, blocks, args.repeat)
+            new = best_of(current, blocks, args.repeat)
+            print(f"{name:<14} {stage:<18} {old * 1000:>10.2f} {new * 1000:>11.2f} {old / new:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Measures how much memory the node classes take per instance, compared with
+the same classes backed by a regular per-instance __dict__.
+
+    python3 bench/bench_memory.py --pages 200
+"""
+import argparse
+import gc
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from textnode import TextNode
+from htmlnode import HTMLNode, ParentNode
+from markdown_helpers import markdown_to_blocks, text_to_textnodes, markdown_to_html_node
+from corpus import small_page, list_page, link_page
+
+class DictTextNode:
+    def __init__(self, text, text_type, url=None, children=None):
+        self.text = text
+        self.text_type = text_type
+        self.url = url
+        self.children = children
+
+
+class DictHTMLNode:
+    def __init__(self, tag=None, value=None, children=None, props=None):
+        self.tag = tag
+        self.value = value
+        self.children = children
+        self.props = props
+
+
+def generate_pages(count, seed):
+    rng = random.Random(seed)
+    pages = []
+    for i in range(count):
+        title = f"Page {i}"
+        if i % 3 == 0:
+            blocks = small_page(rng, title)
+        elif i % 3 == 1:
+            blocks = list_page(rng, title)
+        else:
+            blocks = link_page(rng, title, ["/"])
+        pages.append("\n\n".join(blocks))
+    return pages
+
+
+def clone_text_nodes(nodes, cls):
+    return [cls(n.text, n.text_type, n.url, n.children) for n in nodes]
+
+
+def clone_html_node(node, cls):
+    if isinstance(node, ParentNode):
+        return cls(node.tag, None, [clone_html_node(c, cls) for c in node.children], node.props)
+    return cls(node.tag, node.value, None, node.props)
+
+
+def traced_bytes(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current, result
+
+
+def count_html_nodes(node):
+    if isinstance(node, ParentNode):
+        return 1 + sum(count_html_nodes(c) for c in node.children)
+    return 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    corpus = generate_pages(args.pages, args.seed)
+
+    # Parse untraced; the clones below share all strings with these, so the
+    # traced difference is just the node objects themselves
+    text_nodes = [n for page in corpus for block in markdown_to_blocks(page) for n in text_to_textnodes(block)]
+    html_trees = [markdown_to_html_node(page) for page in corpus]
+    html_count = sum(count_html_nodes(tree) for tree in html_trees)
+
+    rows = []
+    for label, count, slotted, plain in [
+        ("TextNode", len(text_nodes),
+         lambda: clone_text_nodes(text_nodes, TextNode),
+         lambda: clone_text_nodes(text_nodes, DictTextNode)),
+        ("HTMLNode", html_count,
+         lambda: [clone_html_node(t, HTMLNode) for t in html_trees],
+         lambda: [clone_html_node(t, DictHTMLNode) for t in html_trees]),
+    ]:
+        slotted_bytes, keep = traced_bytes(slotted)
+        del keep
+        plain_bytes, keep = traced_bytes(plain)
+        del keep
+        rows.append((label, count, slotted_bytes / count, plain_bytes / count))
+
+    print(f"{'class':<10} {'nodes':>10} {'slots B/node':>14} {'__dict__ B/node':>16} {'saved':>8}")
+    for label, count, slotted, plain in rows:
+        print(f"{label:<10} {count:>10} {slotted:>14.1f} {plain:>16.1f} {1 - slotted / plain:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
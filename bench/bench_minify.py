@@ -0,0 +1,86 @@
+"""
+Measures what minify mode saves in output size, and what it costs in
+render time, for the repo's template and a synthetic mix of pages.
+Sizes are also given gzipped, since that's what goes over the wire.
+
+    python3 bench/bench_minify.py --pages 200
+"""
+import argparse
+import gzip
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from markdown_helpers import markdown_to_html_node
+from template import load_template
+from corpus import small_page, huge_page, list_page, link_page
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "template.html")
+
+
+def generate_pages(count, seed):
+    rng = random.Random(seed)
+    pages = []
+    for i in range(count):
+        title = f"Page {i}"
+        if i % 4 == 0:
+            blocks = small_page(rng, title)
+        elif i % 4 == 1:
+            blocks = list_page(rng, title)
+        elif i % 4 == 2:
+            blocks = link_page(rng, title, ["/", "/blog/", "/about.html"])
+        else:
+            blocks = huge_page(rng, title, sections=20)
+        pages.append((title, markdown_to_html_node("\n\n".join(blocks))))
+    return pages
+
+
+def render_all(template, pages):
+    outputs = []
+    for title, node in pages:
+        fragments = []
+        template.render_to(fragments, Title=title, Content=node)
+        outputs.append("".join(fragments))
+    return outputs
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Output size and render time with and without --minify")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    pages = generate_pages(args.pages, args.seed)
+    print(f"{'mode':<8} {'render ms':>10} {'bytes':>11} {'gzip bytes':>11}")
+    baseline = None
+    for minify in (False, True):
+        template = load_template(TEMPLATE_PATH, "/", minify=minify)
+        seconds, outputs = best_of(lambda: render_all(template, pages), args.repeat)
+        size = sum(len(html.encode()) for html in outputs)
+        gzipped = sum(len(gzip.compress(html.encode(), 6)) for html in outputs)
+        print(f"{'minify' if minify else 'plain':<8} {seconds * 1000:>10.2f} {size:>11} {gzipped:>11}")
+        if baseline is None:
+            baseline = (seconds, size, gzipped)
+
+    plain_seconds, plain_size, plain_gzipped = baseline
+    print()
+    print(f"size: {100 * (1 - size / plain_size):.1f}% smaller, {100 * (1 - gzipped / plain_gzipped):.1f}% smaller gzipped")
+    print(f"render time: {seconds / plain_seconds:.2f}x of plain")
+
+
+if __name__ == "__main__":
+    main()
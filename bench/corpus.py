@@ -0,0 +1,137 @@
+"""
+Generates a synthetic content/ tree for benchmarking.
+
+    python3 bench/corpus.py /tmp/corpus --small 1000 --huge 2 --links 50 --lists 50
+
+Pages come in four shapes: many small posts, a few huge pages,
+link-heavy pages and list-heavy pages. Output is deterministic for a seed.
+"""
+import argparse
+import os
+import random
+
+WORDS = (
+    "the ring of power was forged in secret by sauron lord of mordor while "
+    "elves and dwarves and men of the west kept watch over middle earth"
+).split()
+
+SHAPES = ("small", "huge", "links", "lists")
+
+
+def sentence(rng, length=12):
+    words = [rng.choice(WORDS) for _ in range(length)]
+    # Sprinkle in some inline markup so the inline scanner has work to do
+    for i in range(0, length, 5):
+        words[i] = rng.choice([words[i], f"**{words[i]}**", f"_{words[i]}_", f"`{words[i]}`"])
+    return " ".join(words).capitalize() + "."
+
+
+def paragraph(rng, sentences=4):
+    return " ".join(sentence(rng) for _ in range(sentences))
+
+
+def small_page(rng, title):
+    blocks = [f"# {title}", paragraph(rng)]
+    blocks.append(f"> {sentence(rng)}\n> -- {rng.choice(WORDS)}")
+    blocks.append(paragraph(rng))
+    return blocks
+
+
+def huge_page(rng, title, sections=400):
+    blocks = [f"# {title}"]
+    for i in range(sections):
+        blocks.append(f"## Section {i}")
+        blocks.append(paragraph(rng, 6))
+        blocks.append("```\n" + "\n".join(f"line {j} = {rng.choice(WORDS)}" for j in range(8)) + "\n```")
+        blocks.append("\n".join(f"- {sentence(rng, 6)}" for _ in range(4)))
+    return blocks
+
+
+def link_page(rng, title, targets, links=300):
+    blocks = [f"# {title}"]
+    for _ in range(links // 10):
+        parts = []
+        for _ in range(10):
+            target = rng.choice(targets)
+            if rng.random() < 0.1:
+                parts.append(f"![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}.png)")
+            else:
+                parts.append(f"see [{rng.choice(WORDS)}]({target})")
+        blocks.append(", ".join(parts) + ".")
+    return blocks
+
+
+def list_page(rng, title, lists=60):
+    blocks = [f"# {title}"]
+    for i in range(lists):
+        blocks.append(f"### List {i}")
+        if i % 2:
+            blocks.append("\n".join(f"{n}. {sentence(rng, 5)}" for n in range(1, 16)))
+        else:
+            blocks.append("\n".join(f"* {sentence(rng, 5)}" for _ in range(15)))
+    return blocks
+
+
+def generate_corpus(dest_dir, small=200, huge=2, links=20, lists=20, seed=1):
+    """
+    Writes the corpus under dest_dir (an index.md per page directory) and
+    returns the list of markdown paths written.
+    """
+    rng = random.Random(seed)
+    counts = {"small": small, "huge": huge, "links": links, "lists": lists}
+    page_urls = [f"/{shape}/{i}" for shape in SHAPES for i in range(counts[shape])]
+
+    paths = []
+    for shape in SHAPES:
+        for i in range(counts[shape]):
+            title = f"{shape.capitalize()} page {i}"
+            if shape == "small":
+                blocks = small_page(rng, title)
+            elif shape == "huge":
+                blocks = huge_page(rng, title)
+            elif shape == "links":
+                blocks = link_page(rng, title, page_urls or ["/"])
+            else:
+                blocks = list_page(rng, title)
+
+            path = os.path.join(dest_dir, shape, str(i), "index.md")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "w") as f:
+                f.write("\n\n".join(blocks) + "\n")
+            paths.append(path)
+
+    with open(os.path.join(dest_dir, "index.md"), "w") as f:
+        f.write("# Benchmark corpus\n\n" + "\n".join(f"- [{url}]({url})" for url in page_urls[:50]) + "\n")
+    paths.insert(0, os.path.join(dest_dir, "index.md"))
+    return paths
+
+
+def add_corpus_args(parser):
+    parser.add_argument("--small", type=int, default=200, help="number of small pages")
+    parser.add_argument("--huge", type=int, default=2, help="number of huge pages")
+    parser.add_argument("--links", type=int, default=20, help="number of link-heavy pages")
+    parser.add_argument("--lists", type=int, default=20, help="number of list-heavy pages")
+    parser.add_argument("--seed", type=int, default=1)
+
+
+def corpus_kwargs(args):
+    return {
+        "small": args.small,
+        "huge": args.huge,
+        "links": args.links,
+        "lists": args.lists,
+        "seed": args.seed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic content/ tree")
+    parser.add_argument("dest_dir")
+    add_corpus_args(parser)
+    args = parser.parse_args()
+    paths = generate_corpus(args.dest_dir, **corpus_kwargs(args))
+    print(f"Wrote {len(paths)} pages to {args.dest_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+Times each stage of the pipeline on a synthetic corpus and writes the
+results as JSON, so runs on different commits can be compared.
+
+    python3 bench/run.py --output bench/results/before.json
+    python3 bench/run.py --compare bench/results/before.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import redirect_stdout
+from io import StringIO
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(REPO_DIR, "src"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import generate_corpus, add_corpus_args, corpus_kwargs
+from markdown_helpers import (
+    markdown_to_blocks,
+    block_to_block_type,
+    text_to_textnodes,
+    markdown_to_html_node,
+)
+from block_type import BlockType
+import main as site
+
+
+def time_stage(func, repeat):
+    """Runs func repeat times and returns the sorted list of wall times."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return sorted(times)
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_DIR, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def full_build(work_dir, jobs):
+    # main() works on paths relative to the current directory, like build.sh
+    os.chdir(work_dir)
+    # Every repeat starts cold: no parse cache or other build state from
+    # the one before, so timings stay comparable across commits
+    shutil.rmtree("docs", ignore_errors=True)
+    shutil.rmtree(".build", ignore_errors=True)
+    with redirect_stdout(StringIO()):
+        site.main(["--jobs", str(jobs), "--no-cache"])
+
+
+def run_benchmarks(args):
+    work_dir = tempfile.mkdtemp(prefix="ssg-bench-")
+    cwd = os.getcwd()
+    try:
+        paths = generate_corpus(os.path.join(work_dir, "content"), **corpus_kwargs(args))
+        shutil.copytree(os.path.join(REPO_DIR, "static"), os.path.join(work_dir, "static"))
+        shutil.copy(os.path.join(REPO_DIR, "template.html"), work_dir)
+
+        documents = []
+        for path in paths:
+            with open(path) as f:
+                documents.append(f.read())
+        blocks = [block for doc in documents for block in markdown_to_blocks(doc)]
+        inline = [block for block in blocks if block_to_block_type(block) == BlockType.PARAGRAPH]
+        trees = [markdown_to_html_node(doc) for doc in documents]
+
+        stages = {
+            "markdown_to_blocks": (lambda: [markdown_to_blocks(doc) for doc in documents], len(documents)),
+            "block_to_block_type": (lambda: [block_to_block_type(block) for block in blocks], len(blocks)),
+            "text_to_textnodes": (lambda: [text_to_textnodes(text) for text in inline], len(inline)),
+            "markdown_to_html_node": (lambda: [markdown_to_html_node(doc) for doc in documents], len(documents)),
+            "to_html": (lambda: [tree.to_html() for tree in trees], len(trees)),
+            "full_build": (lambda: full_build(work_dir, args.jobs), len(documents)),
+        }
+
+        results = {}
+        for name, (func, items) in stages.items():
+            if args.only and name not in args.only:
+                continue
+            times = time_stage(func, args.repeat)
+            results[name] = {
+                "best": times[0],
+                "median": statistics.median(times),
+                "items": items,
+            }
+            print(f"{name:<24} best {times[0] * 1000:10.2f} ms   median {statistics.median(times) * 1000:10.2f} ms   ({items} items)")
+        return results
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def compare(results, baseline_path):
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    print(f"\nCompared with {baseline_path} ({baseline.get('commit')}):")
+    for name, stage in results.items():
+        old = baseline["stages"].get(name)
+        if old is None:
+            continue
+        ratio = stage["best"] / old["best"] if old["best"] else float("inf")
+        print(f"{name:<24} {old['best'] * 1000:10.2f} ms -> {stage['best'] * 1000:10.2f} ms   x{ratio:.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the site generator")
+    add_corpus_args(parser)
+    parser.add_argument("--repeat", type=int, default=5, help="runs per stage; the best is reported")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for the full build")
+    parser.add_argument("--only", nargs="*", help="only run these stages")
+    parser.add_argument("--output", help="write results as JSON to this path")
+    parser.add_argument("--compare", help="JSON results from an earlier run to compare against")
+    args = parser.parse_args()
+
+    stages = run_benchmarks(args)
+    results = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "corpus": corpus_kwargs(args),
+        "repeat": args.repeat,
+        "jobs": args.jobs,
+        "stages": stages,
+    }
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nWrote {args.output}")
+    if args.compare:
+        compare(stages, args.compare)
+
+
+if __name__ == "__main__":
+    main()
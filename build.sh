@@ -2,8 +2,8 @@
 
 # This script builds the site for GitHub Pages deployment.
 
-# 1. Clean up old build files
-rm -rf docs
-# 2. Run the main script, passing the basepath as a CLI argument.
+# 1. Run the main script, passing the basepath as a CLI argument.
 #    Replace 'REPO_NAME' with your actual repository name!
+#    Unchanged static files are left in place and anything in docs that
+#    the build no longer produces is removed, so there's no need to wipe it.
 python3 src/main.py "/static-site-gen/"
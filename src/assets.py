@@ -0,0 +1,119 @@
+import hashlib
+import os
+import posixpath
+import re
+
+from manifest import file_entry
+from outputs import load_json, save_json
+
+# Files referenced from pages, the template and stylesheets, which are
+# all rewritten to the new names. Things like robots.txt or favicon.ico
+# keep their names. Scripts are renamed but not read, so assets they
+# load by URL have to be passed in from the page.
+FINGERPRINT_EXTENSIONS = (
+    ".css", ".js", ".mjs",
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg",
+    ".woff", ".woff2",
+)
+
+# Hex digits of the content hash that go into the file name
+HASH_LENGTH = 8
+
+# url(...) and @import "..." references in a stylesheet
+CSS_URL_REGEX = re.compile(r"""url\(\s*(['"]?)([^'")\s]+)\1\s*\)|@import\s+(['"])([^'"]+)\3""")
+
+
+def fingerprinted_path(path, digest):
+    """docs/index.css -> docs/index.1a2b3c4d.css"""
+    root, ext = os.path.splitext(path)
+    return f"{root}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def url_path(dest_path, dest_dir):
+    return "/" + os.path.relpath(dest_path, dest_dir).replace(os.sep, "/")
+
+
+def rewrite_css_urls(css, css_url, lookup):
+    """
+    Points the url() and @import references of a stylesheet served at
+    css_url at their fingerprinted names, through lookup(url) which returns
+    the new URL or None. Root-relative references get the new URL, relative
+    ones just the new file name, so they stay relative.
+    """
+    def replace(match):
+        ref = match.group(2) or match.group(4)
+        if ref.startswith(("data:", "#", "//")) or ":" in ref.split("/")[0]:
+            return match.group(0)
+        path, suffix = re.match(r"([^?#]*)(.*)", ref).groups()
+        url = posixpath.normpath(posixpath.join(posixpath.dirname(css_url), path))
+        renamed = lookup(url)
+        if renamed is None:
+            return match.group(0)
+        new_path = renamed if path.startswith("/") else posixpath.join(posixpath.dirname(path), posixpath.basename(renamed))
+        return match.group(0).replace(ref, new_path + suffix, 1)
+    return CSS_URL_REGEX.sub(replace, css)
+
+
+def fingerprint_pairs(pairs, dest_dir, hashes_path):
+    """
+    Renames the destination of every fingerprintable (source, destination)
+    pair after its content hash. Hashes are remembered in hashes_path and
+    reused while a file's size and mtime don't change. Stylesheets are
+    rewritten to point at the renamed files they reference first, and
+    named after the rewritten text. Returns (pairs, assets, rewritten): the
+    renamed pairs, the lookup table from original to fingerprinted URL,
+    e.g. {"/index.css": "/index.1a2b3c4d.css"}, and {destination: text}
+    for the stylesheets, which are written rather than copied.
+    """
+    previous = load_json(hashes_path)
+    hashes = {}
+    assets = {}
+    renamed_dests = {}
+    stylesheets = {}
+    for source_path, dest_path in pairs:
+        if not dest_path.endswith(FINGERPRINT_EXTENSIONS):
+            continue
+        if dest_path.endswith(".css"):
+            stylesheets[url_path(dest_path, dest_dir)] = (source_path, dest_path)
+            continue
+        entry = file_entry(source_path, dest_path, previous.get(source_path))
+        hashes[source_path] = entry
+        renamed_dests[dest_path] = fingerprinted_path(dest_path, entry["hash"])
+        assets[url_path(dest_path, dest_dir)] = url_path(renamed_dests[dest_path], dest_dir)
+
+    # A stylesheet's name depends on the names of what it references,
+    # other stylesheets included, so those are done first
+    rewritten = {}
+    pending = set()
+
+    def lookup(url):
+        if url in stylesheets and url not in assets and url not in pending:
+            finish_stylesheet(url)
+        return assets.get(url)
+
+    def finish_stylesheet(url):
+        pending.add(url)
+        source_path, dest_path = stylesheets[url]
+        with open(source_path, "r", encoding="utf-8") as f:
+            css = rewrite_css_urls(f.read(), url, lookup)
+        fingerprinted = fingerprinted_path(dest_path, hashlib.sha256(css.encode("utf-8")).hexdigest())
+        rewritten[fingerprinted] = css
+        renamed_dests[dest_path] = fingerprinted
+        assets[url] = url_path(fingerprinted, dest_dir)
+        pending.discard(url)
+
+    for url in stylesheets:
+        if url not in assets:
+            finish_stylesheet(url)
+    save_json(hashes_path, hashes)
+
+    renamed = [(source_path, renamed_dests.get(dest_path, dest_path)) for source_path, dest_path in pairs]
+    return renamed, assets, rewritten
+
+
+def assets_digest(assets):
+    # Stands in for the whole table in page dependencies
+    digest = hashlib.sha256()
+    for url, renamed in sorted(assets.items()):
+        digest.update(f"{url}\0{renamed}\0".encode())
+    return digest.hexdigest()
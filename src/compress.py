@@ -0,0 +1,133 @@
+import gzip
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from outputs import hash_file, load_json, save_json, write_output
+
+try:
+    import brotli
+except ImportError:  # optional: pip install brotli
+    brotli = None
+
+# Text formats worth compressing; images and fonts are compressed already
+COMPRESSIBLE_EXTENSIONS = (".html", ".css", ".js", ".mjs", ".json", ".svg", ".xml", ".txt", ".map")
+
+# Below this, the headers cost more than compression saves
+MIN_SIZE = 1024
+
+COMPRESS_THREADS = os.cpu_count() or 1
+
+
+def gzip_bytes(data):
+    # mtime=0 keeps the output identical for identical input
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def brotli_bytes(data):
+    return brotli.compress(data, quality=11)
+
+
+# Sibling suffix -> compressor
+ENCODINGS = {".gz": gzip_bytes}
+if brotli is not None:
+    ENCODINGS[".br"] = brotli_bytes
+
+
+class CompressResult:
+    def __init__(self):
+        self.outputs = []  # every sibling that exists after the run
+        self.compressed = []  # files whose siblings were (re)written
+        self.unchanged = 0
+        self.removed = []
+
+
+def is_compressible(path):
+    return path.endswith(COMPRESSIBLE_EXTENSIONS)
+
+
+def remove_siblings(path, suffixes):
+    removed = []
+    for suffix in suffixes:
+        try:
+            os.remove(path + suffix)
+            removed.append(path + suffix)
+        except FileNotFoundError:
+            pass
+    return removed
+
+
+def compress_file(path, previous, encodings):
+    """
+    Writes the compressed siblings of path unless the recorded hash (and
+    set of encodings) says they are current. Returns (entry, compressed),
+    where entry is what the state file records for path.
+    """
+    st = os.stat(path)
+    if previous is not None and previous.get("size") == st.st_size and previous.get("mtime_ns") == st.st_mtime_ns:
+        digest = previous["hash"]
+    else:
+        digest = hash_file(path)
+    entry = {"hash": digest, "size": st.st_size, "mtime_ns": st.st_mtime_ns, "siblings": []}
+
+    if (
+        previous is not None
+        and previous.get("hash") == digest
+        and previous.get("encodings") == sorted(encodings)
+        and all(os.path.exists(path + suffix) for suffix in previous.get("siblings", []))
+    ):
+        entry["siblings"] = previous["siblings"]
+        entry["encodings"] = previous["encodings"]
+        return entry, False
+
+    with open(path, "rb") as f:
+        data = f.read()
+    for suffix in sorted(encodings):
+        compressed = encodings[suffix](data)
+        # Only keep a variant that is actually smaller
+        if len(compressed) < len(data):
+            write_output(path + suffix, [compressed])
+            entry["siblings"].append(suffix)
+        else:
+            remove_siblings(path, [suffix])
+    entry["encodings"] = sorted(encodings)
+    return entry, True
+
+
+def compress_outputs(paths, state_path, encodings=None, threads=COMPRESS_THREADS):
+    """
+    Keeps precompressed siblings (index.html.gz, index.html.br) next to
+    every compressible file in paths that is at least MIN_SIZE bytes,
+    compressing in a pool of threads and skipping files whose content hash
+    hasn't changed since the last run. Siblings of files that are gone,
+    too small or no longer compressed are deleted. encodings defaults to
+    ENCODINGS; pass {} to remove every sibling this module wrote.
+    """
+    if encodings is None:
+        encodings = ENCODINGS
+    old_state = load_json(state_path)
+    result = CompressResult()
+
+    candidates = []
+    if encodings:
+        for path in paths:
+            if is_compressible(path) and os.path.getsize(path) >= MIN_SIZE:
+                candidates.append(path)
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        entries = list(executor.map(lambda path: compress_file(path, old_state.get(path), encodings), candidates))
+
+    state = {}
+    for path, (entry, compressed) in zip(candidates, entries):
+        state[path] = entry
+        result.outputs.extend(path + suffix for suffix in entry["siblings"])
+        if compressed:
+            result.compressed.append(path)
+        else:
+            result.unchanged += 1
+
+    for path, entry in old_state.items():
+        if path not in state:
+            result.removed.extend(remove_siblings(path, entry.get("siblings", [])))
+
+    save_json(state_path, state)
+    return result
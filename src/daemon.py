@@ -0,0 +1,247 @@
+import argparse
+import json
+import os
+import socket
+import socketserver
+import sys
+import threading
+from contextlib import redirect_stdout, redirect_stderr
+
+# The build modules are imported inside the functions that use them: a
+# client talking to a running daemon never needs them and starts in less
+# than half the time without them
+
+SOCKET_PATH = os.path.join(".build", "daemon.sock")
+
+# Parse results the daemon keeps in memory, on top of the parse cache on disk
+MEMORY_CACHE_ENTRIES = 20000
+
+
+def run_build(argv):
+    """Runs a build as `python3 src/main.py *argv` would. Returns its exit code."""
+    from main import main as build_main, BuildError
+
+    try:
+        build_main(argv)
+    except SystemExit as e:
+        # Bad arguments; argparse has already printed why
+        return e.code if isinstance(e.code, int) else 1
+    except BuildError as e:
+        print(f"Build failed: {e}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        print(f"Build failed: {type(e).__name__}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+def render_pages(paths, basepath="/"):
+    # Same as the dev server does on a change: only these pages, plus the
+    # listings showing them
+    from main import BuildError
+    from serve import rebuild, template_dependencies
+
+    try:
+        count = rebuild([os.path.normpath(path) for path in paths], [], basepath, template_dependencies(basepath))
+    except (BuildError, OSError, ValueError) as e:
+        print(f"Render failed: {e}", file=sys.stderr)
+        return 1
+    print(f"Rendered {count} outputs")
+    return 0
+
+
+class BuildDaemon:
+    """
+    Runs builds one after another in this process, so what a build keeps
+    per process stays warm between them: imports, compiled templates and
+    parse results. Also remembers the stat snapshot of the sources and
+    outputs after each incremental build, and answers the same build again
+    without running it if nothing in the snapshot has changed.
+    """
+
+    def __init__(self):
+        self.last_build = None  # (argv, sources, outputs) of the last incremental build
+
+    def handle(self, request):
+        if "render" in request:
+            self.last_build = None
+            return render_pages(request["render"], request.get("basepath", "/"))
+        if "argv" in request:
+            return self.build(request["argv"])
+        return 0
+
+    def build(self, argv):
+        from main import parse_args as parse_build_args, MANIFEST_PATH
+        from serve import template_dependencies, CONTENT_DIR, STATIC_DIR, DEST_DIR
+        from watcher import snapshot
+
+        try:
+            args = parse_build_args(argv)
+        except SystemExit as e:
+            return e.code if isinstance(e.code, int) else 1
+        # Profiled builds are run for their timings, so always run
+        if not args.incremental or args.profile or args.profile_output:
+            self.last_build = None
+            return run_build(argv)
+
+        source_paths = [CONTENT_DIR, STATIC_DIR] + template_dependencies(args.basepath)
+        sources = snapshot(source_paths)
+        last = self.last_build
+        if last is not None and last[:2] == (argv, sources) and last[2] == snapshot([DEST_DIR, MANIFEST_PATH]):
+            print("Up to date: nothing changed since the last build")
+            return 0
+        self.last_build = None
+        code = run_build(argv)
+        # A source edited mid-build may not have made it in; don't vouch for it
+        if code == 0 and snapshot(source_paths) == sources:
+            self.last_build = (argv, sources, snapshot([DEST_DIR, MANIFEST_PATH]))
+        return code
+
+
+class ClientStream:
+    """Relays what a build prints to the client, as JSON lines."""
+
+    def __init__(self, wfile, name):
+        self.wfile = wfile
+        self.name = name
+        self.closed = False
+
+    def write(self, text):
+        # A client that hung up doesn't stop the build
+        if text and not self.closed:
+            try:
+                self.wfile.write(json.dumps({self.name: text}).encode() + b"\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.closed = True
+        return len(text)
+
+    def flush(self):
+        if not self.closed:
+            try:
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                self.closed = True
+
+
+class DaemonRequestHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        request = json.loads(line)
+        if request.get("stop"):
+            # shutdown() waits for serve_forever, which is waiting for us
+            threading.Thread(target=self.server.shutdown).start()
+        out = ClientStream(self.wfile, "stdout")
+        with redirect_stdout(out), redirect_stderr(ClientStream(self.wfile, "stderr")):
+            code = self.server.build_daemon.handle(request)
+        if not out.closed:
+            try:
+                self.wfile.write(json.dumps({"exit": code}).encode() + b"\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+
+def make_server(socket_path=SOCKET_PATH):
+    """
+    Binds the daemon's Unix socket, clearing one left behind by a daemon
+    that didn't shut down cleanly. Raises RuntimeError if a daemon is
+    already listening there.
+    """
+    if request({}, socket_path) is not None:
+        raise RuntimeError(f"A build daemon is already listening on {socket_path}")
+    if os.path.exists(socket_path):
+        os.remove(socket_path)
+    os.makedirs(os.path.dirname(socket_path) or ".", exist_ok=True)
+    # Requests are handled one at a time: builds share docs/ and .build/
+    server = socketserver.UnixStreamServer(socket_path, DaemonRequestHandler)
+    server.build_daemon = BuildDaemon()
+    return server
+
+
+def request(message, socket_path=SOCKET_PATH):
+    """
+    Sends one request to the daemon and prints its output as it arrives.
+    Returns the exit code, or None when no daemon is listening.
+    """
+    if not hasattr(socket, "AF_UNIX"):  # Windows
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+    with sock, sock.makefile("rwb") as f:
+        f.write(json.dumps(message).encode() + b"\n")
+        f.flush()
+        for line in f:
+            reply = json.loads(line)
+            if "exit" in reply:
+                return reply["exit"]
+            if "stdout" in reply:
+                sys.stdout.write(reply["stdout"])
+            if "stderr" in reply:
+                sys.stderr.write(reply["stderr"])
+    print("The build daemon went away mid-request", file=sys.stderr)
+    return 1
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Keep a build process running and send it builds, or build in-process when none is running"
+    )
+    parser.add_argument("--socket", default=SOCKET_PATH, help="Unix socket the daemon listens on")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("start", help="run the daemon in the foreground")
+    commands.add_parser("stop", help="stop a running daemon")
+    commands.add_parser("build", help="build the site; takes the same arguments as src/main.py")
+    render = commands.add_parser("render", help="re-render these pages and the listings showing them")
+    render.add_argument("paths", nargs="+")
+    render.add_argument("--basepath", default="/")
+    # Whatever follows build is handed to src/main.py's own parser
+    args, rest = parser.parse_known_args(argv)
+    if args.command == "build":
+        args.args = rest
+    elif rest:
+        parser.error(f"unrecognized arguments: {' '.join(rest)}")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.command == "start":
+        from doc_cache import keep_in_memory
+
+        try:
+            server = make_server(args.socket)
+        except RuntimeError as e:
+            sys.exit(str(e))
+        keep_in_memory(MEMORY_CACHE_ENTRIES)
+        print(f"Build daemon listening on {args.socket} (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            os.remove(args.socket)
+        return 0
+    if args.command == "stop":
+        if request({"stop": True}, args.socket) is None:
+            print("No build daemon is running")
+        return 0
+
+    if args.command == "build":
+        message = {"argv": args.args}
+    else:
+        message = {"render": args.paths, "basepath": args.basepath}
+    code = request(message, args.socket)
+    if code is None:
+        # No daemon: do the same work here, cold
+        code = run_build(args.args) if args.command == "build" else render_pages(args.paths, args.basepath)
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
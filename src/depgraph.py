@@ -0,0 +1,53 @@
+import os
+
+from outputs import hash_file
+
+# Each page entry in the manifest records what its output was built from
+# besides its own source: {"deps": {path: sha256}} covering the template,
+# its partials and its data files. An output is rebuilt when its source or
+# any of those files changed, and only then.
+
+
+def hash_dependencies(paths, hashes):
+    """
+    Returns {path: hash} for paths, hashing each file at most once per
+    build through the shared `hashes` dict.
+    """
+    deps = {}
+    for path in paths:
+        if path not in hashes:
+            hashes[path] = hash_file(path)
+        deps[path] = hashes[path]
+    return deps
+
+
+def rebuild_reasons(entry, previous, changed_settings=(), source="source"):
+    """
+    Lists why the output for `entry` has to be rebuilt given the entry the
+    previous build recorded and the build settings (basepath, say) that
+    changed since. An empty list means it is up to date. `source` names
+    what the entry's hash covers in the reasons.
+    """
+    if previous is None:
+        return ["new page"]
+
+    reasons = []
+    if previous.get("hash") != entry["hash"]:
+        reasons.append(f"{source} changed")
+    if previous.get("dest") != entry["dest"]:
+        reasons.append("output path changed")
+    elif not os.path.exists(entry["dest"]):
+        reasons.append("output missing")
+    reasons.extend(f"{name} changed" for name in changed_settings)
+
+    old_deps = previous.get("deps", {})
+    for path, digest in entry["deps"].items():
+        if path not in old_deps:
+            reasons.append(f"now depends on {path}")
+        elif old_deps[path] != digest:
+            reasons.append(f"{path} changed")
+    for path in old_deps:
+        if path not in entry["deps"]:
+            reasons.append(f"no longer depends on {path}")
+    return reasons
+
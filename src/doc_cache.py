@@ -0,0 +1,183 @@
+import hashlib
+import marshal
+import os
+import sys
+import zlib
+from collections import OrderedDict
+
+from htmlnode import LeafNode, ParentNode
+from markdown_helpers import markdown_to_html_node, extract_title, BLOCK_HANDLERS, BLOCK_CLASSIFIERS
+
+CACHE_DIR = os.path.join(".build", "cache")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+# Bump when the entry layout below changes
+CACHE_FORMAT = 1
+
+# Any change to these modules can change the parse result, so their source
+# is part of every cache key
+PARSER_MODULES = ("markdown_helpers", "htmlnode", "textnode", "block_type")
+
+_parser_version = None
+
+# Parse results kept in memory by a long-running process (the build
+# daemon), encoded like the disk entries so every caller gets its own tree
+# to add ids and rewrite URLs in. None unless keep_in_memory was called
+_memory = None
+_memory_limit = 0
+
+
+def parser_version():
+    global _parser_version
+    if _parser_version is None:
+        digest = hashlib.sha256(f"{CACHE_FORMAT}:{marshal.version}:{sys.version_info[:2]}".encode())
+        for name in PARSER_MODULES:
+            with open(sys.modules[name].__file__, "rb") as f:
+                digest.update(f.read())
+        _parser_version = digest.hexdigest()[:16]
+    return _parser_version
+
+
+def plugin_signature():
+    # Registered block handlers and classifiers change the output without
+    # touching the parser's source, so they're part of the key too
+    names = [f"{key}={handler.__module__}.{handler.__qualname__}" for key, handler in BLOCK_HANDLERS.items()]
+    names.extend(f"{c.__module__}.{c.__qualname__}" for c in BLOCK_CLASSIFIERS)
+    return ";".join(names)
+
+
+def cache_key(markdown_content):
+    digest = hashlib.sha256(parser_version().encode())
+    digest.update(plugin_signature().encode())
+    digest.update(markdown_content.encode())
+    return digest.hexdigest()
+
+
+def entry_path(cache_dir, key):
+    # Two-character fan-out keeps directories small on big sites
+    return os.path.join(cache_dir, key[:2], key[2:] + ".bin")
+
+
+def encode_tree(node):
+    """
+    Flattens an HTMLNode tree into nested tuples that marshal can store:
+    (tag, value, props) for a leaf, (tag, props, children) for a parent,
+    told apart by a leading 0 or 1.
+    """
+    if isinstance(node, ParentNode):
+        return (1, node.tag, node.props, [encode_tree(child) for child in node.children])
+    return (0, node.tag, node.value, node.props)
+
+
+def decode_tree(data):
+    if data[0] == 1:
+        _, tag, props, children = data
+        return ParentNode(tag, [decode_tree(child) for child in children], props)
+    _, tag, value, props = data
+    return LeafNode(tag, value, props)
+
+
+def load(cache_dir, key):
+    """Returns (html_node, title) for key, or None on a miss or a bad entry."""
+    path = entry_path(cache_dir, key)
+    try:
+        with open(path, "rb") as f:
+            title, tree = marshal.loads(zlib.decompress(f.read()))
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, ValueError, TypeError, zlib.error):
+        return None
+    try:
+        # Refresh the mtime so eviction treats it as recently used
+        os.utime(path)
+    except OSError:
+        pass
+    return decode_tree(tree), title
+
+
+def store(cache_dir, key, html_node, title):
+    path = entry_path(cache_dir, key)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = zlib.compress(marshal.dumps((title, encode_tree(html_node))), 1)
+    # Unique temp name plus an atomic rename, so parallel workers writing the
+    # same entry can't leave a torn file for a reader to see
+    tmp_path = f"{path}.{os.getpid()}.{id(data)}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def keep_in_memory(max_entries):
+    """
+    Also keeps up to max_entries parse results in memory, least recently
+    used first out, so a process that builds over and over skips the disk.
+    """
+    global _memory, _memory_limit
+    _memory = OrderedDict()
+    _memory_limit = max_entries
+
+
+def remember(key, html_node, title):
+    # Stored marshalled: decode_tree reuses the props dicts it's given, and
+    # renders add ids and rewrite URLs in them
+    _memory[key] = marshal.dumps((title, encode_tree(html_node)))
+    if len(_memory) > _memory_limit:
+        _memory.popitem(last=False)
+
+
+def parse_cached(markdown_content, cache_dir=None):
+    """
+    Returns (html_node, title) for a Markdown document, from memory or the
+    cache in cache_dir when possible. cache_dir=None parses without caching
+    on disk.
+    """
+    if cache_dir is None and _memory is None:
+        return markdown_to_html_node(markdown_content), extract_title(markdown_content)
+
+    key = cache_key(markdown_content)
+    if _memory is not None and key in _memory:
+        _memory.move_to_end(key)
+        title, tree = marshal.loads(_memory[key])
+        return decode_tree(tree), title
+
+    cached = load(cache_dir, key) if cache_dir is not None else None
+    if cached is not None:
+        html_node, title = cached
+    else:
+        html_node = markdown_to_html_node(markdown_content)
+        title = extract_title(markdown_content)
+        if cache_dir is not None:
+            store(cache_dir, key, html_node, title)
+    if _memory is not None:
+        remember(key, html_node, title)
+    return html_node, title
+
+
+def evict(cache_dir, max_bytes=DEFAULT_MAX_BYTES):
+    """
+    Deletes least recently used entries until the cache fits in max_bytes.
+    Returns the number of entries removed.
+    """
+    entries = []
+    total = 0
+    for dir_path, _, file_names in os.walk(cache_dir):
+        for file_name in file_names:
+            path = os.path.join(dir_path, file_name)
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((st.st_mtime_ns, path, st.st_size))
+            total += st.st_size
+
+    removed = 0
+    for _, path, size in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+    return removed
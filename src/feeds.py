@@ -0,0 +1,104 @@
+import datetime
+import os
+from email.utils import format_datetime
+
+from sitemap import absolute_url, digest_of, text_element, write_streamed
+
+RSS_NAME = "feed.xml"
+ATOM_NAME = "atom.xml"
+ATOM_NAMESPACE = "http://www.w3.org/2005/Atom"
+
+# Feed readers only need the latest posts
+FEED_ITEMS = 20
+
+
+def post_datetime(date):
+    # Posts carry a date only; feeds want a moment, so take midnight UTC
+    return datetime.datetime.combine(datetime.date.fromisoformat(date), datetime.time(), datetime.timezone.utc)
+
+
+def atom_time(date):
+    return post_datetime(date).isoformat().replace("+00:00", "Z")
+
+
+def write_rss(posts, site_url, title):
+    def write_body(xml):
+        xml.startElement("rss", {"version": "2.0", "xmlns:atom": ATOM_NAMESPACE})
+        xml.startElement("channel", {})
+        xml.ignorableWhitespace("\n")
+        text_element(xml, "title", title)
+        text_element(xml, "link", absolute_url(site_url, "/"))
+        text_element(xml, "description", title)
+        self_link = {"href": absolute_url(site_url, RSS_NAME), "rel": "self", "type": "application/rss+xml"}
+        xml.startElement("atom:link", self_link)
+        xml.endElement("atom:link")
+        xml.ignorableWhitespace("\n")
+        for post in posts:
+            link = absolute_url(site_url, post["url"])
+            xml.startElement("item", {})
+            text_element(xml, "title", post["title"])
+            text_element(xml, "link", link)
+            text_element(xml, "guid", link)
+            text_element(xml, "pubDate", format_datetime(post_datetime(post["date"])))
+            if post["summary"]:
+                text_element(xml, "description", post["summary"])
+            for tag in post["tags"]:
+                text_element(xml, "category", tag)
+            xml.endElement("item")
+            xml.ignorableWhitespace("\n")
+        xml.endElement("channel")
+        xml.endElement("rss")
+    return write_body
+
+
+def write_atom(posts, site_url, title):
+    def write_body(xml):
+        xml.startElement("feed", {"xmlns": ATOM_NAMESPACE})
+        xml.ignorableWhitespace("\n")
+        text_element(xml, "id", absolute_url(site_url, "/"))
+        text_element(xml, "title", title)
+        text_element(xml, "updated", atom_time(posts[0]["date"]))
+        xml.startElement("author", {})
+        text_element(xml, "name", title)
+        xml.endElement("author")
+        for rel, url in (("self", ATOM_NAME), ("alternate", "/")):
+            xml.startElement("link", {"rel": rel, "href": absolute_url(site_url, url)})
+            xml.endElement("link")
+        xml.ignorableWhitespace("\n")
+        for post in posts:
+            link = absolute_url(site_url, post["url"])
+            xml.startElement("entry", {})
+            text_element(xml, "id", link)
+            text_element(xml, "title", post["title"])
+            xml.startElement("link", {"href": link})
+            xml.endElement("link")
+            text_element(xml, "updated", atom_time(post["date"]))
+            if post["summary"]:
+                text_element(xml, "summary", post["summary"])
+            for tag in post["tags"]:
+                xml.startElement("category", {"term": tag})
+                xml.endElement("category")
+            xml.endElement("entry")
+            xml.ignorableWhitespace("\n")
+        xml.endElement("feed")
+    return write_body
+
+
+def write_feeds(posts, site_url, title, dest_dir, previous, items=FEED_ITEMS):
+    """
+    Writes an RSS 2.0 feed and an Atom feed of the newest posts (as listed
+    by listings.published_posts, newest first), skipping a feed whose
+    contents haven't changed since `previous` ({path: digest}). Returns
+    ({path: digest}, written); a site without posts gets no feeds.
+    """
+    posts = posts[:items]
+    digests = {}
+    written = []
+    if not posts:
+        return digests, written
+    for name, write in ((RSS_NAME, write_rss), (ATOM_NAME, write_atom)):
+        path = os.path.join(dest_dir, name)
+        digests[path] = digest_of(name, site_url, title, posts)
+        if write_streamed(path, digests[path], previous, write(posts, site_url, title)):
+            written.append(path)
+    return digests, written
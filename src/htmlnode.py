@@ -1,6 +1,30 @@
+import re
+
 from textnode import TextNode, TextType
 
+# Attribute values that can go without quotes when minifying
+UNQUOTED_VALUE_REGEX = re.compile(r"[^\s\"'=<>`]+")
+
+# A <p> may leave out </p> when the next sibling is one of these...
+P_CLOSED_BY = frozenset((
+    "address", "article", "aside", "blockquote", "details", "div", "dl", "fieldset",
+    "figcaption", "figure", "footer", "form", "h1", "h2", "h3", "h4", "h5", "h6",
+    "header", "hgroup", "hr", "main", "menu", "nav", "ol", "p", "pre", "section",
+    "table", "ul",
+))
+# ...or when it's the last child of anything but these
+P_KEEPS_END_IN = frozenset(("a", "audio", "del", "ins", "map", "noscript", "video"))
+# Elements the Markdown renderer puts <p> or <li> directly inside
+FLOW_PARENTS = frozenset((
+    "div", "ul", "ol", "li", "blockquote", "article", "section", "main", "aside",
+    "header", "footer", "nav", "body", "td", "th", "figure", "details",
+))
+
+
 class HTMLNode:
+    # Fixed attribute layout keeps each node small, see bench/bench_memory.py
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(self, tag=None, value=None, children=None, props=None):
         self.tag = tag
         self.value = value
@@ -10,22 +34,46 @@ class HTMLNode:
     def to_html(self):
         raise NotImplementedError
 
-    def props_to_html(self):
+    def iter_html(self, minify=False):
+        """
+        Yields the node's HTML as a series of fragments, so callers can
+        stream a page out without building the whole string first. With
+        minify, attribute quotes and end tags are left out where HTML
+        allows it; text (and so <pre>/<code> content) is never touched.
+        """
+        raise NotImplementedError
+
+    def write_html(self, out, minify=False):
+        """
+        Writes the node's HTML into out, which is either a list (fragments
+        are appended) or any file-like object with a write() method.
+        """
+        write = out.append if isinstance(out, list) else out.write
+        for fragment in self.iter_html(minify):
+            write(fragment)
+
+    def props_to_html(self, minify=False):
         if self.props is None:
             return ""
-        props_str = ""
-        for prop_name, prop_value in self.props.items():
-            props_str += f' {prop_name}="{prop_value}"'
-        return props_str
+        if minify:
+            return "".join(
+                f" {prop_name}={prop_value}"
+                if UNQUOTED_VALUE_REGEX.fullmatch(str(prop_value))
+                else f' {prop_name}="{prop_value}"'
+                for prop_name, prop_value in self.props.items()
+            )
+        return "".join(f' {prop_name}="{prop_value}"' for prop_name, prop_value in self.props.items())
 
     def __repr__(self):
         return f"HTMLNode(tag={self.tag}, value={self.value}, children={self.children}, props={self.props})"
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, value, props=None):
         super().__init__(tag, value, None, props)
     
-    def to_html(self):
+    def to_html(self, minify=False):
         if self.value is None:
             raise ValueError("Invalid LeafNode: value is required")
         if self.tag is None:
@@ -33,27 +81,102 @@ class LeafNode(HTMLNode):
         
         # Check for self-closing tags like img
         if self.tag == "img":
-            return f"<{self.tag}{self.props_to_html()}>"
+            return f"<{self.tag}{self.props_to_html(minify)}>"
         
-        return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
+        return f"<{self.tag}{self.props_to_html(minify)}>{self.value}</{self.tag}>"
+
+    def iter_html(self, minify=False):
+        yield self.to_html(minify)
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(self, tag, children, props=None):
         super().__init__(tag, None, children, props)
     
-    def to_html(self):
-        if self.tag is None:
-            raise ValueError("Invalid ParentNode: tag is required")
-        if self.children is None or len(self.children) == 0:
-            raise ValueError("Invalid ParentNode: children is required")
-        
-        children_html = ""
-        for child in self.children:
-            children_html += child.to_html()
-        
-        return f"<{self.tag}{self.props_to_html()}>{children_html}</{self.tag}>"
+    def to_html(self, minify=False):
+        return "".join(self.iter_html(minify))
+
+    def iter_html(self, minify=False):
+        if minify:
+            yield from self.iter_minified_html()
+            return
+        # Walk the tree with an explicit stack rather than recursing, so each
+        # fragment is produced once and deep nesting can't hit the recursion limit.
+        # Closing tags are pushed as plain strings.
+        stack = [self]
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+            elif isinstance(item, ParentNode):
+                if item.tag is None:
+                    raise ValueError("Invalid ParentNode: tag is required")
+                if item.children is None or len(item.children) == 0:
+                    raise ValueError("Invalid ParentNode: children is required")
+                yield f"<{item.tag}{item.props_to_html()}>"
+                stack.append(f"</{item.tag}>")
+                stack.extend(reversed(item.children))
+            else:
+                yield from item.iter_html()
+
+    def iter_minified_html(self):
+        # Same walk as iter_html, kept separate so the plain path pays
+        # nothing for minify's bookkeeping
+        stack = [self]
+        # Children whose end tag can go, found while expanding their parent
+        optional_end = set()
+        while stack:
+            item = stack.pop()
+            if isinstance(item, str):
+                yield item
+            elif isinstance(item, ParentNode):
+                if item.tag is None:
+                    raise ValueError("Invalid ParentNode: tag is required")
+                if item.children is None or len(item.children) == 0:
+                    raise ValueError("Invalid ParentNode: children is required")
+                yield f"<{item.tag}{item.props_to_html(True)}>"
+                if id(item) in optional_end:
+                    optional_end.discard(id(item))
+                else:
+                    stack.append(f"</{item.tag}>")
+                # Only these can hold a <p> or <li>; inline parents are skipped
+                if item.tag in FLOW_PARENTS:
+                    optional_end.update(optional_end_children(item))
+                stack.extend(reversed(item.children))
+            else:
+                yield from item.iter_html(True)
+
+
+def optional_end_children(parent):
+    """
+    Ids of the children of parent whose end tag HTML lets us leave out:
+    an <li> followed by another <li> or nothing, and a <p> followed by a
+    block element or, in most parents, nothing.
+    """
+    children = parent.children
+    ids = []
+    for i, child in enumerate(children):
+        if not isinstance(child, ParentNode) or child.tag not in ("li", "p"):
+            continue
+        following = children[i + 1] if i + 1 < len(children) else None
+        if following is None:
+            if child.tag == "li" or parent.tag not in P_KEEPS_END_IN:
+                ids.append(id(child))
+        elif child.tag == "li":
+            if following.tag == "li":
+                ids.append(id(child))
+        elif following.tag in P_CLOSED_BY:
+            ids.append(id(child))
+    return ids
 
 def text_node_to_html_node(text_node):
+    if text_node.children is not None:
+        # Nested emphasis, e.g. <b>bold <i>and italic</i></b>
+        tag = {TextType.BOLD: "b", TextType.ITALIC: "i"}.get(text_node.text_type)
+        if tag is None:
+            raise ValueError(f"Text type {text_node.text_type} cannot have children")
+        return ParentNode(tag, [text_node_to_html_node(child) for child in text_node.children])
     if text_node.text_type == TextType.TEXT:
         return LeafNode(None, text_node.text)
     if text_node.text_type == TextType.BOLD:
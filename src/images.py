@@ -0,0 +1,259 @@
+import hashlib
+import json
+import os
+import struct
+from concurrent.futures import ThreadPoolExecutor
+
+from assets import url_path
+from htmlnode import ParentNode
+from manifest import file_entry
+from outputs import load_json, open_output, save_json
+from template import rewrite_url
+
+try:
+    from PIL import Image
+except ImportError:  # optional: pip install Pillow
+    Image = None
+
+# Formats whose size can be read from the header
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".gif", ".webp")
+
+# Formats downscaled variants are made of; GIFs may be animated
+VARIANT_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+
+# Widths of the downscaled variants. Content is at most 800px wide, so
+# these cover it at 1x and 2x plus small screens
+VARIANT_WIDTHS = (400, 800, 1600)
+
+# Tells the browser how wide images are laid out, to pick from srcset
+IMAGE_SIZES = "(max-width: 800px) 100vw, 800px"
+
+IMAGE_THREADS = os.cpu_count() or 1
+
+# Headers are read this far at most; JPEGs can carry large EXIF blocks
+# ahead of the frame header
+MAX_HEADER_BYTES = 1024 * 1024
+
+JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+class ImageResult:
+    def __init__(self):
+        self.images = {}  # original URL -> {"width", "height", "srcset"}
+        self.outputs = []  # every variant that exists after the run
+        self.generated = []  # variants (re)written this run
+        self.removed = []
+
+
+def can_resize():
+    return Image is not None
+
+
+def png_size(head):
+    if head[:8] == b"\x89PNG\r\n\x1a\n" and head[12:16] == b"IHDR":
+        return struct.unpack(">II", head[16:24])
+    return None
+
+
+def gif_size(head):
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return struct.unpack("<HH", head[6:10])
+    return None
+
+
+def webp_size(head):
+    if head[:4] != b"RIFF" or head[8:12] != b"WEBP":
+        return None
+    chunk = head[12:16]
+    if chunk == b"VP8 " and head[23:26] == b"\x9d\x01\x2a":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L" and head[20:21] == b"\x2f":
+        bits = int.from_bytes(head[21:25], "little")
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        return int.from_bytes(head[24:27], "little") + 1, int.from_bytes(head[27:30], "little") + 1
+    return None
+
+
+def jpeg_size(f):
+    # Walks the marker segments up to the first frame header
+    if f.read(2) != b"\xff\xd8":
+        return None
+    while f.tell() < MAX_HEADER_BYTES:
+        byte = f.read(1)
+        if byte != b"\xff":
+            return None
+        marker = f.read(1)
+        while marker == b"\xff":  # fill bytes
+            marker = f.read(1)
+        if not marker:
+            return None
+        code = marker[0]
+        if code in (0x01, 0xD8) or 0xD0 <= code <= 0xD7:
+            continue  # no length follows
+        length_bytes = f.read(2)
+        if len(length_bytes) < 2:
+            return None
+        length = struct.unpack(">H", length_bytes)[0]
+        if code in JPEG_SOF_MARKERS:
+            frame = f.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">xHH", frame)
+            return width, height
+        f.seek(length - 2, os.SEEK_CUR)
+    return None
+
+
+def image_size(path):
+    """
+    Returns (width, height) read from the image's header, without decoding
+    it, or None for formats it doesn't know and malformed files.
+    """
+    with open(path, "rb") as f:
+        head = f.read(32)
+        for read_size in (png_size, gif_size, webp_size):
+            size = read_size(head)
+            if size is not None:
+                return size
+        f.seek(0)
+        return jpeg_size(f)
+
+
+def variant_path(dest_path, width):
+    """docs/images/a.png -> docs/images/a-400w.png"""
+    root, ext = os.path.splitext(dest_path)
+    return f"{root}-{width}w{ext}"
+
+
+def resize(source_path, path, width):
+    with Image.open(source_path) as image:
+        height = max(1, round(image.height * width / image.width))
+        with open_output(path, "wb") as f:
+            image.resize((width, height), Image.LANCZOS).save(f, format=image.format)
+
+
+def process_image(source_path, dest_path, previous, widths):
+    """
+    Reads the size of one image and writes its downscaled variants, unless
+    the recorded hash says the ones on disk are current. Returns (entry,
+    generated), where entry is what the state file records for the source.
+    """
+    entry = file_entry(source_path, dest_path, previous)
+    current = previous is not None and previous.get("hash") == entry["hash"]
+    if current and "width" in previous:
+        entry["width"], entry["height"] = previous["width"], previous["height"]
+    else:
+        size = image_size(source_path)
+        entry["width"], entry["height"] = size if size is not None else (None, None)
+
+    entry["variants"] = []
+    if entry["width"] and dest_path.endswith(VARIANT_EXTENSIONS):
+        entry["variants"] = [
+            [width, variant_path(dest_path, width)] for width in sorted(widths) if width < entry["width"]
+        ]
+    if current and previous.get("variants") == entry["variants"] and all(
+        os.path.exists(path) for _, path in entry["variants"]
+    ):
+        return entry, []
+
+    generated = []
+    for width, path in entry["variants"]:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        resize(source_path, path, width)
+        generated.append(path)
+    return entry, generated
+
+
+def process_images(pairs, static_dir, dest_dir, state_path, widths=(), threads=IMAGE_THREADS):
+    """
+    Reads the dimensions of every image among the (source, destination)
+    pairs of static files and, for each width in widths smaller than the
+    image, writes a downscaled copy next to its destination. Work runs in
+    a pool of threads and is skipped for images whose content hash hasn't
+    changed since the last run; variants that are no longer wanted are
+    deleted. result.images maps each image's URL as pages write it
+    (relative to static_dir) to its size and srcset candidates.
+    """
+    if widths and Image is None:
+        raise RuntimeError("Downscaled image variants need Pillow: pip install Pillow")
+    old_state = load_json(state_path)
+    result = ImageResult()
+
+    candidates = [(source_path, dest_path) for source_path, dest_path in pairs if source_path.endswith(IMAGE_EXTENSIONS)]
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        entries = list(executor.map(
+            lambda pair: process_image(pair[0], pair[1], old_state.get(pair[0]), widths),
+            candidates,
+        ))
+
+    state = {}
+    for (source_path, dest_path), (entry, generated) in zip(candidates, entries):
+        state[source_path] = entry
+        result.generated.extend(generated)
+        result.outputs.extend(path for _, path in entry["variants"])
+        if entry["width"] is None:
+            continue
+        srcset = [[url_path(path, dest_dir), width] for width, path in entry["variants"]]
+        if srcset:
+            srcset.append([url_path(dest_path, dest_dir), entry["width"]])
+        result.images[url_path(source_path, static_dir)] = {
+            "width": entry["width"],
+            "height": entry["height"],
+            "srcset": srcset,
+        }
+
+    wanted = set(result.outputs)
+    for entry in old_state.values():
+        for _, path in entry.get("variants", []):
+            if path not in wanted and os.path.exists(path):
+                os.remove(path)
+                result.removed.append(path)
+
+    save_json(state_path, state)
+    return result
+
+
+def images_digest(images):
+    # Stands in for the whole table in page dependencies
+    return hashlib.sha256(json.dumps(images, sort_keys=True).encode()).hexdigest()
+
+
+class ImageAttributes:
+    """
+    Adds width and height to the <img> tags of one page, plus srcset and
+    sizes when there are variants, so the browser can lay the page out
+    before images arrive. Every image but the page's first is lazy loaded:
+    the first is usually in view, and deferring it only delays it. Call
+    with each block of the page in order, before URLs are rewritten.
+    """
+
+    def __init__(self, images, basepath="/"):
+        self.images = images
+        self.basepath = basepath
+        self.first = True
+
+    def __call__(self, node):
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, ParentNode):
+                stack.extend(reversed(node.children or []))
+                continue
+            if node.tag != "img":
+                continue
+            props = node.props if node.props is not None else {}
+            info = self.images.get(props.get("src"))
+            if info is not None:
+                props["width"] = str(info["width"])
+                props["height"] = str(info["height"])
+            if not self.first:
+                props["loading"] = "lazy"
+            self.first = False
+            if info is not None and info["srcset"]:
+                props["srcset"] = ", ".join(
+                    f"{rewrite_url(url, self.basepath)} {width}w" for url, width in info["srcset"]
+                )
+                props["sizes"] = IMAGE_SIZES
+            node.props = props
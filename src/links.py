@@ -0,0 +1,153 @@
+import argparse
+import os
+import posixpath
+from urllib.parse import urljoin, urlsplit
+
+from htmlnode import ParentNode
+from outputs import load_json, save_json
+
+# Outbound links of every page, kept between builds so incremental builds
+# only re-index the pages they re-render
+INDEX_PATH = os.path.join(".build", "links.json")
+INDEX_VERSION = 1
+
+
+def extract_links(node):
+    """Returns the href of every <a> in the tree, in document order, without repeats."""
+    links = []
+    seen = set()
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParentNode):
+            stack.extend(reversed(node.children))
+        elif node.tag == "a" and node.props and "href" in node.props:
+            href = node.props["href"]
+            if href not in seen:
+                seen.add(href)
+                links.append(href)
+    return links
+
+
+def is_internal(href):
+    parts = urlsplit(href)
+    # Anything with a scheme (https:, mailto:) or a host (//cdn...) leaves the site,
+    # and a bare #fragment stays on the same page
+    return not parts.scheme and not parts.netloc and bool(parts.path)
+
+
+def page_url(dest_path, dest_dir):
+    """docs/blog/tom/index.html -> /blog/tom/, docs/about.html -> /about.html"""
+    rel = output_path(dest_path, dest_dir)
+    if rel == "index.html":
+        return "/"
+    if rel.endswith("/index.html"):
+        return "/" + rel[:-len("index.html")]
+    return "/" + rel
+
+
+def resolve(href, from_url, outputs):
+    """
+    Resolves an internal link from the page at from_url to the output it
+    points at (a path relative to the output directory), or None if the
+    build doesn't produce anything there.
+    """
+    path = urlsplit(urljoin(from_url, href)).path
+    path = posixpath.normpath(path) + ("/" if path.endswith("/") and path != "/" else "")
+    rel = path.lstrip("/")
+    if rel == "" or rel.endswith("/"):
+        candidates = [rel + "index.html"]
+    else:
+        candidates = [rel, rel + "/index.html", rel + ".html"]
+    for candidate in candidates:
+        if candidate in outputs:
+            return candidate
+    return None
+
+
+def new_link_index():
+    return {"version": INDEX_VERSION, "pages": {}}
+
+
+def load_link_index(path=INDEX_PATH):
+    return load_json(path, new_link_index, INDEX_VERSION)
+
+
+def save_link_index(index, path=INDEX_PATH):
+    save_json(path, index)
+
+
+def output_path(dest_path, dest_dir):
+    # How outputs are named in the index: relative to dest_dir, "/"-separated
+    return os.path.relpath(dest_path, dest_dir).replace(os.sep, "/")
+
+
+def index_page(index, source, dest_path, dest_dir, links):
+    index["pages"][source] = {
+        "url": page_url(dest_path, dest_dir),
+        "output": output_path(dest_path, dest_dir),
+        "links": [href for href in links if is_internal(href)],
+    }
+
+
+def check_links(index, outputs):
+    """
+    Resolves every indexed link against the set of output paths (relative
+    to the output directory, "/"-separated). Returns (broken, orphans):
+    broken is a sorted list of (source, href), orphans the sorted sources
+    of pages no other page links to (the home page doesn't count).
+    """
+    broken = []
+    linked = set()
+    for source, page in index["pages"].items():
+        for href in page["links"]:
+            target = resolve(href, page["url"], outputs)
+            if target is None:
+                broken.append((source, href))
+            elif target != page["output"]:
+                linked.add(target)
+
+    orphans = []
+    for source, page in index["pages"].items():
+        if page["url"] != "/" and page["output"] not in linked:
+            orphans.append(source)
+    return sorted(broken), sorted(orphans)
+
+
+def report_links(index, outputs):
+    broken, orphans = check_links(index, outputs)
+    for source, href in broken:
+        print(f"Broken link in {source}: {href}")
+    for source in orphans:
+        print(f"Orphan page {source}: no other page links to it")
+    return broken, orphans
+
+
+def inbound_links(index, url):
+    """Sources of the pages that link to url."""
+    sources = []
+    for source, page in index["pages"].items():
+        for href in page["links"]:
+            if posixpath.normpath(urlsplit(urljoin(page["url"], href)).path) == posixpath.normpath(url):
+                sources.append(source)
+                break
+    return sorted(sources)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the link index written by the last build")
+    parser.add_argument("--to", help="list pages that link to this URL")
+    parser.add_argument("--from", dest="source", help="list links from this source file")
+    args = parser.parse_args()
+
+    index = load_link_index()
+    if args.to:
+        for source in inbound_links(index, args.to):
+            print(source)
+    if args.source:
+        for href in index["pages"].get(args.source, {}).get("links", []):
+            print(href)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+
+from htmlnode import LeafNode, ParentNode
+from markdown_helpers import text_to_children
+from search import slugify
+
+# Generated pages, under these URLs. Each listing is split into pages of
+# POSTS_PER_PAGE posts: /blog/, /blog/page/2/, /blog/page/3/, ...
+BLOG_URL = "/blog/"
+TAGS_URL = "/tags/"
+ARCHIVE_URL = "/archive/"
+POSTS_PER_PAGE = 10
+
+# Shown at the foot of every listing so they all link to each other
+SECTION_LINKS = ((BLOG_URL, "Blog"), (TAGS_URL, "Tags"), (ARCHIVE_URL, "Archive"))
+
+
+def published_posts(index, drafts=False):
+    """
+    Posts are pages with a date in their front matter. Returns what the
+    listings show of each, newest first; drafts only when asked for.
+    """
+    posts = []
+    for meta in index["pages"].values():
+        if meta.get("date") is None or (meta.get("draft") and not drafts):
+            continue
+        posts.append({
+            "url": meta["url"],
+            "title": meta.get("title") or meta["url"],
+            "date": meta["date"],
+            "summary": meta.get("summary"),
+            "tags": meta.get("tags", []),
+        })
+    posts.sort(key=lambda post: (post["date"], post["url"]), reverse=True)
+    return posts
+
+
+def tag_url(tag):
+    return f"{TAGS_URL}{slugify(tag)}/"
+
+
+def page_url(url, number):
+    return url if number == 1 else f"{url}page/{number}/"
+
+
+def paginate(url, title, posts, per_page=POSTS_PER_PAGE):
+    count = max(1, (len(posts) + per_page - 1) // per_page)
+    listings = []
+    for number in range(1, count + 1):
+        listings.append({
+            "url": page_url(url, number),
+            "title": title if number == 1 else f"{title} (page {number})",
+            "posts": posts[(number - 1) * per_page:number * per_page],
+            "newer": page_url(url, number - 1) if number > 1 else None,
+            "older": page_url(url, number + 1) if number < count else None,
+        })
+    return listings
+
+
+def plan_listings(index, drafts=False, per_page=POSTS_PER_PAGE):
+    """
+    Works out every generated page from the metadata index: the paginated
+    blog, a listing per tag plus an index of tags, and a listing per year
+    plus an index of years. Each listing is a plain dict holding exactly
+    what goes on the page, so its digest changes only when the page would.
+    Returns [] for a site without posts.
+    """
+    posts = published_posts(index, drafts)
+    if not posts:
+        return []
+    listings = paginate(BLOG_URL, "Blog", posts, per_page)
+
+    # Tags that slugify alike share a page, named after the first seen
+    by_tag = {}
+    names = {}
+    for post in posts:
+        for tag in post["tags"]:
+            url = tag_url(tag)
+            names.setdefault(url, tag)
+            by_tag.setdefault(url, []).append(post)
+    tag_links = []
+    for url in sorted(by_tag, key=lambda url: names[url].lower()):
+        listings.extend(paginate(url, f"Posts tagged {names[url]}", by_tag[url], per_page))
+        tag_links.append([url, f"{names[url]} ({len(by_tag[url])})"])
+    listings.append({"url": TAGS_URL, "title": "Tags", "links": tag_links})
+
+    by_year = {}
+    for post in posts:
+        by_year.setdefault(post["date"][:4], []).append(post)
+    year_links = []
+    for year in sorted(by_year, reverse=True):
+        url = f"{ARCHIVE_URL}{year}/"
+        listings.extend(paginate(url, f"Posts from {year}", by_year[year], per_page))
+        year_links.append([url, f"{year} ({len(by_year[year])})"])
+    listings.append({"url": ARCHIVE_URL, "title": "Archive", "links": year_links})
+    return listings
+
+
+def listing_digest(listing):
+    return hashlib.sha256(json.dumps(listing, sort_keys=True).encode()).hexdigest()
+
+
+def listing_dest(url, dest_dir):
+    """/blog/page/2/ -> docs/blog/page/2/index.html"""
+    return os.path.join(dest_dir, *url.strip("/").split("/"), "index.html")
+
+
+def link_node(url, text):
+    return LeafNode("a", text, {"href": url})
+
+
+def nav_node(links, props=None):
+    # Spaced out so the links don't run together without a stylesheet
+    children = []
+    for url, text in links:
+        if children:
+            children.append(LeafNode(None, " "))
+        children.append(link_node(url, text))
+    return ParentNode("nav", children, props)
+
+
+def post_node(post):
+    children = [
+        ParentNode("h2", [link_node(post["url"], post["title"])]),
+        LeafNode("time", post["date"], {"datetime": post["date"]}),
+    ]
+    if post["summary"]:
+        children.append(ParentNode("p", text_to_children(post["summary"])))
+    if post["tags"]:
+        children.append(nav_node([(tag_url(tag), tag) for tag in post["tags"]], {"class": "tags"}))
+    return ParentNode("li", children)
+
+
+def listing_node(listing):
+    """
+    Builds a listing's content as the same kind of node tree a Markdown
+    page produces, so it goes through the template, URL rewriting and
+    serializer like any other page.
+    """
+    children = [LeafNode("h1", listing["title"])]
+    if listing.get("posts"):
+        children.append(ParentNode("ul", [post_node(post) for post in listing["posts"]], {"class": "posts"}))
+    if listing.get("links"):
+        children.append(ParentNode("ul", [ParentNode("li", [link_node(url, text)]) for url, text in listing["links"]]))
+    pages = []
+    if listing.get("newer"):
+        pages.append((listing["newer"], "Newer posts"))
+    if listing.get("older"):
+        pages.append((listing["older"], "Older posts"))
+    if pages:
+        children.append(nav_node(pages, {"class": "pagination"}))
+    children.append(nav_node([(url, text) for url, text in SECTION_LINKS if url != listing["url"]]))
+    return ParentNode("div", children)
+
@@ -1,100 +1,807 @@
 import os
-import shutil
-import sys  # Added for CLI argument handling
+import sys
+import argparse  # CLI argument handling
 
-from markdown_helpers import markdown_to_html_node, extract_title
 from htmlnode import ParentNode
+from markdown_helpers import MarkdownStream
+from manifest import (
+    new_manifest,
+    load_manifest,
+    save_manifest,
+    file_entry,
+    stale_outputs,
+)
+from parallel import map_batched, default_jobs
+from template import load_template, rewrite_root_urls, rewrite_url
+from doc_cache import parse_cached, evict, CACHE_DIR, DEFAULT_MAX_BYTES
+from depgraph import hash_dependencies, rebuild_reasons
+from links import (
+    extract_links,
+    index_page,
+    new_link_index,
+    load_link_index,
+    save_link_index,
+    report_links,
+    output_path,
+    page_url,
+)
+from search import (
+    SectionCollector,
+    collect_sections,
+    index_sections,
+    new_search_index,
+    load_search_index,
+    save_search_index,
+    write_search_files,
+)
+from assets import fingerprint_pairs, assets_digest
+from compress import compress_outputs
+from images import ImageAttributes, process_images, images_digest, VARIANT_WIDTHS, can_resize
+from metadata import (
+    split_front_matter,
+    read_front_matter,
+    scan_page,
+    page_metadata,
+    new_metadata_index,
+    load_metadata_index,
+    save_metadata_index,
+)
+from listings import plan_listings, published_posts, listing_digest, listing_dest, listing_node
+from sitemap import write_sitemap, remove_stale
+from feeds import write_feeds
+from outputs import load_json, save_json, write_output, open_output, record_changes
+from static_sync import sync_static, prune_outputs, LINK_MODES
+from walker import walk_files
+import profiling
+from profiling import stage
 
+# Sources bigger than this are parsed block by block straight from the file
+# instead of being read into memory whole
+STREAM_THRESHOLD = 8 * 1024 * 1024
 
-def copy_static(source_dir, dest_dir):
+# Where incremental builds remember what they produced last time
+MANIFEST_PATH = os.path.join(".build", "manifest.json")
+
+
+class BuildError(Exception):
+    """Raised after a build in which one or more pages failed to render."""
+
+    def __init__(self, failures, total):
+        super().__init__(f"{len(failures)} of {total} pages failed to build")
+        self.failures = failures
+
+
+def copy_static(source_dir, dest_dir, checksum=False, link="auto", hashes_path=None, ignore=()):
     """
-    Recursively copies contents from source_dir to dest_dir.
+    Syncs contents from source_dir into dest_dir, copying only files that are
+    new or changed and don't match an ignore pattern. Nothing is deleted, so
+    generated pages in the same directory survive; callers clean up stale
+    files. With hashes_path, CSS, JS, images and fonts are fingerprinted and
+    result.assets maps their original URLs to the new ones.
     """
     if not os.path.exists(source_dir):
         raise FileNotFoundError(f"Source directory not found: {source_dir}")
 
-    if os.path.exists(dest_dir):
-        # Delete and recreate the destination directory
-        print(f"Deleting {dest_dir} directory...")
-        shutil.rmtree(dest_dir)
-    
-    os.makedirs(dest_dir)
+    pairs = collect_files(source_dir, dest_dir, ignore)
+    assets = {}
+    rewritten = {}
+    if hashes_path is not None:
+        pairs, assets, rewritten = fingerprint_pairs(pairs, dest_dir, hashes_path)
+    result = sync_static([pair for pair in pairs if pair[1] not in rewritten], checksum, link)
+    # Stylesheets pointing at fingerprinted files are written, not copied
+    for source_path, dest_path in pairs:
+        if dest_path in rewritten:
+            if write_output(dest_path, [rewritten[dest_path]]):
+                result.copied.append((source_path, dest_path))
+            else:
+                result.unchanged += 1
+    result.outputs = pairs
+    result.assets = assets
+    for source_path, dest_path in result.copied:
+        print(f"Copied file from {source_path} to {dest_path}")
+    print(f"Synced {source_dir} to {dest_dir}: {len(result.copied)} copied, {result.unchanged} unchanged")
+    return result
 
-    for item in os.listdir(source_dir):
-        source_path = os.path.join(source_dir, item)
-        dest_path = os.path.join(dest_dir, item)
 
-        if os.path.isfile(source_path):
-            shutil.copy(source_path, dest_path)
-            print(f"Copied file from {source_path} to {dest_path}")
-        elif os.path.isdir(source_path):
-            print(f"Copying directory from {source_path} to {dest_path}")
-            # Recursive call to handle subdirectories
-            copy_static(source_path, dest_path)
+def generate_page(from_path, template_path, dest_path, basepath, cache_dir=None):
+    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+    render_page(from_path, template_path, dest_path, basepath, cache_dir)
 
 
-def generate_page(from_path, template_path, dest_path, basepath):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
-    
+def render_page(
+    from_path, template_path, dest_path, basepath, cache_dir=None, assets=None, minify=False, images=None
+):
+    # Same as generate_page but silent, so worker processes don't interleave output.
+    # Returns what the build needs to know about the page: its outbound
+    # links and its searchable sections
+    if os.path.getsize(from_path) > STREAM_THRESHOLD:
+        return render_page_streaming(from_path, template_path, dest_path, basepath, assets, minify, images)
+
     # Read files (omitted file existence checks for brevity but they should be in place)
-    with open(from_path, "r") as f:
-        markdown_content = f.read()
-
-    with open(template_path, "r") as f:
-        template_content = f.read()
-
-    # Convert markdown to an HTML node and extract the title
-    html_node = markdown_to_html_node(markdown_content)
-    title = extract_title(markdown_content)
-    
-    # Convert the HTML node to a string
-    html_content = html_node.to_html()
-
-    # Replace placeholders in the template
-    final_html = template_content.replace("{{ Title }}", title)
-    final_html = final_html.replace("{{ Content }}", html_content)
-    
-    # Replace hardcoded root paths with the dynamic basepath
-    final_html = final_html.replace('href="/', f'href="{basepath}')
-    final_html = final_html.replace('src="/', f'src="{basepath}')
-
-    # Ensure the destination directory exists
-    dest_dir_path = os.path.dirname(dest_path)
-    os.makedirs(dest_dir_path, exist_ok=True)
-    
-    # Write the final HTML to the destination file
-    with open(dest_path, "w") as f:
-        f.write(final_html)
-
-
-def generate_pages_recursive(from_dir_path, template_path, dest_dir_path, basepath):
+    with stage("read", from_path):
+        with open(from_path, "r") as f:
+            markdown_content = f.read()
+        # Front matter was already read by the metadata scan
+        _, markdown_content = split_front_matter(markdown_content, from_path)
+
+    # Compiled once per process and reused until template.html changes
+    with stage("template", from_path):
+        template = load_template(template_path, basepath, assets, minify)
+
+    # Convert markdown to an HTML node and extract the title, or load both
+    # from the parse cache if this exact source was seen before
+    with stage("parse", from_path):
+        html_node, title = parse_cached(markdown_content, cache_dir)
+        # Links are indexed as written, before the basepath goes on
+        links = extract_links(html_node)
+        # Image sizes are looked up by the URLs as written too
+        ImageAttributes(images or {}, basepath)(html_node)
+        rewrite_root_urls(html_node, basepath, assets)
+        # Also gives headings the ids search results link to
+        sections = collect_sections(html_node)
+
+    # Fill in the template; the fragments are kept apart (never joined into
+    # one big string) and handed to writelines
+    with stage("render", from_path):
+        fragments = []
+        template.render_to(fragments, Title=title, Content=html_node)
+
+    with stage("write", from_path):
+        # Atomic, and skipped when the page comes out the same as before
+        write_output(dest_path, fragments)
+
+    return {"links": links, "title": title, "sections": sections}
+
+
+def render_page_streaming(from_path, template_path, dest_path, basepath, assets=None, minify=False, images=None):
+    """
+    Renders a very large page in bounded memory: blocks are parsed from the
+    file line by line and written out as soon as they're rendered. Skips the
+    parse cache, which would need the whole tree.
+    """
+    template = load_template(template_path, basepath, assets, minify)
+    links = []
+    seen = set()
+    sections = SectionCollector()
+    add_image_attributes = ImageAttributes(images or {}, basepath)
+
+    def on_block(node):
+        for link in extract_links(node):
+            if link not in seen:
+                seen.add(link)
+                links.append(link)
+        add_image_attributes(node)
+        rewrite_root_urls(node, basepath, assets)
+        sections.add_block(node)
+
+    with stage("stream", from_path):
+        with open(from_path, "r") as src:
+            _, lines = read_front_matter(src, from_path)
+            stream = MarkdownStream(lines, on_block=on_block)
+            # The title goes into the template ahead of the content
+            title = stream.find_title()
+            with open_output(dest_path) as f:
+                template.render_to(f, Title=title, Content=stream)
+    return {"links": links, "title": title, "sections": sections.finish()}
+
+
+def render_page_profiled(
+    from_path, template_path, dest_path, basepath, cache_dir=None, assets=None, minify=False, images=None
+):
+    # Worker processes don't share the parent's profiler, so switch it on
+    # here and ship this page's spans back with the result
+    profiling.enable()
+    since = profiling.mark()
+    info = render_page(from_path, template_path, dest_path, basepath, cache_dir, assets, minify, images)
+    info["spans"] = profiling.drain(since)
+    return info
+
+
+def generate_pages(pages, template_path, basepath, jobs=1, cache_dir=None, assets=None, minify=False, images=None):
+    """
+    Renders a list of (source, destination) pages, across `jobs` worker
+    processes when jobs > 1. Progress and errors are reported in page order,
+    and any failure raises once every page has been attempted. Returns
+    {source: info} with what render_page reported for each page.
+    """
+    results = map_batched(
+        render_page_profiled if profiling.is_enabled() else render_page,
+        [
+            (from_path, template_path, dest_path, basepath, cache_dir, assets, minify, images)
+            for from_path, dest_path in pages
+        ],
+        jobs,
+    )
+
+    failures = []
+    infos = {}
+    for (from_path, dest_path), (info, error) in zip(pages, results):
+        print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+        if error is not None:
+            failures.append((from_path, error))
+            continue
+        profiling.record(info.pop("spans", []))
+        infos[from_path] = info
+
+    for from_path, error in failures:
+        print(f"Failed to generate {from_path}: {error}", file=sys.stderr)
+    if failures:
+        raise BuildError(failures, len(pages))
+    return infos
+
+
+def generate_pages_recursive(
+    from_dir_path, template_path, dest_dir_path, basepath, jobs=1, cache_dir=None, assets=None, minify=False,
+    images=None, ignore=(),
+):
     if not os.path.exists(dest_dir_path):
         os.makedirs(dest_dir_path)
 
-    for item_name in os.listdir(from_dir_path):
-        from_path = os.path.join(from_dir_path, item_name)
-        dest_path = os.path.join(dest_dir_path, item_name)
+    # Walk the whole tree up front so the pages can be handed out in batches
+    with stage("walk"):
+        pages = collect_pages(from_dir_path, dest_dir_path, ignore)
+    infos = generate_pages(pages, template_path, basepath, jobs, cache_dir, assets, minify, images)
+    return pages, infos
+
+
+def collect_files(from_dir_path, dest_dir_path, ignore=()):
+    """
+    Walks from_dir_path and returns (source, destination) pairs for every
+    file in it not matching an ignore pattern, sorted so builds always
+    visit files in the same order.
+    """
+    pairs = []
+    for rel_path, entry in walk_files(from_dir_path, ignore):
+        pairs.append((entry.path, os.path.normpath(os.path.join(dest_dir_path, rel_path))))
+    return pairs
+
+
+def collect_pages(from_dir_path, dest_dir_path, ignore=()):
+    pages = []
+    for from_path, dest_path in collect_files(from_dir_path, dest_dir_path, ignore):
+        if from_path.endswith(".md"):
+            pages.append((from_path, dest_path[:-len(".md")] + ".html"))
+    return pages
+
+
+def remove_output(path, dest_dir_path):
+    """
+    Deletes a stale output file, then prunes any directories it leaves
+    empty (stopping at dest_dir_path).
+    """
+    if os.path.isfile(path):
+        print(f"Removing stale output {path}")
+        os.remove(path)
+    parent = os.path.dirname(path)
+    root = os.path.abspath(dest_dir_path)
+    while os.path.abspath(parent).startswith(root + os.sep) and os.path.isdir(parent):
+        if os.listdir(parent):
+            break
+        os.rmdir(parent)
+        parent = os.path.dirname(parent)
+
+
+def build_incremental(
+    static_dir,
+    content_dir,
+    template_path,
+    dest_dir,
+    basepath,
+    manifest_path=MANIFEST_PATH,
+    jobs=1,
+    checksum=False,
+    link="auto",
+    cache_dir=None,
+    explain=False,
+    compress=False,
+    fingerprint=False,
+    minify=False,
+    image_variants=False,
+    drafts=False,
+    site_url=None,
+    ignore=(),
+):
+    """
+    Rebuilds only what changed since the last run, using the manifest of
+    source hashes. Each page also records the template, partials and data
+    files it was rendered from, and is re-rendered when any of them change.
+    Static files are left alone by template changes. With explain, prints
+    why each page was re-rendered; with compress, keeps .gz/.br siblings
+    of the outputs up to date; with fingerprint, static assets get content
+    hashed names and pages are re-rendered when those names change; minify
+    is passed on to the serializer and switching it re-renders every page.
+    Images get their dimensions on every build, and downscaled variants
+    with image_variants. Pages marked draft are skipped unless drafts is
+    set; listing pages are re-rendered only when the posts they show change.
+    With site_url, sitemap.xml and the feeds are written from the same page
+    list, skipping any file whose contents are unchanged. What changed in
+    dest_dir since the last build is listed in changes.json beside the
+    manifest. Sources matching an ignore pattern are left out, and their
+    outputs from earlier builds removed. Without a usable manifest, every
+    file in dest_dir the build didn't write is removed.
+    """
+    old_manifest = load_manifest(manifest_path)
+    manifest = new_manifest()
+    manifest["basepath"] = basepath
+    manifest["minify"] = minify
+    # Settings that change every page without changing any of its inputs
+    changed_settings = [name for name in ("basepath", "minify") if old_manifest.get(name) != manifest[name]]
+
+    with stage("copy_static"):
+        hashes_path = state_path(manifest_path, "assets.json") if fingerprint else None
+        static = copy_static(static_dir, dest_dir, checksum, link, hashes_path, ignore)
+    images = process_site_images(static.outputs, static_dir, dest_dir, manifest_path, image_variants)
+
+    # Every page renders through the same template, so they share its
+    # dependencies; each is hashed once. The asset and image tables count
+    # as one too: a renamed or resized image changes every page showing it
+    template = load_template(template_path, basepath, static.assets, minify)
+    deps = hash_dependencies(template.dependencies, {})
+    if static.assets:
+        deps["asset fingerprints"] = assets_digest(static.assets)
+    if images.images:
+        deps["image sizes"] = images_digest(images.images)
+    # Static files are compared against their copies in dest_dir, so the
+    # manifest only needs to know where they went
+    for from_path, dest_path in static.outputs:
+        manifest["static"][from_path] = {"dest": dest_path}
+    copied = len(static.copied)
+
+    # The link and search indexes live next to the manifest and only learn
+    # about the pages rendered this time
+    link_index_path = state_path(manifest_path, "links.json")
+    link_index = load_link_index(link_index_path)
+    search_index_path = state_path(manifest_path, "search.json")
+    search_index = load_search_index(search_index_path)
+    # Front matter of every page, scanned again only when a page changes
+    metadata_index_path = state_path(manifest_path, "metadata.json")
+    metadata_index = load_metadata_index(metadata_index_path)
+    sources = set()
+
+    to_render = []
+    with stage("walk"):
+        for from_path, dest_path in collect_pages(content_dir, dest_dir, ignore):
+            sources.add(from_path)
+            previous = old_manifest["pages"].get(from_path)
+            entry = file_entry(from_path, dest_path, previous)
+            meta = page_metadata(metadata_index, from_path, entry, page_url(dest_path, dest_dir))
+            if meta["draft"] and not drafts:
+                continue
+            entry["deps"] = deps
+            manifest["pages"][from_path] = entry
+            reasons = rebuild_reasons(entry, previous, changed_settings)
+            if not reasons and (from_path not in link_index["pages"] or from_path not in search_index["pages"]):
+                reasons.append("not indexed")
+            if not reasons:
+                continue
+            if explain:
+                print(f"Rebuilding {from_path}: {', '.join(reasons)}")
+            to_render.append((from_path, dest_path))
+
+    try:
+        infos = generate_pages(
+            to_render, template_path, basepath, jobs, cache_dir, static.assets, minify, images.images
+        )
+    except BuildError as e:
+        # Forget failed pages so the next build retries them
+        for from_path, _ in e.failures:
+            del manifest["pages"][from_path]
+        save_manifest(manifest_path, manifest)
+        raise
+    rendered = len(to_render)
+
+    for from_path in list(metadata_index["pages"]):
+        if from_path not in sources:
+            del metadata_index["pages"][from_path]
+    pages = [(from_path, entry["dest"]) for from_path, entry in manifest["pages"].items()]
+    listings = plan_site_listings(metadata_index, pages, dest_dir, drafts)
+    to_list = []
+    for listing in listings:
+        url = listing["url"]
+        entry = {"hash": listing_digest(listing), "dest": listing_dest(url, dest_dir), "deps": deps}
+        manifest["listings"][url] = entry
+        reasons = rebuild_reasons(entry, old_manifest["listings"].get(url), changed_settings, "listed posts")
+        if not reasons and url not in link_index["pages"]:
+            reasons.append("not indexed")
+        if not reasons:
+            continue
+        if explain:
+            print(f"Rebuilding listing {url}: {', '.join(reasons)}")
+        to_list.append(listing)
+    infos.update(render_listings(to_list, template_path, dest_dir, basepath, static.assets, minify))
+    save_metadata_index(metadata_index, metadata_index_path)
+
+    stale = stale_outputs(old_manifest, manifest)
+    for path in stale:
+        remove_output(path, dest_dir)
+
+    for index, sections in ((link_index, ("pages", "listings")), (search_index, ("pages",))):
+        for source in list(index["pages"]):
+            if not any(source in manifest[section] for section in sections):
+                del index["pages"][source]
+    listing_pages = [(url, entry["dest"]) for url, entry in manifest["listings"].items()]
+    check_site_links(link_index, static.outputs, pages + listing_pages, infos, dest_dir, static.assets)
+    save_link_index(link_index, link_index_path)
+    search_outputs = write_site_search(search_index, pages, infos, dest_dir, basepath)
+    save_search_index(search_index, search_index_path)
+    sitemap_outputs = write_site_sitemap(
+        site_url, pages + listing_pages, metadata_index, dest_dir, state_path(manifest_path, "sitemap.json"), drafts
+    )
 
-        if os.path.isfile(from_path):
-            if from_path.endswith(".md"):
-                dest_path_final = dest_path.replace(".md", ".html")
-                generate_page(from_path, template_path, dest_path_final, basepath)
-        
-        elif os.path.isdir(from_path):
-            generate_pages_recursive(from_path, template_path, dest_path, basepath)
+    outputs = [entry["dest"] for section in ("static", "pages", "listings") for entry in manifest[section].values()]
+    outputs += search_outputs + sitemap_outputs
+    outputs += precompress(outputs, state_path(manifest_path, "compress.json"), compress)
 
+    # Without a manifest (after a full build, say) nothing records what
+    # earlier builds left in dest_dir, so everything not written now goes
+    if old_manifest["basepath"] is None:
+        pruned = prune_outputs(dest_dir, outputs + images.outputs)
+        for path in pruned:
+            print(f"Removing stale output {path}")
+        stale += pruned
 
-def main():
-    # Get basepath from CLI argument, default to "/"
-    basepath = "/"
-    if len(sys.argv) > 1:
-        basepath = sys.argv[1]
+    save_manifest(manifest_path, manifest)
+    report_changes(dest_dir, manifest_path)
+    print(
+        f"Incremental build: {rendered} pages rendered, {copied} files copied, {len(stale)} outputs removed, "
+        f"{len(to_list)} listings rendered"
+    )
+
+
+def report_changes(dest_dir, manifest_path):
+    # The list a deploy step uploads from, instead of syncing all of dest_dir
+    with stage("changes"):
+        changes = record_changes(dest_dir, os.path.dirname(manifest_path))
+    print(
+        f"Output changes: {len(changes['added'])} added, {len(changes['changed'])} changed, "
+        f"{len(changes['deleted'])} deleted ({state_path(manifest_path, 'changes.json')})"
+    )
+    return changes
+
+
+def state_path(manifest_path, file_name):
+    # Build state other than the manifest is kept beside it
+    return os.path.join(os.path.dirname(manifest_path), file_name)
+
+
+def process_site_images(static_outputs, static_dir, dest_dir, manifest_path, variants=False):
+    """
+    Reads the size of every image among the static outputs and, with
+    variants, keeps their downscaled copies up to date.
+    """
+    with stage("images"):
+        result = process_images(
+            static_outputs, static_dir, dest_dir, state_path(manifest_path, "images.json"),
+            VARIANT_WIDTHS if variants else (),
+        )
+    print(f"Images: {len(result.images)} sized, {len(result.generated)} variants written")
+    return result
+
+
+def scan_pages(content_dir, dest_dir, metadata_index, drafts=False, ignore=()):
+    """
+    Collects the pages to build from content_dir, reading each one's front
+    matter into metadata_index on the way. Drafts are left out unless
+    drafts is set.
+    """
+    pages = []
+    for from_path, dest_path in collect_pages(content_dir, dest_dir, ignore):
+        meta = scan_page(from_path)
+        meta["url"] = page_url(dest_path, dest_dir)
+        metadata_index["pages"][from_path] = meta
+        if not meta["draft"] or drafts:
+            pages.append((from_path, dest_path))
+    return pages
+
+
+def plan_site_listings(metadata_index, pages, dest_dir, drafts=False):
+    # Generated listings may not overwrite a page from content/
+    listings = plan_listings(metadata_index, drafts)
+    page_dests = {dest_path: from_path for from_path, dest_path in pages}
+    for listing in listings:
+        dest_path = listing_dest(listing["url"], dest_dir)
+        if dest_path in page_dests:
+            raise ValueError(f"{page_dests[dest_path]} and the generated listing {listing['url']} both write {dest_path}")
+    return listings
+
+
+def render_listings(listings, template_path, dest_dir, basepath, assets=None, minify=False):
+    """
+    Writes the given listing pages through the template. Returns {url: info}
+    with each listing's links, keyed like the infos of generate_pages.
+    """
+    infos = {}
+    if not listings:
+        return infos
+    template = load_template(template_path, basepath, assets, minify)
+    with stage("listings"):
+        for listing in listings:
+            dest_path = listing_dest(listing["url"], dest_dir)
+            print(f"Generating listing {listing['url']} to {dest_path}")
+            node = listing_node(listing)
+            links = extract_links(node)
+            rewrite_root_urls(node, basepath, assets)
+            fragments = []
+            template.render_to(fragments, Title=listing["title"], Content=node)
+            write_output(dest_path, fragments)
+            infos[listing["url"]] = {"links": links}
+    return infos
+
+
+def check_site_links(link_index, static_outputs, pages, infos, dest_dir, assets=None):
+    """
+    Indexes the links of the pages in infos, then reports every link that
+    points at nothing the build produces and every page nothing links to.
+    Links are indexed as written, so fingerprinted assets count under
+    their original names.
+    """
+    for from_path, dest_path in pages:
+        if from_path in infos:
+            index_page(link_index, from_path, dest_path, dest_dir, infos[from_path]["links"])
+
+    outputs = {output_path(dest_path, dest_dir) for _, dest_path in static_outputs + pages}
+    outputs.update(url[1:] for url in assets or {})
+    with stage("links"):
+        return report_links(link_index, outputs)
+
+
+def write_site_search(search_index, pages, infos, dest_dir, basepath="/"):
+    """
+    Indexes the sections of the pages in infos and writes the sharded
+    search files into dest_dir. Section URLs are the ones the browser
+    follows, so they include the basepath. Returns every search file path.
+    """
+    with stage("search"):
+        for from_path, dest_path in pages:
+            if from_path in infos:
+                info = infos[from_path]
+                url = rewrite_url(page_url(dest_path, dest_dir), basepath)
+                index_sections(search_index, from_path, url, info["title"], info["sections"])
+        outputs, written = write_search_files(search_index, dest_dir)
+    print(f"Search index: {len(outputs)} files, {len(written)} updated")
+    return outputs
+
+
+def write_site_sitemap(site_url, pages, metadata_index, dest_dir, digests_path, drafts=False, skip_unchanged=True):
+    """
+    Writes sitemap.xml (sharded past 50,000 URLs) and the RSS and Atom
+    feeds straight from the build's (source, destination) pages and the
+    metadata index, rather than by crawling dest_dir afterwards. With
+    skip_unchanged, files whose contents match the digests recorded in
+    digests_path are left alone. Without a site_url, nothing is written
+    and files from earlier builds are removed. Returns the paths written.
+    """
+    previous = load_json(digests_path)
+    digests = {}
+    written = []
+    with stage("sitemap"):
+        if site_url:
+            entries = []
+            for source, dest_path in pages:
+                meta = metadata_index["pages"].get(source, {})
+                entries.append((page_url(dest_path, dest_dir), meta.get("date")))
+            # Feeds are named after the home page
+            home = next((meta for meta in metadata_index["pages"].values() if meta.get("url") == "/"), {})
+            title = home.get("title") or site_url
+            posts = published_posts(metadata_index, drafts)
+            reuse = previous if skip_unchanged else {}
+            for files, changed in (
+                write_sitemap(entries, site_url, dest_dir, reuse),
+                write_feeds(posts, site_url, title, dest_dir, reuse),
+            ):
+                digests.update(files)
+                written.extend(changed)
+        remove_stale(previous, digests)
+    save_json(digests_path, digests)
+    if site_url:
+        print(f"Sitemap and feeds: {len(digests)} files, {len(written)} updated")
+    return list(digests)
+
+
+def precompress(outputs, compress_state_path, enabled=True):
+    """
+    Writes compressed siblings for the outputs, or removes any written by
+    an earlier build when disabled. Returns the sibling paths.
+    """
+    with stage("compress"):
+        result = compress_outputs(outputs, compress_state_path, None if enabled else {})
+    if enabled:
+        print(f"Precompressed {len(result.compressed)} files, {result.unchanged} unchanged")
+    return result.outputs
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the static site into docs/")
+    # Basepath stays positional so `python3 src/main.py "/repo-name/"` keeps working
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="only rebuild pages and static files whose inputs changed",
+    )
+    parser.add_argument(
+        "--explain",
+        action="store_true",
+        help="with --incremental, print why each page is re-rendered",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes used to render pages (0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--checksum",
+        action="store_true",
+        help="compare static files by content when their size matches but mtime doesn't",
+    )
+    parser.add_argument(
+        "--link",
+        choices=LINK_MODES,
+        default="auto",
+        help="how static files are placed in docs/: auto tries a copy-on-write clone first",
+    )
+    parser.add_argument(
+        "--fingerprint",
+        action="store_true",
+        help="give CSS, JS, images and fonts content-hashed names and point pages at them",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="write pages without optional whitespace, quotes and end tags",
+    )
+    parser.add_argument(
+        "--image-variants",
+        action="store_true",
+        help="write downscaled copies of images and offer them through srcset (needs Pillow)",
+    )
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="build pages marked draft: true in their front matter and list them",
+    )
+    parser.add_argument(
+        "--site-url",
+        help="the site's public URL (https://example.com/repo/); sitemap.xml and the feeds are written when set",
+    )
+    parser.add_argument(
+        "--ignore",
+        action="append",
+        default=[],
+        metavar="PATTERN",
+        help="skip files in static/ and content/ matching this pattern (.*, *.psd, drafts/*); repeatable",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help=f"don't reuse or store parsed pages in {CACHE_DIR}",
+    )
+    parser.add_argument(
+        "--no-compress",
+        action="store_true",
+        help="don't write precompressed .gz/.br copies of text outputs",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help="size limit of the parse cache in MB; least recently used entries go first",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each build stage and print a summary when done",
+    )
+    parser.add_argument("--profile-output", help="also write the profile to this file")
+    parser.add_argument(
+        "--profile-format",
+        choices=("json", "chrome"),
+        default="json",
+        help="summary JSON, or Chrome trace events for chrome://tracing",
+    )
+    parser.add_argument("--profile-top", type=int, default=10, help="how many of the slowest pages to list")
+    args = parser.parse_args(argv)
+    if args.explain and not args.incremental:
+        parser.error("--explain only applies to --incremental builds")
+    if args.image_variants and not can_resize():
+        parser.error("--image-variants needs Pillow: pip install Pillow")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.profile or args.profile_output:
+        profiling.enable()
+    try:
+        with stage("build"):
+            build(args)
+    finally:
+        if profiling.is_enabled():
+            report_profile(args)
+
+
+def build(args):
+    basepath = args.basepath
+    jobs = args.jobs if args.jobs > 0 else default_jobs()
+    cache_dir = None if args.no_cache else CACHE_DIR
+
+    try:
+        build_site(args, basepath, jobs, cache_dir)
+    finally:
+        if cache_dir is not None:
+            evict(cache_dir, args.cache_size * 1024 * 1024)
+
+
+def build_site(args, basepath, jobs, cache_dir):
+    if args.incremental:
+        build_incremental(
+            "static", "content", "template.html", "docs", basepath,
+            jobs=jobs, checksum=args.checksum, link=args.link, cache_dir=cache_dir,
+            explain=args.explain, compress=not args.no_compress, fingerprint=args.fingerprint,
+            minify=args.minify, image_variants=args.image_variants, drafts=args.drafts,
+            site_url=args.site_url, ignore=args.ignore,
+        )
+        return
 
     # Use 'docs' instead of 'public' for GitHub Pages
-    copy_static("static", "docs") # <-- This line is now correctly linked to the function above
+    with stage("copy_static"):
+        hashes_path = state_path(MANIFEST_PATH, "assets.json") if args.fingerprint else None
+        static = copy_static("static", "docs", args.checksum, args.link, hashes_path, args.ignore)
+    images = process_site_images(static.outputs, "static", "docs", MANIFEST_PATH, args.image_variants)
     print("Generating pages from content to docs...")
-    generate_pages_recursive("content", "template.html", "docs", basepath)
+    os.makedirs("docs", exist_ok=True)
+    metadata_index = new_metadata_index()
+    with stage("walk"):
+        pages = scan_pages("content", "docs", metadata_index, args.drafts, args.ignore)
+    infos = generate_pages(
+        pages, "template.html", basepath, jobs, cache_dir, static.assets, args.minify, images.images
+    )
+    listings = plan_site_listings(metadata_index, pages, "docs", args.drafts)
+    infos.update(render_listings(listings, "template.html", "docs", basepath, static.assets, args.minify))
+    listing_pages = [(listing["url"], listing_dest(listing["url"], "docs")) for listing in listings]
+
+    search_index = new_search_index()
+    search_outputs = write_site_search(search_index, pages, infos, "docs", basepath)
+    save_search_index(search_index, state_path(MANIFEST_PATH, "search.json"))
+    # Every file is rewritten, as with the rest of a full build
+    sitemap_outputs = write_site_sitemap(
+        args.site_url, pages + listing_pages, metadata_index, "docs", state_path(MANIFEST_PATH, "sitemap.json"),
+        args.drafts, skip_unchanged=False,
+    )
+
+    outputs = [dest_path for _, dest_path in static.outputs + pages + listing_pages] + images.outputs
+    outputs += search_outputs + sitemap_outputs
+    outputs += precompress(outputs, state_path(MANIFEST_PATH, "compress.json"), not args.no_compress)
+
+    # Anything else in docs/ was left behind by an older build
+    for path in prune_outputs("docs", outputs):
+        print(f"Removing stale output {path}")
+
+    link_index = new_link_index()
+    check_site_links(link_index, static.outputs, pages + listing_pages, infos, "docs", static.assets)
+    save_link_index(link_index, state_path(MANIFEST_PATH, "links.json"))
+    report_changes("docs", MANIFEST_PATH)
+
+    # A full build replaces docs/ wholesale, so the old manifest no longer
+    # describes what's on disk
+    if os.path.exists(MANIFEST_PATH):
+        os.remove(MANIFEST_PATH)
+
+
+def report_profile(args):
+    spans = profiling.drain()
+    profiling.disable()
+    print()
+    print(profiling.format_summary(profiling.summarize(spans, args.profile_top)))
+    if args.profile_output:
+        profiling.write_report(args.profile_output, spans, args.profile_format, args.profile_top)
+        print(f"Wrote profile to {args.profile_output}")
 
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    except BuildError as e:
+        sys.exit(f"Build failed: {e}")
@@ -0,0 +1,74 @@
+import os
+
+from outputs import hash_file, load_json, save_json
+
+# Bump this whenever the manifest layout changes so old manifests are ignored
+MANIFEST_VERSION = 3
+
+
+def new_manifest():
+    return {
+        "version": MANIFEST_VERSION,
+        "basepath": None,
+        "minify": None,
+        "pages": {},
+        "static": {},
+        "listings": {},
+    }
+
+
+def load_manifest(path):
+    """
+    Loads the manifest written by the previous build. A missing, corrupt or
+    outdated manifest is treated as empty, which forces a full rebuild.
+    """
+    return load_json(path, new_manifest, MANIFEST_VERSION)
+
+
+def save_manifest(path, manifest):
+    save_json(path, manifest)
+
+
+def file_entry(path, dest_path, previous=None):
+    """
+    Builds the manifest entry for a source file. The hash from the previous
+    entry is reused when size and mtime are unchanged, so unchanged files
+    are not re-read on every build.
+    """
+    st = os.stat(path)
+    if (
+        previous is not None
+        and previous.get("size") == st.st_size
+        and previous.get("mtime_ns") == st.st_mtime_ns
+    ):
+        digest = previous["hash"]
+    else:
+        digest = hash_file(path)
+    return {
+        "hash": digest,
+        "size": st.st_size,
+        "mtime_ns": st.st_mtime_ns,
+        "dest": dest_path,
+    }
+
+
+def stale_outputs(old_manifest, new_manifest):
+    """
+    Returns output paths recorded by the previous build whose sources are
+    gone or now go somewhere else (a fingerprinted file whose content
+    changed, say), skipping any path the new build still produces.
+    """
+    live = set()
+    for section in ("pages", "static", "listings"):
+        for entry in new_manifest[section].values():
+            live.add(entry["dest"])
+
+    stale = []
+    for section in ("pages", "static", "listings"):
+        for source, entry in old_manifest.get(section, {}).items():
+            current = new_manifest[section].get(source)
+            if current is not None and current["dest"] == entry["dest"]:
+                continue
+            if entry["dest"] not in live:
+                stale.append(entry["dest"])
+    return sorted(stale)
@@ -3,17 +3,159 @@ from textnode import TextNode, TextType
 from block_type import BlockType
 from htmlnode import ParentNode, LeafNode, text_node_to_html_node
 
+IMAGE_REGEX = re.compile(r"!\[(.*?)\]\((.*?)\)")
+LINK_REGEX = re.compile(r"(?<!\!)\[(.*?)\]\((.*?)\)")
+
+# What text_to_textnodes matches where a [ or ![ starts. Neither part can
+# cross a bracket, so a [ that opens no link can't swallow an image further
+# on, and each failed match stops at the next bracket or space rather than
+# scanning to the end of the paragraph
+INLINE_IMAGE_REGEX = re.compile(r"!\[([^\[\]]*)\]\(([^()\s]*)\)")
+INLINE_LINK_REGEX = re.compile(r"\[([^\[\]]*)\]\(([^()\s]*)\)")
+
+# Characters that can start an inline element; everything between them is plain text
+INLINE_SPECIAL_REGEX = re.compile(r"[`*_!\[]")
+
+EMPHASIS_TYPES = {
+    "**": TextType.BOLD,
+    "__": TextType.BOLD,
+    "*": TextType.ITALIC,
+    "_": TextType.ITALIC,
+}
+
+
+class InlineFrame:
+    """
+    One level of open emphasis while scanning inline text. Plain text is
+    buffered and only turned into a TextNode when something else is added.
+    """
+
+    def __init__(self, delimiter):
+        self.delimiter = delimiter
+        self.nodes = []
+        self.text = []
+
+    def flush(self):
+        if self.text:
+            text = "".join(self.text)
+            self.text = []
+            if text:
+                self.nodes.append(TextNode(text, TextType.TEXT))
+
+    def add(self, node):
+        self.flush()
+        self.nodes.append(node)
+
+    def absorb(self, frame):
+        # An emphasis that never closed: its delimiter goes back in as plain text
+        self.text.append(frame.delimiter)
+        for node in frame.nodes:
+            if node.text_type == TextType.TEXT:
+                self.text.append(node.text)
+            else:
+                self.add(node)
+        self.text.extend(frame.text)
+
+    def to_node(self):
+        self.flush()
+        text_type = EMPHASIS_TYPES[self.delimiter]
+        if not self.nodes:
+            return TextNode("", text_type)
+        if len(self.nodes) == 1 and self.nodes[0].text_type == TextType.TEXT:
+            return TextNode(self.nodes[0].text, text_type)
+        return TextNode("".join(node.text for node in self.nodes), text_type, None, self.nodes)
+
+
+def toggle_emphasis(stack, delimiter):
+    # Closes the open emphasis with this delimiter, or opens a new one
+    # Each delimiter is open at most once, so this stack stays tiny
+    for depth in range(len(stack) - 1, 0, -1):
+        if stack[depth].delimiter == delimiter:
+            frame = stack[depth]
+            for inner in stack[depth + 1:]:
+                frame.absorb(inner)
+            del stack[depth:]
+            stack[-1].add(frame.to_node())
+            return
+    stack.append(InlineFrame(delimiter))
+
+
+def split_triple_delimiter(stack, text, char, pos):
+    """
+    Splits a run of three (***, ___) into its double and single delimiter,
+    in the order they should be applied. When both are open they close
+    innermost first. Otherwise they open so the next run of char closes
+    the inner one: ** inside * when that run is two long, * inside **
+    when it's one or three.
+    """
+    double, single = char * 2, char
+    open_delimiters = [frame.delimiter for frame in stack]
+    if double in open_delimiters and single in open_delimiters:
+        return sorted((double, single), key=open_delimiters.index, reverse=True)
+    following = re.compile(re.escape(char) + "+").search(text, pos)
+    if following is not None and len(following.group()) == 2:
+        return [single, double]
+    return [double, single]
+
+
 def text_to_textnodes(text):
-    nodes = [TextNode(text, TextType.TEXT)]
-    nodes = split_nodes_delimiter(nodes, "**", TextType.BOLD)
-    nodes = split_nodes_delimiter(nodes, "*", TextType.ITALIC)
-    nodes = split_nodes_delimiter(nodes, "__", TextType.BOLD)
-    # NEW LINE ADDED: Handle italics using the underscore delimiter
-    nodes = split_nodes_delimiter(nodes, "_", TextType.ITALIC) 
-    nodes = split_nodes_delimiter(nodes, "`", TextType.CODE)
-    nodes = split_nodes_image(nodes)
-    nodes = split_nodes_link(nodes)
-    return nodes
+    """
+    Splits inline markdown into TextNodes in a single left-to-right pass.
+    Code spans, images and links are matched where they start, so their
+    contents are never mistaken for emphasis. Open emphasis is kept on a
+    small stack, which lets it nest; delimiters that never close are left
+    as plain text instead of raising.
+    """
+    stack = [InlineFrame(None)]
+    pos = 0
+    while pos < len(text):
+        match = INLINE_SPECIAL_REGEX.search(text, pos)
+        if match is None:
+            stack[-1].text.append(text[pos:])
+            break
+
+        start = match.start()
+        if start > pos:
+            stack[-1].text.append(text[pos:start])
+        char = text[start]
+
+        if char == "`":
+            end = text.find("`", start + 1)
+            if end != -1:
+                stack[-1].add(TextNode(text[start + 1:end], TextType.CODE))
+                pos = end + 1
+                continue
+
+        elif char == "!" or char == "[":
+            regex = INLINE_IMAGE_REGEX if char == "!" else INLINE_LINK_REGEX
+            element = regex.match(text, start)
+            if element:
+                text_type = TextType.IMAGE if char == "!" else TextType.LINK
+                stack[-1].add(TextNode(element.group(1), text_type, element.group(2)))
+                pos = element.end()
+                continue
+
+        else:
+            if text.startswith(char * 3, start) and not text.startswith(char * 4, start):
+                pos = start + 3
+                delimiters = split_triple_delimiter(stack, text, char, pos)
+            else:
+                delimiters = [char * 2 if text.startswith(char * 2, start) else char]
+                pos = start + len(delimiters[0])
+            for delimiter in delimiters:
+                toggle_emphasis(stack, delimiter)
+            continue
+
+        # Not the start of anything after all, keep it as plain text
+        stack[-1].text.append(char)
+        pos = start + 1
+
+    while len(stack) > 1:
+        frame = stack.pop()
+        stack[-1].absorb(frame)
+    stack[0].flush()
+    return stack[0].nodes
+
 def text_to_children(text):
     text_nodes = text_to_textnodes(text)
     html_nodes = []
@@ -41,88 +183,107 @@ def split_nodes_delimiter(old_nodes, delimiter, text_type):
     return new_nodes
 
 def extract_markdown_images(text):
-    regex = r"!\[(.*?)\]\((.*?)\)"
-    matches = re.findall(regex, text)
-    return matches
+    return IMAGE_REGEX.findall(text)
 
 def extract_markdown_links(text):
-    regex = r"(?<!\!)\[(.*?)\]\((.*?)\)"
-    matches = re.findall(regex, text)
-    return matches
+    return LINK_REGEX.findall(text)
 
-def split_nodes_image(old_nodes):
+def split_nodes_regex(old_nodes, regex, text_type):
+    # Slices around each match instead of re-splitting the remaining text,
+    # so long link-heavy paragraphs stay linear
     new_nodes = []
     for old_node in old_nodes:
         if old_node.text_type != TextType.TEXT:
             new_nodes.append(old_node)
             continue
-        
-        remaining_text = old_node.text
-        matches = extract_markdown_images(remaining_text)
-        if not matches:
-            new_nodes.append(old_node)
-            continue
 
-        for alt_text, url in matches:
-            parts = remaining_text.split(f"![{alt_text}]({url})", 1)
-            before_image_text = parts[0]
-            if before_image_text:
-                new_nodes.append(TextNode(before_image_text, TextType.TEXT))
-            new_nodes.append(TextNode(alt_text, TextType.IMAGE, url))
-            remaining_text = parts[1]
-        
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, TextType.TEXT))
+        text = old_node.text
+        pos = 0
+        for match in regex.finditer(text):
+            if match.start() > pos:
+                new_nodes.append(TextNode(text[pos:match.start()], TextType.TEXT))
+            new_nodes.append(TextNode(match.group(1), text_type, match.group(2)))
+            pos = match.end()
 
+        if pos == 0:
+            new_nodes.append(old_node)
+        elif pos < len(text):
+            new_nodes.append(TextNode(text[pos:], TextType.TEXT))
     return new_nodes
 
-def split_nodes_link(old_nodes):
-    new_nodes = []
-    for old_node in old_nodes:
-        if old_node.text_type != TextType.TEXT:
-            new_nodes.append(old_node)
-            continue
-        
-        remaining_text = old_node.text
-        matches = extract_markdown_links(remaining_text)
-        if not matches:
-            new_nodes.append(old_node)
-            continue
+def split_nodes_image(old_nodes):
+    return split_nodes_regex(old_nodes, IMAGE_REGEX, TextType.IMAGE)
 
-        for link_text, url in matches:
-            parts = remaining_text.split(f"[{link_text}]({url})", 1)
-            before_link_text = parts[0]
-            if before_link_text:
-                new_nodes.append(TextNode(before_link_text, TextType.TEXT))
-            new_nodes.append(TextNode(link_text, TextType.LINK, url))
-            remaining_text = parts[1]
-        
-        if remaining_text:
-            new_nodes.append(TextNode(remaining_text, TextType.TEXT))
+def split_nodes_link(old_nodes):
+    return split_nodes_regex(old_nodes, LINK_REGEX, TextType.LINK)
 
-    return new_nodes
+BLOCK_SEPARATOR_REGEX = re.compile(r"(?:\n{2,})+")
+# Whitespace other than a newline, so the match stays on the block's first line
+HEADING_REGEX = re.compile(r"#{1,6}[^\S\n]")
+HEADING_PARTS_REGEX = re.compile(r"^(#{1,6})\s(.*)", re.DOTALL)
+ORDERED_ITEM_REGEX = re.compile(r"\d+\.\s")
 
 def markdown_to_blocks(markdown):
-    blocks = re.split(r"(?:\n{2,})+", markdown.strip())
+    blocks = BLOCK_SEPARATOR_REGEX.split(markdown.strip())
     return [block.strip() for block in blocks if block.strip()]
 
+def iter_markdown_blocks(lines):
+    """
+    Yields the same blocks as markdown_to_blocks, but reads them from an
+    iterable of lines (an open file, say), so only the current block is
+    ever held in memory.
+    """
+    current = []
+    for line in lines:
+        if line.endswith("\n"):
+            line = line[:-1]
+        if line:
+            current.append(line)
+            continue
+        # An empty line ends the block
+        block = "\n".join(current).strip()
+        current = []
+        if block:
+            yield block
+    block = "\n".join(current).strip()
+    if block:
+        yield block
+
+# Checked before the built-in rules; see register_block_classifier
+BLOCK_CLASSIFIERS = []
+
 def block_to_block_type(block):
-    lines = block.split('\n')
-    if re.match(r"^#{1,6}\s", lines[0]):
+    for classifier in BLOCK_CLASSIFIERS:
+        block_type = classifier(block)
+        if block_type is not None:
+            return block_type
+
+    if HEADING_REGEX.match(block):
         return BlockType.HEADING
-    
-    if len(lines) > 1 and all(line.startswith('>') for line in lines):
-        return BlockType.QUOTE
-    
+
     if block.startswith("```") and block.endswith("```"):
         return BlockType.CODE
 
-    if all(line.startswith(('* ', '- ')) for line in lines):
-        return BlockType.UNORDERED_LIST
+    # One pass over the lines, dropping each candidate as soon as a line rules it out
+    lines = block.split('\n')
+    quote = len(lines) > 1
+    unordered = ordered = True
+    for line in lines:
+        if quote and not line.startswith('>'):
+            quote = False
+        if unordered and not line.startswith(('* ', '- ')):
+            unordered = False
+        if ordered and not ORDERED_ITEM_REGEX.match(line):
+            ordered = False
+        if not (quote or unordered or ordered):
+            return BlockType.PARAGRAPH
 
-    if all(re.match(r"^\d+\.\s", line) for line in lines):
+    if quote:
+        return BlockType.QUOTE
+    if unordered:
+        return BlockType.UNORDERED_LIST
+    if ordered:
         return BlockType.ORDERED_LIST
-
     return BlockType.PARAGRAPH
 
 def block_to_paragraph(block):
@@ -130,7 +291,7 @@ def block_to_paragraph(block):
     return ParentNode("p", children)
 
 def block_to_heading(block):
-    match = re.match(r"^(#{1,6})\s(.*)", block, re.DOTALL)
+    match = HEADING_PARTS_REGEX.match(block)
     if not match:
         raise ValueError("Invalid heading block")
     level = len(match.group(1))
@@ -173,30 +334,102 @@ def block_to_ol(block):
         children.append(ParentNode("li", text_to_children(text)))
     return ParentNode("ol", children)
     
+BLOCK_HANDLERS = {
+    BlockType.PARAGRAPH: block_to_paragraph,
+    BlockType.HEADING: block_to_heading,
+    BlockType.CODE: block_to_code,
+    BlockType.QUOTE: block_to_quote,
+    BlockType.UNORDERED_LIST: block_to_ul,
+    BlockType.ORDERED_LIST: block_to_ol,
+}
+
+def register_block_handler(block_type, handler):
+    """
+    Renders blocks of block_type with handler(block) -> HTMLNode, replacing
+    any existing handler. block_type can be a BlockType or any other
+    hashable key returned by a registered classifier.
+    """
+    BLOCK_HANDLERS[block_type] = handler
+
+def register_block_classifier(classifier):
+    """
+    Adds classifier(block) -> block type or None, consulted in registration
+    order before the built-in rules. Pair it with register_block_handler
+    to add a new kind of block.
+    """
+    BLOCK_CLASSIFIERS.append(classifier)
+
+def block_to_html_node(block):
+    handler = BLOCK_HANDLERS.get(block_to_block_type(block))
+    if handler is None:
+        raise Exception("Invalid block type")
+    return handler(block)
+
 def markdown_to_html_node(markdown):
     blocks = markdown_to_blocks(markdown)
     children = []
     for block in blocks:
-        block_type = block_to_block_type(block)
-        if block_type == BlockType.PARAGRAPH:
-            children.append(block_to_paragraph(block))
-        elif block_type == BlockType.HEADING:
-            children.append(block_to_heading(block))
-        elif block_type == BlockType.CODE:
-            children.append(block_to_code(block))
-        elif block_type == BlockType.QUOTE:
-            children.append(block_to_quote(block))
-        elif block_type == BlockType.UNORDERED_LIST:
-            children.append(block_to_ul(block))
-        elif block_type == BlockType.ORDERED_LIST:
-            children.append(block_to_ol(block))
-        else:
-            raise Exception("Invalid block type")
+        children.append(block_to_html_node(block))
     return ParentNode("div", children)
 
+TITLE_REGEX = re.compile(r"^# ([^\n]*)", re.MULTILINE)
+
 def extract_title(markdown):
-    lines = markdown.split("\n")
-    for line in lines:
-        if line.startswith("# "):
-            return line[2:].strip()
+    # Searching beats splitting the whole document into lines first
+    match = TITLE_REGEX.search(markdown)
+    if match:
+        return match.group(1).strip()
     raise Exception("Markdown document must have a single h1 heading")
+
+class MarkdownStream:
+    """
+    Renders Markdown from an iterable of lines one block at a time, for
+    documents too big to load whole. The title is picked up from the lines
+    as they go past; find_title() reads ahead (buffering parsed blocks)
+    until it has been seen. Pass the stream itself as a template value and
+    it writes <div>...</div> exactly like markdown_to_html_node would.
+    """
+
+    def __init__(self, lines, on_block=None):
+        self.title = None
+        self.on_block = on_block
+        self.buffered = []
+        self.blocks = iter_markdown_blocks(self.watch_for_title(lines))
+
+    def watch_for_title(self, lines):
+        for line in lines:
+            if self.title is None and line.startswith("# "):
+                self.title = line[2:].strip()
+            yield line
+
+    def next_node(self):
+        block = next(self.blocks, None)
+        if block is None:
+            return None
+        node = block_to_html_node(block)
+        if self.on_block is not None:
+            self.on_block(node)
+        return node
+
+    def find_title(self):
+        while self.title is None:
+            node = self.next_node()
+            if node is None:
+                raise Exception("Markdown document must have a single h1 heading")
+            self.buffered.append(node)
+        return self.title
+
+    def iter_nodes(self):
+        buffered, self.buffered = self.buffered, []
+        yield from buffered
+        node = self.next_node()
+        while node is not None:
+            yield node
+            node = self.next_node()
+
+    def write_html(self, out, minify=False):
+        write = out.append if isinstance(out, list) else out.write
+        write("<div>")
+        for node in self.iter_nodes():
+            node.write_html(out, minify)
+        write("</div>")
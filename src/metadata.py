@@ -0,0 +1,146 @@
+import datetime
+import itertools
+import os
+import re
+
+from outputs import load_json, save_json
+
+# Page metadata from front matter, kept between builds so only pages whose
+# source changed are scanned again
+INDEX_PATH = os.path.join(".build", "metadata.json")
+INDEX_VERSION = 1
+
+# Front matter is a block of "key: value" lines between two --- lines at
+# the very top of a page:
+#
+#   ---
+#   date: 2024-03-01
+#   tags: [elves, gondolin]
+#   summary: Balrog-slayer, returned from the Halls of Mandos
+#   draft: false
+#   ---
+FENCE = "---"
+FRONT_MATTER_REGEX = re.compile(r"\A---[ \t]*\r?\n(.*?)^---[ \t]*(?:\r?\n|\Z)", re.DOTALL | re.MULTILINE)
+TRUE_VALUES = ("true", "yes", "on")
+FALSE_VALUES = ("false", "no", "off")
+
+
+def unquote(value):
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "\"'":
+        return value[1:-1]
+    return value
+
+
+def parse_value(key, value):
+    value = value.strip()
+    if key == "tags":
+        if value.startswith("[") and value.endswith("]"):
+            value = value[1:-1]
+        return [unquote(tag.strip()) for tag in value.split(",") if tag.strip()]
+    if key == "draft":
+        if value.lower() in TRUE_VALUES:
+            return True
+        if value.lower() in FALSE_VALUES:
+            return False
+        raise ValueError(f"draft must be true or false, not {value!r}")
+    if key == "date":
+        # Stored as YYYY-MM-DD, which sorts by date as plain text
+        return datetime.date.fromisoformat(unquote(value)).isoformat()
+    return unquote(value)
+
+
+def parse_front_matter(lines, source="front matter"):
+    """Parses "key: value" lines into a dict. Blank and # lines are skipped."""
+    fields = {}
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, sep, value = line.partition(":")
+        if not sep:
+            raise ValueError(f"{source}: expected key: value, got {line!r}")
+        key = key.strip().lower()
+        try:
+            fields[key] = parse_value(key, value)
+        except ValueError as e:
+            raise ValueError(f"{source}: {e}") from None
+    return fields
+
+
+def split_front_matter(markdown, source="front matter"):
+    """Returns (fields, body): the parsed front matter and the Markdown after it."""
+    if not markdown.startswith(FENCE):
+        return {}, markdown
+    match = FRONT_MATTER_REGEX.match(markdown)
+    if match is None:
+        return {}, markdown
+    return parse_front_matter(match.group(1).splitlines(), source), markdown[match.end():]
+
+
+def read_front_matter(lines, source="front matter"):
+    """
+    Like split_front_matter, for an iterable of lines (an open file, say).
+    Returns (fields, lines) where lines continues right after the front
+    matter, so the rest can still be streamed.
+    """
+    lines = iter(lines)
+    first = next(lines, None)
+    if first is None:
+        return {}, iter(())
+    if first.rstrip() != FENCE:
+        return {}, itertools.chain([first], lines)
+    header = []
+    for line in lines:
+        if line.rstrip() == FENCE:
+            return parse_front_matter(header, source), lines
+        header.append(line)
+    # No closing fence: not front matter after all
+    return {}, itertools.chain([first], header)
+
+
+def scan_page(path):
+    """
+    Reads a page's metadata without parsing its Markdown: the front matter
+    plus, unless it sets a title, lines up to the first # heading.
+    """
+    with open(path, "r") as f:
+        fields, lines = read_front_matter(f, path)
+        title = fields.get("title")
+        if title is None:
+            for line in lines:
+                if line.startswith("# "):
+                    title = line[2:].strip()
+                    break
+    return {
+        "title": title,
+        "date": fields.get("date"),
+        "tags": fields.get("tags", []),
+        "summary": fields.get("summary"),
+        "draft": fields.get("draft", False),
+    }
+
+
+def new_metadata_index():
+    return {"version": INDEX_VERSION, "pages": {}}
+
+
+def load_metadata_index(path=INDEX_PATH):
+    return load_json(path, new_metadata_index, INDEX_VERSION)
+
+
+def save_metadata_index(index, path=INDEX_PATH):
+    save_json(path, index)
+
+
+def page_metadata(index, source, entry, url):
+    """
+    Returns the metadata of the page at source, scanning it only when the
+    content hash in entry (a manifest entry) differs from the one indexed.
+    The page's URL is recorded alongside, for listings to link to.
+    """
+    meta = index["pages"].get(source)
+    if meta is None or meta.get("hash") != entry["hash"]:
+        meta = scan_page(source)
+    meta.update(hash=entry["hash"], size=entry["size"], mtime_ns=entry["mtime_ns"], url=url)
+    index["pages"][source] = meta
+    return meta
@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+
+from walker import walk_files
+
+CHANGES_NAME = "changes.json"
+SNAPSHOT_NAME = "outputs.json"
+
+
+def hash_file(path):
+    """
+    Returns the sha256 hex digest of a file, read in chunks so big images
+    don't have to fit in memory.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def same_contents(path, size, digest):
+    # The size rules out most changed files without reading anything
+    try:
+        if os.stat(path).st_size != size:
+            return False
+    except FileNotFoundError:
+        return False
+    return hash_file(path) == digest
+
+
+def write_output(path, chunks):
+    """
+    Writes the chunks (strings, as UTF-8, or bytes) to path, through a
+    temporary file renamed over it so nobody ever reads half a page.
+    Nothing is written when the file already holds exactly these bytes,
+    which keeps its mtime and keeps it out of the change list. Returns True
+    when it was written.
+    """
+    data = [chunk.encode("utf-8") if isinstance(chunk, str) else chunk for chunk in chunks]
+    digest = hashlib.sha256()
+    for part in data:
+        digest.update(part)
+    if same_contents(path, sum(map(len, data)), digest.hexdigest()):
+        return False
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.writelines(data)
+    os.replace(tmp_path, path)
+    return True
+
+
+@contextmanager
+def open_output(path, mode="w"):
+    """
+    Like open(path, mode) for output too big to hold in memory, or written
+    by something that wants a file: it goes to a temporary file, which
+    replaces path only if its bytes differ from what's there. Left half
+    written, it's removed instead. mode is "w" for UTF-8 text or "wb".
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, mode, encoding=None if "b" in mode else "utf-8") as f:
+            yield f
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    if same_contents(path, os.path.getsize(tmp_path), hash_file(tmp_path)):
+        os.remove(tmp_path)
+    else:
+        os.replace(tmp_path, path)
+
+
+def snapshot_outputs(dest_dir):
+    """
+    Returns {path: [mtime_ns, size]} for every file under dest_dir, with
+    paths relative to it and "/"-separated.
+    """
+    stats = {}
+    for rel_path, entry in walk_files(dest_dir):
+        st = entry.stat()
+        stats[rel_path] = [st.st_mtime_ns, st.st_size]
+    return stats
+
+
+def diff_outputs(old, new):
+    """
+    Compares two snapshots. Returns {"added": [...], "changed": [...],
+    "deleted": [...]}, each sorted.
+    """
+    return {
+        "added": sorted(path for path in new if path not in old),
+        "changed": sorted(path for path, stat in new.items() if path in old and old[path] != stat),
+        "deleted": sorted(path for path in old if path not in new),
+    }
+
+
+def load_json(path, default=dict, version=None):
+    """
+    Loads a state file written by save_json. A missing or corrupt file,
+    one that doesn't hold an object, or one whose "version" isn't version
+    (when given) comes back as default() instead, so the build starts that
+    state over.
+    """
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return default()
+    if not isinstance(data, dict) or (version is not None and data.get("version") != version):
+        return default()
+    return data
+
+
+def save_json(path, data, compact=False):
+    """
+    Writes a state file through write_output, so an interrupted build never
+    leaves half of one behind. compact drops the indentation and spaces,
+    for files too big to be worth reading by eye.
+    """
+    if compact:
+        text = json.dumps(data, separators=(",", ":"), sort_keys=True)
+    else:
+        text = json.dumps(data, indent=1, sort_keys=True)
+    write_output(path, [text])
+
+
+def record_changes(dest_dir, state_dir):
+    """
+    Compares dest_dir with how the previous build left it and writes the
+    difference to state_dir/changes.json, for a deploy step to upload the
+    added and changed paths and delete the rest. Files are compared by
+    mtime and size, so anything edited between builds counts too. Without
+    a previous snapshot, every file is added. Returns the changes.
+    """
+    snapshot_path = os.path.join(state_dir, SNAPSHOT_NAME)
+    snapshot = snapshot_outputs(dest_dir)
+    changes = diff_outputs(load_json(snapshot_path), snapshot)
+    save_json(os.path.join(state_dir, CHANGES_NAME), {"dest": dest_dir, **changes})
+    save_json(snapshot_path, snapshot)
+    return changes
@@ -0,0 +1,70 @@
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Aim for a few batches per worker so a slow batch near the end doesn't
+# leave the other workers idle
+BATCHES_PER_JOB = 4
+
+
+def default_jobs():
+    return os.cpu_count() or 1
+
+
+def batched(items, batch_size):
+    for start in range(0, len(items), batch_size):
+        yield items[start:start + batch_size]
+
+
+def map_bounded(executor, func, items, max_pending):
+    """
+    Like executor.map(func, items), but items are taken one at a time and
+    at most max_pending calls are queued on the executor at once, so a
+    million items don't become a million futures. Yields results in the
+    order of items; an exception is raised when its result is reached.
+    """
+    pending = deque()
+    for item in items:
+        if len(pending) >= max_pending:
+            yield pending.popleft().result()
+        pending.append(executor.submit(func, item))
+    while pending:
+        yield pending.popleft().result()
+
+
+def run_batch(func, batch):
+    """
+    Calls func(*args) for every args tuple in batch. Exceptions are caught
+    and returned as text so one bad page doesn't sink the whole batch.
+    """
+    results = []
+    for args in batch:
+        try:
+            results.append((func(*args), None))
+        except Exception as e:
+            results.append((None, f"{type(e).__name__}: {e}"))
+    return results
+
+
+def map_batched(func, items, jobs=1, batch_size=None):
+    """
+    Runs func(*args) for each args tuple in items, spread across a pool of
+    `jobs` processes. Returns a list of (result, error) pairs in the same
+    order as items, however the batches were scheduled.
+
+    func must be a module-level function so it can be pickled.
+    """
+    items = list(items)
+    if jobs <= 1 or len(items) <= 1:
+        return run_batch(func, items)
+
+    if batch_size is None:
+        batch_size = max(1, -(-len(items) // (jobs * BATCHES_PER_JOB)))
+
+    results = []
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        # executor.map yields in submission order, which keeps output deterministic
+        for batch_results in executor.map(run_batch, repeat(func), batched(items, batch_size)):
+            results.extend(batch_results)
+    return results
@@ -0,0 +1,157 @@
+import json
+import os
+import time
+
+# Spans recorded in this process while profiling is on. Each span is a
+# (stage, page, start_ns, wall_ns, cpu_ns, pid) tuple. None means off.
+_spans = None
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+# Handed out for every stage while profiling is off, so the only cost is a
+# global lookup and two no-op method calls
+NULL_STAGE = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "page", "start", "cpu_start")
+
+    def __init__(self, name, page):
+        self.name = name
+        self.page = page
+
+    def __enter__(self):
+        self.cpu_start = time.thread_time_ns()
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        wall = time.perf_counter_ns() - self.start
+        cpu = time.thread_time_ns() - self.cpu_start
+        if _spans is not None:
+            _spans.append((self.name, self.page, self.start, wall, cpu, os.getpid()))
+        return False
+
+
+def enable():
+    global _spans
+    if _spans is None:
+        _spans = []
+
+
+def disable():
+    global _spans
+    _spans = None
+
+
+def is_enabled():
+    return _spans is not None
+
+
+def stage(name, page=None):
+    """
+    Times the block it wraps as one span of `name`, optionally tied to a
+    page. Does nothing unless profiling has been enabled.
+    """
+    if _spans is None:
+        return NULL_STAGE
+    return _Stage(name, page)
+
+
+def mark():
+    # Position to pass to drain() to only take spans recorded after this point
+    return len(_spans) if _spans is not None else 0
+
+
+def drain(since=0):
+    """Returns and forgets the spans recorded in this process since `since`."""
+    if _spans is None:
+        return []
+    spans = _spans[since:]
+    del _spans[since:]
+    return spans
+
+
+def record(spans):
+    # Spans sent back from worker processes
+    if _spans is not None:
+        _spans.extend(spans)
+
+
+def summarize(spans, top=10):
+    """
+    Rolls spans up into per-stage totals and the slowest `top` pages.
+    Returns a dict that's also what the JSON report contains.
+    """
+    stages = {}
+    pages = {}
+    for name, page, _, wall, cpu, _ in spans:
+        totals = stages.setdefault(name, {"count": 0, "wall_s": 0.0, "cpu_s": 0.0})
+        totals["count"] += 1
+        totals["wall_s"] += wall / 1e9
+        totals["cpu_s"] += cpu / 1e9
+        if page is not None:
+            page_totals = pages.setdefault(page, {"wall_s": 0.0, "cpu_s": 0.0})
+            page_totals["wall_s"] += wall / 1e9
+            page_totals["cpu_s"] += cpu / 1e9
+
+    slowest = sorted(pages.items(), key=lambda item: (-item[1]["wall_s"], item[0]))[:top]
+    return {
+        "stages": stages,
+        "pages": len(pages),
+        "slowest_pages": [dict(page=page, **totals) for page, totals in slowest],
+    }
+
+
+def format_summary(summary):
+    lines = [f"{'stage':<14} {'count':>7} {'wall ms':>11} {'cpu ms':>11} {'mean ms':>9}"]
+    for name, totals in sorted(summary["stages"].items(), key=lambda item: -item[1]["wall_s"]):
+        mean = totals["wall_s"] / totals["count"]
+        lines.append(
+            f"{name:<14} {totals['count']:>7} {totals['wall_s'] * 1000:>11.2f} "
+            f"{totals['cpu_s'] * 1000:>11.2f} {mean * 1000:>9.3f}"
+        )
+    if summary["slowest_pages"]:
+        lines.append("")
+        lines.append(f"Slowest {len(summary['slowest_pages'])} of {summary['pages']} pages:")
+        for page in summary["slowest_pages"]:
+            lines.append(f"  {page['wall_s'] * 1000:>9.2f} ms  {page['page']}")
+    return "\n".join(lines)
+
+
+def chrome_trace(spans):
+    """
+    Converts spans to the Chrome trace event format, viewable in
+    chrome://tracing or Perfetto.
+    """
+    events = []
+    for name, page, start, wall, cpu, pid in spans:
+        event = {
+            "name": name,
+            "ph": "X",
+            "ts": start / 1000,
+            "dur": wall / 1000,
+            "pid": pid,
+            "tid": pid,
+            "args": {"cpu_us": cpu / 1000},
+        }
+        if page is not None:
+            event["args"]["page"] = page
+        events.append(event)
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def write_report(path, spans, fmt="json", top=10):
+    if fmt == "chrome":
+        report = chrome_trace(spans)
+    else:
+        report = summarize(spans, top)
+    with open(path, "w") as f:
+        json.dump(report, f, indent=1)
@@ -0,0 +1,246 @@
+import argparse
+import json
+import os
+import re
+from collections import Counter
+
+from htmlnode import ParentNode
+from outputs import load_json, save_json, write_output
+
+# Per-page postings, kept between builds so incremental builds only
+# re-tokenize the pages they re-render
+INDEX_PATH = os.path.join(".build", "search.json")
+INDEX_VERSION = 1
+
+# Where the index the browser loads goes, inside the output directory
+SEARCH_DIR = "search"
+
+# Terms are sharded by their first characters, so a query for "gandalf"
+# only has to fetch search/ga.json
+SHARD_PREFIX = 2
+# Section titles and URLs are split the same way, by section id
+DOCUMENTS_PER_SHARD = 1000
+
+TERM_REGEX = re.compile(r"\w+")
+SLUG_REGEX = re.compile(r"[^\w]+")
+HEADING_TAGS = ("h1", "h2", "h3", "h4", "h5", "h6")
+MIN_TERM_LENGTH = 2
+
+
+def node_text(node):
+    """Plain text of a node tree: leaf values plus image alt text."""
+    parts = []
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParentNode):
+            stack.extend(reversed(node.children))
+        elif node.tag == "img":
+            parts.append((node.props or {}).get("alt", ""))
+        elif node.value:
+            parts.append(node.value)
+    return " ".join(parts)
+
+
+def tokenize(text):
+    return [term for term in TERM_REGEX.findall(text.lower()) if len(term) >= MIN_TERM_LENGTH]
+
+
+def slugify(text):
+    return SLUG_REGEX.sub("-", text.lower()).strip("-") or "section"
+
+
+class SectionCollector:
+    """
+    Splits a page into sections at its headings as the top-level blocks go
+    by, counting the terms in each. Headings without an id get one from
+    their text so search results can link straight to them.
+    """
+
+    def __init__(self):
+        self.sections = []
+        self.slugs = set()
+        self.anchor = ""
+        self.title = None
+        self.terms = Counter()
+
+    def add_block(self, node):
+        if node.tag in HEADING_TAGS:
+            self.close()
+            self.title = node_text(node)
+            props = node.props if node.props is not None else {}
+            if "id" not in props:
+                props["id"] = self.unique_slug(slugify(self.title))
+                node.props = props
+            self.anchor = props["id"]
+        self.terms.update(tokenize(node_text(node)))
+
+    def unique_slug(self, slug):
+        candidate = slug
+        count = 1
+        while candidate in self.slugs:
+            candidate = f"{slug}-{count}"
+            count += 1
+        self.slugs.add(candidate)
+        return candidate
+
+    def close(self):
+        if self.terms:
+            self.sections.append([self.anchor, self.title, dict(self.terms)])
+        self.terms = Counter()
+
+    def finish(self):
+        """Returns [anchor, title, {term: count}] for each section with text."""
+        self.close()
+        return self.sections
+
+
+def collect_sections(node):
+    collector = SectionCollector()
+    for child in node.children:
+        collector.add_block(child)
+    return collector.finish()
+
+
+def new_search_index():
+    return {"version": INDEX_VERSION, "next_id": 0, "pages": {}}
+
+
+def load_search_index(path=INDEX_PATH):
+    return load_json(path, new_search_index, INDEX_VERSION)
+
+
+def save_search_index(index, path=INDEX_PATH):
+    save_json(path, index, compact=True)
+
+
+def index_sections(index, source, url, title, sections):
+    """
+    Records a page's sections. Section ids are handed out once and kept
+    for as long as the page has that many sections, so editing one page
+    doesn't renumber (and rewrite) the shards of every other page.
+    """
+    old_ids = [section[0] for section in index["pages"].get(source, {}).get("sections", [])]
+    entries = []
+    for i, (anchor, section_title, terms) in enumerate(sections):
+        if i < len(old_ids):
+            section_id = old_ids[i]
+        else:
+            section_id = index["next_id"]
+            index["next_id"] += 1
+        entries.append([section_id, anchor, section_title or title, terms])
+    index["pages"][source] = {"url": url, "sections": entries}
+
+
+def shard_name(term):
+    return term[:SHARD_PREFIX]
+
+
+def build_shards(index):
+    """
+    Inverts the per-page postings. Returns (documents, shards): documents
+    maps section id -> [url, title], shards maps shard name -> {term:
+    [[section id, count], ...]} with postings sorted by id.
+    """
+    documents = {}
+    shards = {}
+    for page in index["pages"].values():
+        for section_id, anchor, title, terms in page["sections"]:
+            url = page["url"] + (f"#{anchor}" if anchor else "")
+            documents[section_id] = [url, title]
+            for term, count in terms.items():
+                postings = shards.setdefault(shard_name(term), {}).setdefault(term, [])
+                postings.append([section_id, count])
+    for shard in shards.values():
+        for postings in shard.values():
+            postings.sort()
+    return documents, shards
+
+
+def documents_file(section_id):
+    return f"documents-{section_id // DOCUMENTS_PER_SHARD}.json"
+
+
+def write_search_files(index, dest_dir):
+    """
+    Writes dest_dir/search/: one <prefix>.json shard of postings per term
+    prefix and documents-<n>.json files mapping section ids to [url,
+    title], deleting files that are no longer produced. Returns (outputs,
+    written): every search file of this build and the ones that changed.
+    """
+    search_dir = os.path.join(dest_dir, SEARCH_DIR)
+    os.makedirs(search_dir, exist_ok=True)
+    documents, shards = build_shards(index)
+
+    files = {}
+    for section_id, doc in documents.items():
+        files.setdefault(documents_file(section_id), {})[str(section_id)] = doc
+    for name, shard in shards.items():
+        files[f"{name}.json"] = shard
+
+    outputs = []
+    written = []
+    for file_name, data in sorted(files.items()):
+        path = os.path.join(search_dir, file_name)
+        outputs.append(path)
+        # Unchanged shards keep their bytes and mtime, so browsers and CDNs
+        # holding them don't have to fetch them again
+        if write_output(path, [json.dumps(data, separators=(",", ":"), sort_keys=True, ensure_ascii=False)]):
+            written.append(path)
+
+    # Only our own .json files: compressed siblings are cleaned up by the
+    # compress stage, which knows which ones it wrote
+    for file_name in os.listdir(search_dir):
+        if file_name.endswith(".json") and file_name not in files:
+            os.remove(os.path.join(search_dir, file_name))
+    return outputs, written
+
+
+def search(dest_dir, query):
+    """
+    Looks query up the way the browser would: loads only the shards its
+    terms fall in and ranks sections containing every term by total count.
+    Returns [(url, title, score)], best first.
+    """
+    search_dir = os.path.join(dest_dir, SEARCH_DIR)
+    terms = tokenize(query)
+    if not terms:
+        return []
+
+    scores = None
+    for term in terms:
+        try:
+            with open(os.path.join(search_dir, f"{shard_name(term)}.json"), "r", encoding="utf-8") as f:
+                postings = json.load(f).get(term, [])
+        except FileNotFoundError:
+            postings = []
+        term_scores = {section_id: count for section_id, count in postings}
+        if scores is None:
+            scores = term_scores
+        else:
+            scores = {section_id: scores[section_id] + count for section_id, count in term_scores.items() if section_id in scores}
+
+    documents = {}
+    results = []
+    for section_id, score in scores.items():
+        file_name = documents_file(section_id)
+        if file_name not in documents:
+            with open(os.path.join(search_dir, file_name), "r", encoding="utf-8") as f:
+                documents[file_name] = json.load(f)
+        url, title = documents[file_name][str(section_id)]
+        results.append((url, title, score))
+    return sorted(results, key=lambda result: (-result[2], result[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query the search index written by the last build")
+    parser.add_argument("query")
+    parser.add_argument("--dest", default="docs", help="output directory the site was built into")
+    args = parser.parse_args()
+
+    for url, title, score in search(args.dest, args.query):
+        print(f"{score:>5}  {url}  {title}")
+
+
+if __name__ == "__main__":
+    main()
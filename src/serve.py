@@ -0,0 +1,368 @@
+import argparse
+import os
+import shutil
+import sys
+import threading
+import time
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+from main import (
+    build_incremental,
+    collect_files,
+    collect_pages,
+    generate_pages,
+    plan_site_listings,
+    remove_output,
+    render_listings,
+    render_page,
+    state_path,
+    BuildError,
+    MANIFEST_PATH,
+)
+from doc_cache import CACHE_DIR
+from images import process_images
+from links import page_url
+from listings import listing_digest, listing_dest
+from manifest import file_entry, load_manifest
+from metadata import page_metadata, load_metadata_index, save_metadata_index
+from template import load_template
+from watcher import open_watcher
+
+STATIC_DIR = "static"
+CONTENT_DIR = "content"
+TEMPLATE_PATH = "template.html"
+DEST_DIR = "docs"
+
+# Front matter the listings read: a page whose values for these didn't
+# change can't change any listing
+LISTED_FIELDS = ("url", "title", "date", "summary", "tags", "draft")
+
+LIVE_RELOAD_PATH = "/__livereload"
+LIVE_RELOAD_SCRIPT = (
+    f'<script>new EventSource("{LIVE_RELOAD_PATH}").onmessage = () => location.reload();</script>'
+).encode()
+
+
+def dest_for(path, from_dir, dest_dir):
+    return os.path.normpath(os.path.join(dest_dir, os.path.relpath(path, from_dir)))
+
+
+def template_dependencies(basepath):
+    # The template plus the partials and data files it pulls in. Falls back
+    # to the template alone while it doesn't compile, e.g. mid-edit
+    try:
+        return load_template(TEMPLATE_PATH, basepath).dependencies
+    except (OSError, ValueError):
+        return [TEMPLATE_PATH]
+
+
+def image_sizes():
+    # Sizes for the <img> tags of re-rendered pages. Only images that
+    # changed since the last build are read again
+    pairs = collect_files(STATIC_DIR, DEST_DIR)
+    return process_images(pairs, STATIC_DIR, DEST_DIR, state_path(MANIFEST_PATH, "images.json")).images
+
+
+def page_dest(path):
+    """content/blog/post.md -> docs/blog/post.html"""
+    # Sliced rather than through relpath: it runs for every page of the site
+    return DEST_DIR + path[len(CONTENT_DIR):-len(".md")] + ".html"
+
+
+def is_page(path):
+    return path.startswith(CONTENT_DIR + os.sep) and path.endswith(".md")
+
+
+def index_page(index, path):
+    dest_path = page_dest(path)
+    entry = file_entry(path, dest_path, index["pages"].get(path))
+    try:
+        page_metadata(index, path, entry, page_url(dest_path, DEST_DIR))
+    except ValueError as e:
+        # Likely mid-edit; rendering the page reports it too. Left out of
+        # the index, it's left off listings until it reads again
+        print(f"Failed to read front matter of {path}: {e}", file=sys.stderr)
+        index["pages"].pop(path, None)
+
+
+def scan_content():
+    """
+    Brings the metadata index written by the last build up to date with
+    all of content/, scanning only pages whose hash changed, and saves it.
+    Returns the index.
+    """
+    path = state_path(MANIFEST_PATH, "metadata.json")
+    index = load_metadata_index(path)
+    sources = set()
+    for from_path, _ in collect_pages(CONTENT_DIR, DEST_DIR):
+        sources.add(from_path)
+        index_page(index, from_path)
+    for from_path in list(index["pages"]):
+        if from_path not in sources:
+            del index["pages"][from_path]
+    save_metadata_index(index, path)
+    return index
+
+
+def listed_fields(meta):
+    # What listings show of a page, or whether it's on them at all
+    return None if meta is None else tuple(meta.get(field) for field in LISTED_FIELDS)
+
+
+def update_content(index, changed, removed):
+    """
+    Brings an index that was up to date before the given changes up to
+    date after them, touching only those pages. Nothing is saved: the next
+    build checks metadata.json against the pages' hashes anyway. Returns
+    whether the listings may have changed, which an edit to the body of a
+    page never does.
+    """
+    listed = False
+    for path in changed:
+        if is_page(path):
+            before = listed_fields(index["pages"].get(path))
+            index_page(index, path)
+            listed = listed or listed_fields(index["pages"].get(path)) != before
+    for path in removed:
+        listed = index["pages"].pop(path, None) is not None or listed
+    return listed
+
+
+def published_pages(index):
+    # (source, destination) of every page that isn't a draft
+    return [(source, page_dest(source)) for source, meta in sorted(index["pages"].items()) if not meta["draft"]]
+
+
+def listing_hashes():
+    # {url: digest} of the listing pages the last build wrote
+    return {url: entry["hash"] for url, entry in load_manifest(MANIFEST_PATH)["listings"].items()}
+
+
+def rebuild(changed, removed, basepath, dependencies=(TEMPLATE_PATH,), listings=None, metadata_index=None):
+    """
+    Brings docs/ up to date with a set of changed and removed source files,
+    touching only the outputs they affect. A change to the template or to
+    any of its dependencies re-renders every page. Returns how many outputs
+    were written or removed. Drafts are left out, and only the listing
+    pages whose posts changed are re-rendered: listings is {url: digest}
+    of those on disk, read from the manifest when not given and updated in
+    place, so a caller can carry it from one rebuild to the next.
+    metadata_index can be carried the same way; without it, all of
+    content/ is checked against the one on disk.
+    """
+    dependencies = set(dependencies)
+    images = None
+    rerender = bool(dependencies.intersection(changed + removed))
+    content_changed = rerender or any(path.startswith(CONTENT_DIR + os.sep) for path in changed + removed)
+    listings_changed = False
+    if content_changed:
+        if metadata_index is None:
+            metadata_index = scan_content()
+            listings_changed = True
+        else:
+            listings_changed = update_content(metadata_index, changed, removed) or rerender
+    if listings_changed:
+        pages = published_pages(metadata_index)
+    if rerender:
+        images = image_sizes()
+        generate_pages(pages, TEMPLATE_PATH, basepath, cache_dir=CACHE_DIR, images=images)
+        changed = [path for path in changed if not path.startswith(CONTENT_DIR + os.sep)]
+        count = len(pages)
+    else:
+        count = 0
+
+    failures = []
+    for path in changed:
+        if path in dependencies:
+            continue
+        if is_page(path):
+            dest_path = page_dest(path)
+            meta = metadata_index["pages"].get(path)
+            if meta is not None and meta["draft"]:
+                remove_output(dest_path, DEST_DIR)
+                count += 1
+                continue
+            print(f"Generating page from {path} to {dest_path} using {TEMPLATE_PATH}")
+            if images is None:
+                images = image_sizes()
+            try:
+                render_page(path, TEMPLATE_PATH, dest_path, basepath, CACHE_DIR, images=images)
+            except Exception as e:
+                failures.append((path, f"{type(e).__name__}: {e}"))
+                continue
+        elif path.startswith(STATIC_DIR + os.sep):
+            dest_path = dest_for(path, STATIC_DIR, DEST_DIR)
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            shutil.copy(path, dest_path)
+            print(f"Copied file from {path} to {dest_path}")
+        else:
+            continue
+        count += 1
+
+    for path in removed:
+        if is_page(path):
+            remove_output(page_dest(path), DEST_DIR)
+        elif path.startswith(STATIC_DIR + os.sep):
+            remove_output(dest_for(path, STATIC_DIR, DEST_DIR), DEST_DIR)
+        else:
+            continue
+        count += 1
+
+    if listings_changed:
+        if listings is None:
+            listings = listing_hashes()
+        planned = plan_site_listings(metadata_index, pages, DEST_DIR)
+        digests = {listing["url"]: listing_digest(listing) for listing in planned}
+        stale = [listing for listing in planned if rerender or listings.get(listing["url"]) != digests[listing["url"]]]
+        render_listings(stale, TEMPLATE_PATH, DEST_DIR, basepath)
+        count += len(stale)
+        for url in sorted(set(listings) - set(digests)):
+            remove_output(listing_dest(url, DEST_DIR), DEST_DIR)
+            count += 1
+        listings.clear()
+        listings.update(digests)
+
+    for path, error in failures:
+        print(f"Failed to generate {path}: {error}", file=sys.stderr)
+    return count
+
+
+class LiveReload:
+    """Lets request threads wait until the next rebuild finishes."""
+
+    def __init__(self):
+        self.version = 0
+        self.condition = threading.Condition()
+
+    def notify(self):
+        with self.condition:
+            self.version += 1
+            self.condition.notify_all()
+
+    def wait(self, version, timeout):
+        with self.condition:
+            self.condition.wait_for(lambda: self.version != version, timeout)
+            return self.version
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    live_reload = None
+
+    def log_message(self, format, *args):
+        # Keep the terminal for build output
+        pass
+
+    def do_GET(self):
+        if self.live_reload is not None and self.path == LIVE_RELOAD_PATH:
+            self.send_events()
+            return
+        if self.live_reload is not None:
+            path = self.translate_path(self.path)
+            if os.path.isdir(path) and self.path.split("?", 1)[0].endswith("/"):
+                path = os.path.join(path, "index.html")
+            if path.endswith(".html") and os.path.isfile(path):
+                self.send_html(path)
+                return
+        super().do_GET()
+
+    def send_html(self, path):
+        with open(path, "rb") as f:
+            body = f.read()
+        marker = body.rfind(b"</body>")
+        if marker == -1:
+            body += LIVE_RELOAD_SCRIPT
+        else:
+            body = body[:marker] + LIVE_RELOAD_SCRIPT + body[marker:]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_events(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        version = self.live_reload.version
+        try:
+            while True:
+                new_version = self.live_reload.wait(version, timeout=15)
+                if new_version != version:
+                    self.wfile.write(b"data: reload\n\n")
+                    version = new_version
+                else:
+                    # Comment line as a keep-alive
+                    self.wfile.write(b": ping\n\n")
+                self.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def start_server(port, live_reload):
+    DevRequestHandler.live_reload = live_reload
+    handler = partial(DevRequestHandler, directory=DEST_DIR)
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def watch(basepath, interval, live_reload):
+    dependencies = template_dependencies(basepath)
+    listings = listing_hashes()
+    # Just saved by the build serve starts with
+    metadata_index = load_metadata_index(state_path(MANIFEST_PATH, "metadata.json"))
+    watcher = open_watcher([CONTENT_DIR, STATIC_DIR], dependencies)
+    while True:
+        # Returns as soon as inotify reports something; polling sleeps
+        watcher.wait(interval)
+        changed, removed = watcher.changes()
+        if not changed and not removed:
+            continue
+
+        start = time.perf_counter()
+        try:
+            count = rebuild(changed, removed, basepath, dependencies, listings, metadata_index)
+        except (BuildError, ValueError) as e:
+            # A page failed, or now collides with a listing page
+            print(f"Rebuild failed: {e}", file=sys.stderr)
+            continue
+        finally:
+            # An edit can add or drop partials: start watching the new ones
+            # from their current state and forget the dropped ones
+            dependencies = template_dependencies(basepath)
+            watcher.set_files(dependencies)
+        print(f"Rebuilt {count} outputs in {(time.perf_counter() - start) * 1000:.1f} ms")
+        if live_reload is not None:
+            live_reload.notify()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build the site, serve docs/ and rebuild on changes")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument("--interval", type=float, default=0.05, help="seconds between checks for changes, where they have to be polled")
+    parser.add_argument("--live-reload", action="store_true", help="reload open pages after each rebuild")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    build_incremental(STATIC_DIR, CONTENT_DIR, TEMPLATE_PATH, DEST_DIR, args.basepath, cache_dir=CACHE_DIR)
+
+    live_reload = LiveReload() if args.live_reload else None
+    server = start_server(args.port, live_reload)
+    print(f"Serving {DEST_DIR}/ at http://127.0.0.1:{args.port}/ (Ctrl+C to stop)")
+    try:
+        watch(args.basepath, args.interval, live_reload)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
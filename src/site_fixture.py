@@ -0,0 +1,69 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from main import build_incremental
+
+TEMPLATE = "<title>{{ Title }}</title>{{ Content }}"
+
+
+def write(path, text):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def write_bytes(path, data):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+class TempDirTestCase(unittest.TestCase):
+    """Gives each test an empty temporary directory; path() joins onto it."""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, *parts):
+        return os.path.join(self.tmp.name, *parts)
+
+
+class SiteTestCase(TempDirTestCase):
+    """
+    Gives each test a small site in a temporary directory: template.html
+    holding template, static/index.css, and pages, {path under content/:
+    Markdown}. build() runs an incremental build of it into docs/.
+    """
+
+    template = TEMPLATE
+    pages = {"index.md": "# Home"}
+
+    def setUp(self):
+        super().setUp()
+        write(self.path("template.html"), self.template)
+        write(self.path("static", "index.css"), "body {}")
+        for name, text in self.pages.items():
+            write(self.path("content", *name.split("/")), text)
+
+    def build(self, basepath="/", **kwargs):
+        """Takes build_incremental's keyword arguments. Returns what the build printed."""
+        with redirect_stdout(StringIO()) as out:
+            build_incremental(
+                self.path("static"),
+                self.path("content"),
+                self.path("template.html"),
+                self.path("docs"),
+                basepath,
+                self.path(".build", "manifest.json"),
+                **kwargs,
+            )
+        return out.getvalue()
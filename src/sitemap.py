@@ -0,0 +1,115 @@
+import hashlib
+import json
+import os
+from xml.sax.saxutils import XMLGenerator
+
+from outputs import open_output
+
+SITEMAP_NAME = "sitemap.xml"
+SITEMAP_NAMESPACE = "http://www.sitemaps.org/schemas/sitemap/0.9"
+
+# The sitemap protocol's limit per file. Past it, sitemap.xml becomes an
+# index of sitemap-1.xml, sitemap-2.xml, ...
+URLS_PER_SHARD = 50000
+
+
+def absolute_url(site_url, url):
+    # ("https://example.com/repo/", "/blog/tom/") -> https://example.com/repo/blog/tom/
+    return site_url.rstrip("/") + "/" + url.lstrip("/")
+
+
+def digest_of(*parts):
+    return hashlib.sha256(json.dumps(parts).encode()).hexdigest()
+
+
+def text_element(xml, tag, text, attrs=None):
+    xml.startElement(tag, attrs or {})
+    xml.characters(text)
+    xml.endElement(tag)
+
+
+def write_streamed(path, digest, previous, write_body):
+    """
+    Streams an XML document into path through write_body(xml), unless the
+    digest of what it would contain matches the one recorded last time and
+    the file is still there. Returns True when the file was written.
+    """
+    if previous.get(path) == digest and os.path.exists(path):
+        return False
+    with open_output(path) as f:
+        xml = XMLGenerator(f, "utf-8", short_empty_elements=True)
+        xml.startDocument()
+        write_body(xml)
+        xml.endDocument()
+        f.write("\n")
+    return True
+
+
+def write_urlset(entries, site_url):
+    def write_body(xml):
+        xml.startElement("urlset", {"xmlns": SITEMAP_NAMESPACE})
+        xml.ignorableWhitespace("\n")
+        for url, lastmod in entries:
+            xml.startElement("url", {})
+            text_element(xml, "loc", absolute_url(site_url, url))
+            if lastmod:
+                text_element(xml, "lastmod", lastmod)
+            xml.endElement("url")
+            xml.ignorableWhitespace("\n")
+        xml.endElement("urlset")
+    return write_body
+
+
+def write_index(shard_urls):
+    def write_body(xml):
+        xml.startElement("sitemapindex", {"xmlns": SITEMAP_NAMESPACE})
+        xml.ignorableWhitespace("\n")
+        for url in shard_urls:
+            xml.startElement("sitemap", {})
+            text_element(xml, "loc", url)
+            xml.endElement("sitemap")
+            xml.ignorableWhitespace("\n")
+        xml.endElement("sitemapindex")
+    return write_body
+
+
+def write_sitemap(entries, site_url, dest_dir, previous, per_shard=URLS_PER_SHARD):
+    """
+    Writes the sitemap for entries, a list of (root-relative URL, lastmod
+    or None), sorted so each shard holds the same URLs from build to build.
+    Shards whose contents are unchanged since `previous` ({path: digest})
+    are skipped. Returns ({path: digest}, written) for every file.
+    """
+    entries = sorted(entries, key=lambda entry: entry[0])
+    sitemap_path = os.path.join(dest_dir, SITEMAP_NAME)
+    digests = {}
+    written = []
+    if len(entries) <= per_shard:
+        digests[sitemap_path] = digest_of(site_url, entries)
+        if write_streamed(sitemap_path, digests[sitemap_path], previous, write_urlset(entries, site_url)):
+            written.append(sitemap_path)
+        return digests, written
+
+    shard_urls = []
+    for number, start in enumerate(range(0, len(entries), per_shard), 1):
+        name = f"sitemap-{number}.xml"
+        path = os.path.join(dest_dir, name)
+        shard = entries[start:start + per_shard]
+        digests[path] = digest_of(site_url, shard)
+        if write_streamed(path, digests[path], previous, write_urlset(shard, site_url)):
+            written.append(path)
+        shard_urls.append(absolute_url(site_url, name))
+    digests[sitemap_path] = digest_of(shard_urls)
+    if write_streamed(sitemap_path, digests[sitemap_path], previous, write_index(shard_urls)):
+        written.append(sitemap_path)
+    return digests, written
+
+
+def remove_stale(previous, digests):
+    """Deletes files written last time that this build didn't produce."""
+    removed = []
+    for path in previous:
+        if path not in digests and os.path.exists(path):
+            os.remove(path)
+            removed.append(path)
+    return removed
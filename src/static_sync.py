@@ -0,0 +1,138 @@
+import os
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+from outputs import hash_file
+from parallel import map_bounded
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# ioctl that asks the filesystem (btrfs, xfs, ...) for a copy-on-write clone
+FICLONE = 0x40049409
+
+COPY_THREADS = 8
+
+# Copies queued per thread; beyond that the next one waits for a slot
+PENDING_PER_THREAD = 64
+
+LINK_MODES = ("auto", "copy", "hardlink")
+
+
+class SyncResult:
+    def __init__(self):
+        self.outputs = []  # (source, destination) for every file in the source tree
+        self.copied = []
+        self.unchanged = 0
+        self.assets = {}  # original URL -> fingerprinted URL, when fingerprinting
+
+
+def needs_copy(source_path, dest_path, checksum=False):
+    """
+    Decides whether dest_path is out of date. Size and mtime decide on their
+    own unless checksum is set, in which case files with the same size but
+    a different mtime are compared by content.
+    """
+    try:
+        dest_stat = os.stat(dest_path)
+    except FileNotFoundError:
+        return True
+    source_stat = os.stat(source_path)
+    if source_stat.st_size != dest_stat.st_size:
+        return True
+    if source_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return False
+    if checksum and hash_file(source_path) == hash_file(dest_path):
+        # Same bytes; line the mtimes up so the next sync skips the hashing
+        shutil.copystat(source_path, dest_path)
+        return False
+    return True
+
+
+def reflink(source_path, dest_path):
+    with open(source_path, "rb") as src, open(dest_path, "wb") as dst:
+        fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+    shutil.copystat(source_path, dest_path)
+
+
+def copy_file(source_path, dest_path, link="auto"):
+    # Placed under a temporary name and renamed over dest_path, so the old
+    # file is never written through (it may be a hardlink to the source)
+    # and is never seen half copied
+    tmp_path = f"{dest_path}.tmp"
+    if os.path.lexists(tmp_path):
+        os.unlink(tmp_path)
+    place_file(source_path, tmp_path, link)
+    os.replace(tmp_path, dest_path)
+
+
+def place_file(source_path, dest_path, link):
+    if link == "hardlink":
+        try:
+            os.link(source_path, dest_path)
+            return
+        except OSError:
+            pass
+    elif link == "auto" and fcntl is not None:
+        try:
+            reflink(source_path, dest_path)
+            return
+        except OSError:
+            if os.path.exists(dest_path):
+                os.unlink(dest_path)
+
+    # copy2 keeps the mtime, which is what the next sync compares against
+    shutil.copy2(source_path, dest_path)
+
+
+def sync_static(pairs, checksum=False, link="auto", threads=COPY_THREADS):
+    """
+    Copies each (source, destination) pair whose destination is missing or
+    out of date, in a pool of threads. Nothing is deleted here; callers
+    decide what is stale since pages share the same output directory.
+    The pairs are kept as a list, since result.outputs goes into the
+    manifest, which holds an entry per file anyway; only the number of
+    copies queued on the pool at once is bounded.
+    """
+    result = SyncResult()
+    result.outputs = list(pairs)
+
+    for dest_dir in sorted({os.path.dirname(dest_path) for _, dest_path in result.outputs}):
+        os.makedirs(dest_dir, exist_ok=True)
+
+    def sync_one(pair):
+        source_path, dest_path = pair
+        if not needs_copy(source_path, dest_path, checksum):
+            return False
+        copy_file(source_path, dest_path, link)
+        return True
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        copied_flags = list(map_bounded(executor, sync_one, result.outputs, threads * PENDING_PER_THREAD))
+
+    for pair, copied in zip(result.outputs, copied_flags):
+        if copied:
+            result.copied.append(pair)
+        else:
+            result.unchanged += 1
+    return result
+
+
+def prune_outputs(dest_dir, keep):
+    """
+    Deletes every file under dest_dir that isn't in keep, then any
+    directories left empty. Returns the removed paths.
+    """
+    keep = {os.path.normpath(path) for path in keep}
+    removed = []
+    for dir_path, dir_names, file_names in os.walk(dest_dir, topdown=False):
+        for file_name in sorted(file_names):
+            path = os.path.normpath(os.path.join(dir_path, file_name))
+            if path not in keep:
+                os.remove(path)
+                removed.append(path)
+        if dir_path != dest_dir and not os.listdir(dir_path):
+            os.rmdir(dir_path)
+    return sorted(removed)
@@ -0,0 +1,253 @@
+import json
+import os
+import re
+
+from htmlnode import ParentNode
+
+PLACEHOLDER_REGEX = re.compile(r"\{\{ (\w+) \}\}")
+# {{> partials/nav.html }}, relative to the file doing the including
+INCLUDE_REGEX = re.compile(r"\{\{> ([^\s{}]+) \}\}")
+# {{ data.site.title }} is the "title" key of data/site.json
+DATA_REGEX = re.compile(r"\{\{ data\.(\w+)\.([\w.]+) \}\}")
+
+# Root-relative href/src attributes in template source
+ROOT_URL_REGEX = re.compile(r'\b(href|src)="/([^"]*)"')
+
+# Used by minify_html on template source
+TAG_REGEX = re.compile(r"<[^>]*>")
+TAG_NAME_REGEX = re.compile(r"</?([a-zA-Z][\w-]*)")
+COMMENT_REGEX = re.compile(r"<!--(?!\[).*?-->", re.S)
+WHITESPACE_REGEX = re.compile(r"\s+")
+# Content inside these is copied as written
+RAW_TEXT_TAGS = ("pre", "textarea", "script", "style")
+# Whitespace next to these never renders, so it can go entirely
+BLOCK_TAGS = frozenset((
+    "html", "head", "body", "title", "meta", "link", "base", "script", "style",
+    "article", "aside", "div", "footer", "header", "main", "nav", "section",
+    "p", "ul", "ol", "li", "h1", "h2", "h3", "h4", "h5", "h6", "pre",
+    "blockquote", "hr", "table", "thead", "tbody", "tr", "td", "th",
+    "form", "figure", "figcaption",
+))
+
+# Data files live next to the top-level template
+DATA_DIR = "data"
+
+# (template_path, basepath, minify) -> (dependency mtimes, assets, Template), per process
+_template_cache = {}
+
+
+class Template:
+    """
+    A template compiled into static segments with named slots between them,
+    e.g. "<title>{{ Title }}</title>" becomes segments ["<title>", "</title>"]
+    and slot_names ["Title"]. Rendering just interleaves the two.
+    """
+
+    def __init__(self, source, basepath="/", dependencies=(), assets=None, minify=False):
+        # Every file the compiled template was built from, itself included
+        self.dependencies = list(dependencies)
+        # Minifying happens once here; values are minified as they're written
+        self.minify = minify
+        source = rewrite_root_paths(source, basepath, assets)
+        if minify:
+            source = minify_html(source)
+        self.segments = []
+        self.slot_names = []
+        pos = 0
+        for match in PLACEHOLDER_REGEX.finditer(source):
+            self.segments.append(source[pos:match.start()])
+            self.slot_names.append(match.group(1))
+            pos = match.end()
+        self.segments.append(source[pos:])
+
+    def render_to(self, out, **values):
+        """
+        Writes the filled-in template to out (a list or file-like object).
+        A value can be a string or an HTMLNode, which is streamed with
+        write_html (minified if the template is). Slots without a value
+        are left as written.
+        """
+        write = out.append if isinstance(out, list) else out.write
+        write(self.segments[0])
+        for name, segment in zip(self.slot_names, self.segments[1:]):
+            value = values.get(name)
+            if value is None:
+                write(f"{{{{ {name} }}}}")
+            elif isinstance(value, str):
+                write(value)
+            else:
+                value.write_html(out, self.minify)
+            write(segment)
+
+    def render(self, **values):
+        fragments = []
+        self.render_to(fragments, **values)
+        return "".join(fragments)
+
+
+def expand_template(template_path):
+    """
+    Reads template_path with its partials inlined and data placeholders
+    filled in. Returns (source, dependencies), where dependencies lists
+    every file read along the way in the order first read.
+    """
+    dependencies = [template_path]
+    data_dir = os.path.join(os.path.dirname(template_path), DATA_DIR)
+    data_files = {}
+
+    def include(path, including):
+        if path in including:
+            cycle = " -> ".join(including + [path])
+            raise ValueError(f"Template include cycle: {cycle}")
+        with open(path, "r") as f:
+            source = f.read()
+
+        def expand_include(match):
+            partial_path = os.path.normpath(os.path.join(os.path.dirname(path), match.group(1)))
+            if partial_path not in dependencies:
+                dependencies.append(partial_path)
+            return include(partial_path, including + [path])
+
+        return INCLUDE_REGEX.sub(expand_include, source)
+
+    def expand_data(match):
+        name, key = match.groups()
+        data_path = os.path.join(data_dir, name + ".json")
+        if data_path not in data_files:
+            with open(data_path, "r") as f:
+                data_files[data_path] = json.load(f)
+            dependencies.append(data_path)
+        value = data_files[data_path]
+        for part in key.split("."):
+            if not isinstance(value, dict) or part not in value:
+                raise ValueError(f"{data_path} has no key {key}")
+            value = value[part]
+        return str(value)
+
+    source = DATA_REGEX.sub(expand_data, include(template_path, []))
+    return source, dependencies
+
+
+def dependency_mtimes(dependencies):
+    return tuple(os.stat(path).st_mtime_ns for path in dependencies)
+
+
+def load_template(template_path, basepath="/", assets=None, minify=False):
+    """
+    Returns the compiled template for template_path, reading and compiling
+    it only when it's new, the mtime of anything it depends on (partials
+    and data files included) has changed, or the asset table differs.
+    """
+    key = (template_path, basepath, minify)
+    cached = _template_cache.get(key)
+    if cached is not None and cached[1] == assets:
+        try:
+            if dependency_mtimes(cached[2].dependencies) == cached[0]:
+                return cached[2]
+        except FileNotFoundError:
+            pass
+
+    source, dependencies = expand_template(template_path)
+    template = Template(source, basepath, dependencies, assets, minify)
+    _template_cache[key] = (dependency_mtimes(dependencies), assets, template)
+    return template
+
+
+def is_block_boundary(tag):
+    # None stands for the start or end of the source
+    if tag is None or tag.startswith("<!"):
+        return True
+    match = TAG_NAME_REGEX.match(tag)
+    return match is not None and match.group(1).lower() in BLOCK_TAGS
+
+
+def minify_html(source):
+    """
+    Drops comments and collapses whitespace between tags: runs become a
+    single space, or nothing next to a block-level tag where whitespace
+    never renders. Content of <pre>, <textarea>, <script> and <style> is
+    left alone.
+    """
+    source = COMMENT_REGEX.sub("", source)
+    parts = []
+    pos = 0
+    previous = None
+    raw = None
+    tags = [(match.start(), match.end()) for match in TAG_REGEX.finditer(source)]
+    for start, end in tags + [(len(source), len(source))]:
+        text = source[pos:start]
+        tag = source[start:end] or None
+        pos = end
+        if raw is not None:
+            parts.append(text)
+        else:
+            text = WHITESPACE_REGEX.sub(" ", text)
+            if text.startswith(" ") and is_block_boundary(previous):
+                text = text[1:]
+            if text.endswith(" ") and is_block_boundary(tag):
+                text = text[:-1]
+            parts.append(text)
+        if tag is None:
+            break
+        parts.append(tag)
+        match = TAG_NAME_REGEX.match(tag)
+        name = match.group(1).lower() if match else None
+        if raw is None and name in RAW_TEXT_TAGS and not tag.startswith("</"):
+            raw = name
+        elif raw is not None and name == raw and tag.startswith("</"):
+            raw = None
+        previous = tag
+    return "".join(parts)
+
+
+def rewrite_url(url, basepath, assets=None):
+    """
+    Maps a root-relative URL to where it's served from: through the asset
+    table ("/index.css" -> "/index.1a2b3c4d.css") when it names a
+    fingerprinted file, then under basepath.
+    """
+    if assets:
+        end = len(url)
+        for mark in "?#":
+            index = url.find(mark)
+            if index != -1 and index < end:
+                end = index
+        renamed = assets.get(url[:end])
+        if renamed is not None:
+            url = renamed + url[end:]
+    if basepath == "/":
+        return url
+    return basepath + url[1:]
+
+
+def rewrite_root_paths(html, basepath, assets=None):
+    # Point hardcoded root paths at their assets and the basepath, in one
+    # pass over the template source
+    if basepath == "/" and not assets:
+        return html
+    return ROOT_URL_REGEX.sub(
+        lambda match: f'{match.group(1)}="{rewrite_url("/" + match.group(2), basepath, assets)}"',
+        html,
+    )
+
+
+def rewrite_root_urls(node, basepath, assets=None):
+    """
+    Points root-relative href/src props in a rendered page at basepath,
+    and at fingerprinted names for anything in the asset table. Works on
+    the node tree, so text that merely looks like a link (in a code block,
+    say) is left alone.
+    """
+    if basepath == "/" and not assets:
+        return
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, ParentNode):
+            stack.extend(node.children or [])
+        if not node.props:
+            continue
+        for prop in ("href", "src"):
+            url = node.props.get(prop)
+            if url is not None and url.startswith("/"):
+                node.props[prop] = rewrite_url(url, basepath, assets)
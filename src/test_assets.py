@@ -0,0 +1,103 @@
+import os
+import unittest
+
+from assets import fingerprint_pairs, fingerprinted_path
+from htmlnode import LeafNode, ParentNode
+from site_fixture import SiteTestCase, TempDirTestCase, read, write
+from template import Template, rewrite_root_urls
+
+TEMPLATE = '<link href="/index.css"><title>{{ Title }}</title>{{ Content }}'
+
+
+class TestAssets(TempDirTestCase):
+    def test_fingerprinted_path(self):
+        self.assertEqual(fingerprinted_path("docs/index.css", "1a2b3c4d5e6f"), "docs/index.1a2b3c4d.css")
+
+    def test_fingerprint_pairs(self):
+        write(self.path("static", "index.css"), "body {}")
+        write(self.path("static", "robots.txt"), "User-agent: *")
+        pairs = [
+            (self.path("static", "index.css"), self.path("docs", "index.css")),
+            (self.path("static", "robots.txt"), self.path("docs", "robots.txt")),
+        ]
+        renamed, assets, rewritten = fingerprint_pairs(pairs, self.path("docs"), self.path(".build", "assets.json"))
+        css = renamed[0][1]
+        self.assertRegex(os.path.basename(css), r"^index\.[0-9a-f]{8}\.css$")
+        self.assertEqual(renamed[1], pairs[1])
+        self.assertDictEqual(assets, {"/index.css": "/" + os.path.basename(css)})
+        self.assertDictEqual(rewritten, {css: "body {}"})
+
+    def test_stylesheets_point_at_fingerprinted_files(self):
+        files = {
+            "css/site.css": '@import "base.css";\n'
+                            'h1 { background: url(/images/tom.png) }\n'
+                            '@font-face { src: url("../fonts/x.woff2?v=1") format("woff2"), url(data:font/woff2;base64,AA) }',
+            "css/base.css": "body { background: url('/images/tom.png#bg') }",
+            "images/tom.png": "png",
+            "fonts/x.woff2": "font",
+        }
+        pairs = []
+        for name, text in files.items():
+            write(self.path("static", name), text)
+            pairs.append((self.path("static", name), self.path("docs", name)))
+        renamed, assets, rewritten = fingerprint_pairs(pairs, self.path("docs"), self.path(".build", "assets.json"))
+        site = dict(renamed)[self.path("static", "css", "site.css")]
+        base_name = os.path.basename(assets["/css/base.css"])
+        font_name = os.path.basename(assets["/fonts/x.woff2"])
+        self.assertEqual(
+            rewritten[site],
+            f'@import "{base_name}";\n'
+            f'h1 {{ background: url({assets["/images/tom.png"]}) }}\n'
+            f'@font-face {{ src: url("../fonts/{font_name}?v=1") format("woff2"), url(data:font/woff2;base64,AA) }}',
+        )
+        self.assertIn(assets["/images/tom.png"] + "#bg", rewritten[dict(renamed)[self.path("static", "css", "base.css")]])
+
+        # A renamed image renames the stylesheets that show it
+        write(self.path("static", "images", "tom.png"), "new png")
+        renamed_again, _, _ = fingerprint_pairs(pairs, self.path("docs"), self.path(".build", "assets.json"))
+        self.assertNotEqual(dict(renamed_again)[self.path("static", "css", "site.css")], site)
+
+    def test_rewrite_through_lookup_table(self):
+        assets = {"/index.css": "/index.1a2b3c4d.css", "/images/a.png": "/images/a.5e6f7a8b.png"}
+        template = Template(TEMPLATE + '<a href="/about">x</a>', "/repo/", assets=assets)
+        self.assertEqual(
+            template.render(Title="T", Content=""),
+            '<link href="/repo/index.1a2b3c4d.css"><title>T</title><a href="/repo/about">x</a>',
+        )
+
+        node = ParentNode("p", [
+            LeafNode("img", "", {"src": "/images/a.png?v=2", "alt": "a"}),
+            LeafNode("a", "css", {"href": "/index.css#top"}),
+        ])
+        rewrite_root_urls(node, "/", assets)
+        self.assertEqual(
+            node.to_html(),
+            '<p><img src="/images/a.5e6f7a8b.png?v=2" alt="a"><a href="/index.1a2b3c4d.css#top">css</a></p>',
+        )
+
+
+class TestIncrementalAssets(SiteTestCase):
+    template = TEMPLATE
+
+    def build(self):
+        return super().build(fingerprint=True, explain=True)
+
+    def test_incremental_build_renames_changed_assets(self):
+        self.build()
+        first = [name for name in os.listdir(self.path("docs")) if name.endswith(".css")]
+        self.assertEqual(len(first), 1)
+        self.assertIn(f'href="/{first[0]}"', read(self.path("docs", "index.html")))
+        self.assertIn("0 pages rendered", self.build())
+
+        write(self.path("static", "index.css"), "body { color: red }")
+        out = self.build()
+        self.assertIn("asset fingerprints changed", out)
+        self.assertIn("1 pages rendered, 1 files copied, 1 outputs removed", out)
+        second = [name for name in os.listdir(self.path("docs")) if name.endswith(".css")]
+        self.assertEqual(len(second), 1)
+        self.assertNotEqual(first, second)
+        self.assertIn(f'href="/{second[0]}"', read(self.path("docs", "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
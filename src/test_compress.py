@@ -0,0 +1,68 @@
+import gzip
+import os
+import tempfile
+import unittest
+
+from compress import compress_outputs, gzip_bytes, MIN_SIZE
+from site_fixture import write
+
+TEXT = "<p>Three rings for the elven-kings under the sky</p>\n" * 100
+
+
+class TestCompress(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.state = os.path.join(self.tmp.name, ".build", "compress.json")
+        self.html = os.path.join(self.tmp.name, "docs", "index.html")
+        self.small = os.path.join(self.tmp.name, "docs", "small.css")
+        self.image = os.path.join(self.tmp.name, "docs", "a.png")
+        write(self.html, TEXT)
+        write(self.small, "body {}")
+        write(self.image, TEXT)
+        self.paths = [self.html, self.small, self.image]
+
+    def test_compresses_large_text_files_only(self):
+        result = compress_outputs(self.paths, self.state, {".gz": gzip_bytes})
+        self.assertListEqual(result.compressed, [self.html])
+        self.assertListEqual(result.outputs, [self.html + ".gz"])
+        with gzip.open(self.html + ".gz", "rt") as f:
+            self.assertEqual(f.read(), TEXT)
+        self.assertFalse(os.path.exists(self.small + ".gz"))
+        self.assertFalse(os.path.exists(self.image + ".gz"))
+        self.assertLess(os.path.getsize(self.small), MIN_SIZE)
+
+    def test_skips_unchanged_content(self):
+        compress_outputs(self.paths, self.state, {".gz": gzip_bytes})
+        # Rewriting the same bytes changes the mtime but not the hash
+        write(self.html, TEXT)
+        result = compress_outputs(self.paths, self.state, {".gz": gzip_bytes})
+        self.assertListEqual(result.compressed, [])
+        self.assertEqual(result.unchanged, 1)
+
+        write(self.html, TEXT + "<p>One ring</p>")
+        result = compress_outputs(self.paths, self.state, {".gz": gzip_bytes})
+        self.assertListEqual(result.compressed, [self.html])
+
+    def test_new_encoding_recompresses(self):
+        compress_outputs(self.paths, self.state, {".gz": gzip_bytes})
+        encodings = {".gz": gzip_bytes, ".br": lambda data: data[:10]}
+        result = compress_outputs(self.paths, self.state, encodings)
+        self.assertListEqual(result.compressed, [self.html])
+        self.assertListEqual(sorted(result.outputs), [self.html + ".br", self.html + ".gz"])
+
+    def test_removes_siblings_of_gone_files(self):
+        compress_outputs(self.paths, self.state, {".gz": gzip_bytes})
+        os.remove(self.html)
+        result = compress_outputs([self.small], self.state, {".gz": gzip_bytes})
+        self.assertListEqual(result.removed, [self.html + ".gz"])
+        self.assertFalse(os.path.exists(self.html + ".gz"))
+
+        write(self.html, TEXT)
+        compress_outputs(self.paths, self.state, {".gz": gzip_bytes})
+        result = compress_outputs(self.paths, self.state, {})
+        self.assertListEqual(result.removed, [self.html + ".gz"])
+
+
+if __name__ == "__main__":
+    unittest.main()
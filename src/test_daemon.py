@@ -0,0 +1,94 @@
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+
+from daemon import make_server, request, main
+from site_fixture import read, write
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@unittest.skipUnless(hasattr(os, "fork"), "needs Unix sockets")
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+        write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        write(os.path.join("static", "index.css"), "body {}")
+        write(os.path.join("content", "index.md"), "# Home\n\n[Post](/blog/post)")
+        write(os.path.join("content", "blog", "post.md"), "# Post")
+        self.socket_path = os.path.join(self.tmp.name, "daemon.sock")
+
+    def start(self):
+        # Its own process, as in real use: the daemon redirects stdout
+        daemon = subprocess.Popen(
+            [sys.executable, os.path.join(SRC_DIR, "daemon.py"), "--socket", self.socket_path, "start"],
+            stdout=subprocess.DEVNULL,
+        )
+        self.addCleanup(daemon.wait, 10)
+        self.addCleanup(self.send, {"stop": True})
+        deadline = time.monotonic() + 10
+        while self.send({})[0] is None:
+            self.assertLess(time.monotonic(), deadline, "daemon didn't start")
+            time.sleep(0.02)
+
+    def send(self, message):
+        with redirect_stdout(StringIO()) as out, redirect_stderr(StringIO()) as err:
+            code = request(message, self.socket_path)
+        return code, out.getvalue(), err.getvalue()
+
+    def test_builds_then_skips_when_nothing_changed(self):
+        self.start()
+        code, out, _ = self.send({"argv": ["--incremental", "--no-cache"]})
+        self.assertEqual(code, 0)
+        self.assertIn("Incremental build: 2 pages rendered", out)
+
+        code, out, _ = self.send({"argv": ["--incremental", "--no-cache"]})
+        self.assertEqual((code, out), (0, "Up to date: nothing changed since the last build\n"))
+
+        write(os.path.join("content", "blog", "post.md"), "# Post\n\nEdited")
+        code, out, _ = self.send({"argv": ["--incremental", "--no-cache"]})
+        self.assertIn("Incremental build: 1 pages rendered", out)
+
+        # Outputs changed behind the daemon's back are noticed too
+        os.remove(os.path.join("docs", "index.css"))
+        code, out, _ = self.send({"argv": ["--incremental", "--no-cache"]})
+        self.assertIn("1 files copied", out)
+
+    def test_errors_are_relayed(self):
+        self.start()
+        code, _, err = self.send({"argv": ["--explain"]})
+        self.assertEqual(code, 2)
+        self.assertIn("--explain only applies to --incremental builds", err)
+
+    def test_render(self):
+        self.start()
+        self.send({"argv": ["--incremental", "--no-cache"]})
+        write(os.path.join("content", "blog", "post.md"), "# Renamed")
+        code, out, _ = self.send({"render": [os.path.join("content", "blog", "post.md")]})
+        self.assertEqual(code, 0)
+        self.assertIn("<title>Renamed</title>", read(os.path.join("docs", "blog", "post.html")))
+
+    def test_only_one_daemon_per_socket(self):
+        self.start()
+        with self.assertRaises(RuntimeError):
+            make_server(self.socket_path)
+
+    def test_client_builds_in_process_without_a_daemon(self):
+        self.assertIsNone(request({"argv": []}, self.socket_path))
+        with redirect_stdout(StringIO()) as out:
+            code = main(["--socket", self.socket_path, "build", "--incremental", "--no-cache"])
+        self.assertEqual(code, 0)
+        self.assertIn("Incremental build: 2 pages rendered", out.getvalue())
+        self.assertTrue(os.path.exists(os.path.join("docs", "blog", "post.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
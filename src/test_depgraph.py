@@ -0,0 +1,48 @@
+import os
+import tempfile
+import unittest
+
+from depgraph import hash_dependencies, rebuild_reasons
+
+
+class TestDepgraph(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.dest = os.path.join(self.tmp.name, "index.html")
+        with open(self.dest, "w") as f:
+            f.write("<p>hi</p>")
+
+    def entry(self, digest="abc", **deps):
+        return {"hash": digest, "dest": self.dest, "deps": deps}
+
+    def test_hash_dependencies_hashes_each_file_once(self):
+        hashes = {"nav.html": "cached"}
+        self.assertDictEqual(hash_dependencies(["nav.html"], hashes), {"nav.html": "cached"})
+        deps = hash_dependencies([self.dest], hashes)
+        self.assertEqual(deps[self.dest], hashes[self.dest])
+
+    def test_up_to_date(self):
+        entry = self.entry(**{"template.html": "t1"})
+        self.assertListEqual(rebuild_reasons(entry, self.entry(**{"template.html": "t1"})), [])
+
+    def test_reasons(self):
+        self.assertListEqual(rebuild_reasons(self.entry(), None), ["new page"])
+        self.assertListEqual(rebuild_reasons(self.entry("new"), self.entry()), ["source changed"])
+        self.assertListEqual(rebuild_reasons(self.entry(), self.entry(), ["basepath"]), ["basepath changed"])
+
+        previous = self.entry(**{"template.html": "t1", "old.html": "o1"})
+        entry = self.entry(**{"template.html": "t2", "nav.html": "n1"})
+        self.assertListEqual(rebuild_reasons(entry, previous), [
+            "template.html changed",
+            "now depends on nav.html",
+            "no longer depends on old.html",
+        ])
+
+    def test_missing_output(self):
+        os.remove(self.dest)
+        self.assertListEqual(rebuild_reasons(self.entry(), self.entry()), ["output missing"])
+
+
+if __name__ == "__main__":
+    unittest.main()
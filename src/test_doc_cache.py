@@ -0,0 +1,107 @@
+import os
+import tempfile
+import unittest
+
+import doc_cache
+
+from htmlnode import LeafNode, ParentNode
+from markdown_helpers import markdown_to_html_node
+from main import render_page
+from doc_cache import (
+    encode_tree,
+    decode_tree,
+    cache_key,
+    entry_path,
+    load,
+    store,
+    parse_cached,
+    keep_in_memory,
+    evict,
+)
+
+MARKDOWN = "# Title\n\nSome **bold** and a [link](/blog)\n\n- one\n- two"
+
+
+class TestDocCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.cache_dir = self.tmp.name
+
+    def test_encode_decode_roundtrip(self):
+        node = markdown_to_html_node(MARKDOWN)
+        self.assertEqual(decode_tree(encode_tree(node)).to_html(), node.to_html())
+
+    def test_parse_cached_stores_then_hits(self):
+        html_node, title = parse_cached(MARKDOWN, self.cache_dir)
+        self.assertEqual(title, "Title")
+        self.assertTrue(os.path.exists(entry_path(self.cache_dir, cache_key(MARKDOWN))))
+
+        # Swap the entry for something recognisable to prove it's what gets returned
+        store(self.cache_dir, cache_key(MARKDOWN), ParentNode("div", [LeafNode("p", "cached")]), "Cached")
+        cached_node, cached_title = parse_cached(MARKDOWN, self.cache_dir)
+        self.assertEqual(cached_title, "Cached")
+        self.assertEqual(cached_node.to_html(), "<div><p>cached</p></div>")
+
+    def test_corrupt_entry_is_a_miss(self):
+        key = cache_key(MARKDOWN)
+        os.makedirs(os.path.dirname(entry_path(self.cache_dir, key)))
+        with open(entry_path(self.cache_dir, key), "wb") as f:
+            f.write(b"not a cache entry")
+        self.assertIsNone(load(self.cache_dir, key))
+        html_node, title = parse_cached(MARKDOWN, self.cache_dir)
+        self.assertEqual(html_node.to_html(), markdown_to_html_node(MARKDOWN).to_html())
+
+    def test_key_depends_on_content(self):
+        self.assertNotEqual(cache_key(MARKDOWN), cache_key(MARKDOWN + "!"))
+
+    def test_no_cache_dir_just_parses(self):
+        html_node, title = parse_cached(MARKDOWN)
+        self.assertEqual(title, "Title")
+        self.assertListEqual(os.listdir(self.cache_dir), [])
+
+    def test_memory_hands_out_fresh_trees(self):
+        self.addCleanup(setattr, doc_cache, "_memory", None)
+        keep_in_memory(1)
+        html_node, _ = parse_cached(MARKDOWN)
+        html_node.children.clear()
+        # A hit, with nothing on disk: the caller's edits didn't leak into it
+        self.assertEqual(parse_cached(MARKDOWN)[0].to_html(), markdown_to_html_node(MARKDOWN).to_html())
+        self.assertListEqual(os.listdir(self.cache_dir), [])
+
+        parse_cached("# Other")
+        self.assertListEqual(list(doc_cache._memory), [cache_key("# Other")])
+
+    def test_rendering_twice_from_memory_rewrites_urls_once(self):
+        self.addCleanup(setattr, doc_cache, "_memory", None)
+        keep_in_memory(10)
+        source = os.path.join(self.tmp.name, "tom.md")
+        template = os.path.join(self.tmp.name, "template.html")
+        dest = os.path.join(self.tmp.name, "tom.html")
+        with open(source, "w") as f:
+            f.write("# Tom\n\n![Tom](/images/tom.png) and [home](/)")
+        with open(template, "w") as f:
+            f.write("{{ Content }}")
+        for _ in range(2):
+            render_page(source, template, dest, "/repo/")
+            with open(dest) as f:
+                html = f.read()
+            self.assertIn('src="/repo/images/tom.png"', html)
+            self.assertIn('href="/repo/"', html)
+
+    def test_evict_oldest_first(self):
+        paths = []
+        for i in range(3):
+            key = cache_key(f"# Page {i}")
+            parse_cached(f"# Page {i}", self.cache_dir)
+            path = entry_path(self.cache_dir, key)
+            os.utime(path, ns=(i * 1_000_000_000, i * 1_000_000_000))
+            paths.append(path)
+        size = os.path.getsize(paths[2])
+        removed = evict(self.cache_dir, max_bytes=size + os.path.getsize(paths[1]))
+        self.assertEqual(removed, 1)
+        self.assertListEqual([os.path.exists(p) for p in paths], [False, True, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
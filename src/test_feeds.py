@@ -0,0 +1,45 @@
+import os
+import tempfile
+import unittest
+from xml.dom import minidom
+
+from feeds import write_feeds, RSS_NAME, ATOM_NAME
+
+POSTS = [
+    {"url": "/blog/b/", "title": "Gandalf & the Balrog", "date": "2024-03-01", "summary": "You shall not pass", "tags": ["wizards"]},
+    {"url": "/blog/a/", "title": "Tom", "date": "2023-06-01", "summary": None, "tags": []},
+]
+
+
+class TestFeeds(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_rss_and_atom(self):
+        digests, written = write_feeds(POSTS, "https://example.com/", "Tolkien Fan Club", self.tmp.name, {})
+        self.assertEqual(len(written), 2)
+
+        rss = minidom.parse(os.path.join(self.tmp.name, RSS_NAME))
+        items = rss.getElementsByTagName("item")
+        self.assertEqual(len(items), 2)
+        self.assertEqual(items[0].getElementsByTagName("title")[0].firstChild.data, "Gandalf & the Balrog")
+        self.assertEqual(items[0].getElementsByTagName("link")[0].firstChild.data, "https://example.com/blog/b/")
+        self.assertEqual(items[0].getElementsByTagName("pubDate")[0].firstChild.data, "Fri, 01 Mar 2024 00:00:00 +0000")
+
+        atom = minidom.parse(os.path.join(self.tmp.name, ATOM_NAME))
+        self.assertEqual(atom.documentElement.getAttribute("xmlns"), "http://www.w3.org/2005/Atom")
+        self.assertEqual(atom.getElementsByTagName("updated")[0].firstChild.data, "2024-03-01T00:00:00Z")
+        self.assertEqual(len(atom.getElementsByTagName("entry")), 2)
+
+        self.assertListEqual(write_feeds(POSTS, "https://example.com/", "Tolkien Fan Club", self.tmp.name, digests)[1], [])
+
+    def test_newest_only_and_none_without_posts(self):
+        digests, _ = write_feeds(POSTS, "https://example.com/", "Site", self.tmp.name, {}, items=1)
+        rss = minidom.parse(os.path.join(self.tmp.name, RSS_NAME))
+        self.assertEqual(len(rss.getElementsByTagName("item")), 1)
+        self.assertEqual(write_feeds([], "https://example.com/", "Site", self.tmp.name, {}), ({}, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
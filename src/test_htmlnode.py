@@ -1,4 +1,5 @@
 import unittest
+from io import StringIO
 from htmlnode import HTMLNode, LeafNode, ParentNode
 
 class TestHTMLNode(unittest.TestCase):
@@ -61,3 +62,55 @@ class TestHTMLNode(unittest.TestCase):
     def test_parent_node_no_children_raises_error(self):
         with self.assertRaises(ValueError):
             ParentNode("div", []).to_html()
+
+    def test_write_html_to_list(self):
+        node = ParentNode("p", [LeafNode("b", "Bold"), LeafNode(None, " text")], {"class": "x"})
+        fragments = []
+        node.write_html(fragments)
+        self.assertListEqual(fragments, ['<p class="x">', "<b>Bold</b>", " text", "</p>"])
+
+    def test_write_html_to_file(self):
+        node = ParentNode("div", [ParentNode("p", [LeafNode("i", "hi")])])
+        out = StringIO()
+        node.write_html(out)
+        self.assertEqual(out.getvalue(), node.to_html())
+        self.assertEqual(out.getvalue(), "<div><p><i>hi</i></p></div>")
+
+    def test_iter_html_deep_nesting(self):
+        node = LeafNode(None, "deep")
+        for _ in range(5000):
+            node = ParentNode("span", [node])
+        html = node.to_html()
+        self.assertTrue(html.startswith("<span><span>"))
+        self.assertEqual(len(html), 5000 * len("<span></span>") + len("deep"))
+
+    def test_iter_html_invalid_child(self):
+        node = ParentNode("div", [ParentNode("p", [])])
+        with self.assertRaises(ValueError):
+            list(node.iter_html())
+
+    def test_minify_drops_optional_quotes_and_end_tags(self):
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("a", "home", {"href": "/blog/"}), LeafNode(None, " and more")]),
+            ParentNode("ul", [ParentNode("li", [LeafNode(None, "one")]), ParentNode("li", [LeafNode(None, "two")])]),
+            ParentNode("p", [LeafNode("img", "", {"src": "/a.png", "alt": "two words"})]),
+            ParentNode("pre", [LeafNode("code", "  x = 1\n  y = 2")]),
+            ParentNode("p", [LeafNode(None, "last")]),
+        ])
+        self.assertEqual(
+            node.to_html(minify=True),
+            '<div><p><a href=/blog/>home</a> and more<ul><li>one<li>two</ul>'
+            '<p><img src=/a.png alt="two words"><pre><code>  x = 1\n  y = 2</code></pre><p>last</div>',
+        )
+        # Unchanged without minify
+        self.assertIn('<li>one</li><li>two</li></ul><p><img src="/a.png" alt="two words"></p>', node.to_html())
+
+    def test_minify_keeps_end_tags_html_requires(self):
+        node = ParentNode("a", [ParentNode("p", [LeafNode(None, "x")])], {"href": "/"})
+        self.assertEqual(node.to_html(minify=True), "<a href=/><p>x</p></a>")
+        node = ParentNode("div", [ParentNode("p", [LeafNode(None, "x")]), LeafNode(None, "text")])
+        self.assertEqual(node.to_html(minify=True), "<div><p>x</p>text</div>")
+
+    def test_no_instance_dict(self):
+        self.assertFalse(hasattr(LeafNode("b", "x"), "__dict__"))
+        self.assertFalse(hasattr(ParentNode("p", [LeafNode("b", "x")]), "__dict__"))
@@ -0,0 +1,130 @@
+import os
+import shutil
+import struct
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from images import ImageAttributes, image_size, process_images, can_resize, IMAGE_SIZES
+from site_fixture import SiteTestCase, TempDirTestCase, read, write, write_bytes
+
+STATIC_IMAGE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "static", "images", "rivendell.png")
+
+
+def png(width, height):
+    return b"\x89PNG\r\n\x1a\n" + struct.pack(">I4sII", 13, b"IHDR", width, height) + b"\x08\x02\x00\x00\x00"
+
+
+def jpeg(width, height):
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + b"\x01\x11\x00"
+    return b"\xff\xd8" + app0 + sof + b"\xff\xd9"
+
+
+class TestImageSize(TempDirTestCase):
+    def size_of(self, name, data):
+        write_bytes(self.path(name), data)
+        return image_size(self.path(name))
+
+    def test_formats(self):
+        self.assertEqual(self.size_of("a.png", png(640, 480)), (640, 480))
+        self.assertEqual(self.size_of("a.gif", b"GIF89a" + struct.pack("<HH", 32, 16) + b"\x00" * 8), (32, 16))
+        self.assertEqual(self.size_of("a.jpg", jpeg(1024, 768)), (1024, 768))
+        vp8x = b"RIFF\x00\x00\x00\x00WEBPVP8X" + b"\x0a\x00\x00\x00" + b"\x00" * 4
+        vp8x += (299).to_bytes(3, "little") + (199).to_bytes(3, "little")
+        self.assertEqual(self.size_of("a.webp", vp8x), (300, 200))
+
+    def test_unknown_and_truncated(self):
+        self.assertIsNone(self.size_of("a.svg", b"<svg></svg>"))
+        self.assertIsNone(self.size_of("a.jpg", jpeg(10, 10)[:25]))
+
+    def test_static_image(self):
+        self.assertEqual(image_size(STATIC_IMAGE), (1344, 896))
+
+
+class TestImageAttributes(unittest.TestCase):
+    def test_adds_sizes_and_lazy_loads_all_but_first(self):
+        images = {
+            "/images/a.png": {"width": 800, "height": 600, "srcset": []},
+            "/images/b.png": {
+                "width": 1200,
+                "height": 600,
+                "srcset": [["/images/b-400w.png", 400], ["/images/b.png", 1200]],
+            },
+        }
+        node = ParentNode("div", [
+            ParentNode("p", [LeafNode("img", "", {"src": "/images/a.png", "alt": "a"})]),
+            ParentNode("p", [LeafNode("img", "", {"src": "/images/b.png", "alt": "b"})]),
+            ParentNode("p", [LeafNode("img", "", {"src": "https://example.com/c.png", "alt": "c"})]),
+        ])
+        ImageAttributes(images, "/repo/")(node)
+        self.assertEqual(
+            node.to_html(),
+            '<div><p><img src="/images/a.png" alt="a" width="800" height="600"></p>'
+            '<p><img src="/images/b.png" alt="b" width="1200" height="600" loading="lazy" '
+            f'srcset="/repo/images/b-400w.png 400w, /repo/images/b.png 1200w" sizes="{IMAGE_SIZES}"></p>'
+            '<p><img src="https://example.com/c.png" alt="c" loading="lazy"></p></div>',
+        )
+
+
+class TestProcessImages(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.static = self.path("static")
+        self.docs = self.path("docs")
+        self.state = self.path(".build", "images.json")
+        write_bytes(self.path("static", "images", "a.png"), png(640, 480))
+        write(self.path("static", "index.css"), "body {}")
+        self.pairs = [
+            (self.path("static", "images", "a.png"), self.path("docs", "images", "a.png")),
+            (self.path("static", "index.css"), self.path("docs", "index.css")),
+        ]
+
+    def test_sizes_are_keyed_by_page_url_and_cached(self):
+        result = process_images(self.pairs, self.static, self.docs, self.state)
+        self.assertDictEqual(result.images, {"/images/a.png": {"width": 640, "height": 480, "srcset": []}})
+
+        # A cached size is trusted while the file's hash is unchanged...
+        write_bytes(self.path("static", "images", "a.png"), png(640, 480))
+        self.assertEqual(process_images(self.pairs, self.static, self.docs, self.state).images, result.images)
+        # ...and read again once it isn't
+        write_bytes(self.path("static", "images", "a.png"), png(320, 240))
+        result = process_images(self.pairs, self.static, self.docs, self.state)
+        self.assertEqual(result.images["/images/a.png"]["width"], 320)
+
+    @unittest.skipUnless(can_resize(), "Pillow is not installed")
+    def test_variants(self):
+        shutil.copy(STATIC_IMAGE, self.path("static", "images", "a.png"))
+        result = process_images(self.pairs, self.static, self.docs, self.state, (400, 800, 2000))
+        variants = [self.path("docs", "images", "a-400w.png"), self.path("docs", "images", "a-800w.png")]
+        self.assertListEqual(result.generated, variants)
+        self.assertEqual(image_size(variants[0]), (400, 267))
+        self.assertListEqual(
+            result.images["/images/a.png"]["srcset"],
+            [["/images/a-400w.png", 400], ["/images/a-800w.png", 800], ["/images/a.png", 1344]],
+        )
+        self.assertListEqual(process_images(self.pairs, self.static, self.docs, self.state, (400, 800)).generated, [])
+
+        result = process_images(self.pairs, self.static, self.docs, self.state)
+        self.assertListEqual(result.removed, variants)
+        self.assertFalse(os.path.exists(variants[0]))
+
+
+class TestIncrementalImages(SiteTestCase):
+    pages = {"index.md": "# Home\n\n![A](/images/a.png)"}
+
+    def build(self):
+        return super().build(explain=True)
+
+    def test_resized_image_rerenders_pages(self):
+        write_bytes(self.path("static", "images", "a.png"), png(640, 480))
+        self.build()
+        self.assertIn('<img src="/images/a.png" alt="A" width="640" height="480">', read(self.path("docs", "index.html")))
+        self.assertIn("0 pages rendered", self.build())
+
+        write_bytes(self.path("static", "images", "a.png"), png(320, 240))
+        self.assertIn("image sizes changed", self.build())
+        self.assertIn('width="320" height="240"', read(self.path("docs", "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
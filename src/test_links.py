@@ -0,0 +1,88 @@
+import os
+import unittest
+
+from links import (
+    extract_links,
+    is_internal,
+    page_url,
+    resolve,
+    new_link_index,
+    index_page,
+    check_links,
+    inbound_links,
+    load_link_index,
+)
+from markdown_helpers import markdown_to_html_node
+from site_fixture import SiteTestCase, write
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestLinks(unittest.TestCase):
+    def test_extract_links(self):
+        node = markdown_to_html_node(
+            "# Title\n\n[a](/a) and **[b](/b)**\n\n- [a again](/a)\n- ![img](/i.png)"
+        )
+        self.assertListEqual(extract_links(node), ["/a", "/b"])
+
+    def test_is_internal(self):
+        self.assertTrue(is_internal("/blog/"))
+        self.assertTrue(is_internal("../about.html#team"))
+        self.assertFalse(is_internal("https://example.com/"))
+        self.assertFalse(is_internal("//cdn.example.com/x.js"))
+        self.assertFalse(is_internal("mailto:me@example.com"))
+        self.assertFalse(is_internal("#top"))
+
+    def test_page_url(self):
+        self.assertEqual(page_url("docs/index.html", "docs"), "/")
+        self.assertEqual(page_url("docs/blog/tom/index.html", "docs"), "/blog/tom/")
+        self.assertEqual(page_url("docs/about.html", "docs"), "/about.html")
+
+    def test_resolve(self):
+        outputs = {"index.html", "blog/tom/index.html", "about.html", "index.css"}
+        self.assertEqual(resolve("/", "/blog/tom/", outputs), "index.html")
+        self.assertEqual(resolve("/blog/tom", "/", outputs), "blog/tom/index.html")
+        self.assertEqual(resolve("../../about", "/blog/tom/", outputs), "about.html")
+        self.assertEqual(resolve("/index.css?v=1", "/", outputs), "index.css")
+        self.assertIsNone(resolve("/blog/missing/", "/", outputs))
+
+    def test_check_links(self):
+        index = new_link_index()
+        index_page(index, "content/index.md", "docs/index.html", "docs", ["/a", "/missing", "https://x.org/"])
+        index_page(index, "content/a.md", "docs/a.html", "docs", ["/", "/a"])
+        index_page(index, "content/b.md", "docs/b.html", "docs", [])
+        outputs = {"index.html", "a.html", "b.html"}
+
+        broken, orphans = check_links(index, outputs)
+        self.assertListEqual(broken, [("content/index.md", "/missing")])
+        # A page linking to itself doesn't keep it from being an orphan
+        self.assertListEqual(orphans, ["content/b.md"])
+        self.assertListEqual(inbound_links(index, "/a"), ["content/a.md", "content/index.md"])
+
+
+class TestIncrementalLinks(SiteTestCase):
+    template = TEMPLATE
+    pages = {"index.md": "# Home\n\n[Post](/blog/post)", "blog/post.md": "# Post\n\n[Home](/)"}
+
+    def test_reports_broken_links_from_unchanged_pages(self):
+        out = self.build()
+        self.assertNotIn("Broken link", out)
+        self.assertNotIn("Orphan page", out)
+
+        # index.md isn't re-rendered, but its link to the removed post breaks
+        os.remove(self.path("content", "blog", "post.md"))
+        out = self.build()
+        self.assertIn("0 pages rendered", out)
+        self.assertIn(f"Broken link in {self.path('content', 'index.md')}: /blog/post", out)
+
+        index = load_link_index(self.path(".build", "links.json"))
+        self.assertListEqual(list(index["pages"]), [self.path("content", "index.md")])
+
+    def test_missing_index_renders_pages_again(self):
+        self.build()
+        os.remove(self.path(".build", "links.json"))
+        self.assertIn("2 pages rendered", self.build())
+
+
+if __name__ == "__main__":
+    unittest.main()
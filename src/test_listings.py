@@ -0,0 +1,113 @@
+import os
+import unittest
+
+from listings import plan_listings, listing_node, listing_dest
+from site_fixture import SiteTestCase, read, write
+
+
+def post(url, date, tags=(), summary=None, draft=False):
+    title = url.strip("/").split("/")[-1]
+    return {"url": url, "title": title, "date": date, "tags": list(tags), "summary": summary, "draft": draft}
+
+
+def post_page(title, date, tags, summary="", body="Text"):
+    return f"---\ndate: {date}\ntags: [{', '.join(tags)}]\nsummary: {summary}\n---\n# {title}\n\n{body}\n"
+
+
+class TestPlanListings(unittest.TestCase):
+    def test_no_posts_no_listings(self):
+        index = {"pages": {"content/index.md": {"url": "/", "title": "Home", "date": None}}}
+        self.assertListEqual(plan_listings(index), [])
+
+    def test_blog_tags_and_archive(self):
+        index = {"pages": {
+            "a.md": post("/blog/a/", "2023-05-01", ["elves"]),
+            "b.md": post("/blog/b/", "2024-01-01", ["elves", "Hobbits"]),
+            "c.md": post("/blog/c/", "2024-02-01"),
+            "d.md": post("/blog/d/", "2024-03-01", ["elves"], draft=True),
+            "index.md": {"url": "/", "title": "Home", "date": None},
+        }}
+        listings = {listing["url"]: listing for listing in plan_listings(index, per_page=2)}
+        self.assertListEqual(list(listings), [
+            "/blog/", "/blog/page/2/",
+            "/tags/elves/", "/tags/hobbits/", "/tags/",
+            "/archive/2024/", "/archive/2023/", "/archive/",
+        ])
+        self.assertListEqual([p["url"] for p in listings["/blog/"]["posts"]], ["/blog/c/", "/blog/b/"])
+        self.assertEqual(listings["/blog/"]["older"], "/blog/page/2/")
+        self.assertEqual(listings["/blog/page/2/"]["newer"], "/blog/")
+        self.assertListEqual([p["url"] for p in listings["/tags/elves/"]["posts"]], ["/blog/b/", "/blog/a/"])
+        self.assertListEqual(listings["/tags/"]["links"], [["/tags/elves/", "elves (2)"], ["/tags/hobbits/", "Hobbits (1)"]])
+        self.assertListEqual(listings["/archive/"]["links"], [["/archive/2024/", "2024 (2)"], ["/archive/2023/", "2023 (1)"]])
+
+        with_drafts = plan_listings(index, drafts=True, per_page=2)
+        self.assertEqual(with_drafts[0]["posts"][0]["url"], "/blog/d/")
+
+    def test_listing_node(self):
+        index = {"pages": {"a.md": post("/blog/a/", "2024-01-01", ["elves"], summary="A *short* one")}}
+        self.assertEqual(
+            listing_node(plan_listings(index)[0]).to_html(),
+            '<div><h1>Blog</h1><ul class="posts"><li><h2><a href="/blog/a/">a</a></h2>'
+            '<time datetime="2024-01-01">2024-01-01</time><p>A <i>short</i> one</p>'
+            '<nav class="tags"><a href="/tags/elves/">elves</a></nav></li></ul>'
+            '<nav><a href="/tags/">Tags</a> <a href="/archive/">Archive</a></nav></div>',
+        )
+
+    def test_listing_dest(self):
+        self.assertEqual(listing_dest("/blog/page/2/", "docs"), os.path.join("docs", "blog", "page", "2", "index.html"))
+
+
+class TestIncrementalListings(SiteTestCase):
+    pages = {
+        "index.md": "# Home\n\n[Blog](/blog/)",
+        "posts/tom.md": post_page("Tom", "2023-06-01", ["hobbits"], "Old Tom"),
+        "posts/elves.md": post_page("Elves", "2024-01-01", ["elves"], "Fair folk"),
+    }
+
+    def build(self, drafts=False):
+        return super().build(explain=True, drafts=drafts)
+
+    def test_only_listings_showing_a_changed_post_rerender(self):
+        out = self.build()
+        self.assertIn("7 listings rendered", out)
+        self.assertNotIn("Orphan page", out)
+        blog = read(self.path("docs", "blog", "index.html"))
+        self.assertLess(blog.index("/posts/elves"), blog.index("/posts/tom"))
+        self.assertNotIn("# Elves", read(self.path("docs", "posts", "elves.html")))
+        self.assertIn("0 listings rendered", self.build())
+
+        # The body isn't shown on any listing
+        write(self.path("content", "posts", "tom.md"), post_page("Tom", "2023-06-01", ["hobbits"], "Old Tom", "More"))
+        out = self.build()
+        self.assertIn("1 pages rendered", out)
+        self.assertIn("0 listings rendered", out)
+
+        write(self.path("content", "posts", "tom.md"), post_page("Tom", "2023-06-01", ["hobbits"], "Merry dol"))
+        out = self.build()
+        self.assertIn("Rebuilding listing /blog/: listed posts changed", out)
+        self.assertIn("Rebuilding listing /tags/hobbits/: listed posts changed", out)
+        self.assertIn("Rebuilding listing /archive/2023/: listed posts changed", out)
+        self.assertIn("3 listings rendered", out)
+        self.assertIn("Merry dol", read(self.path("docs", "blog", "index.html")))
+
+    def test_drafts_are_skipped_and_removed(self):
+        self.build()
+        write(self.path("content", "posts", "tom.md"), "---\ndraft: true\n" + post_page("Tom", "2023-06-01", [])[4:])
+        out = self.build()
+        self.assertFalse(os.path.exists(self.path("docs", "posts", "tom.html")))
+        self.assertFalse(os.path.exists(self.path("docs", "archive", "2023", "index.html")))
+        self.assertNotIn("/posts/tom", read(self.path("docs", "blog", "index.html")))
+        self.assertIn("Removing stale output", out)
+
+        self.build(drafts=True)
+        self.assertTrue(os.path.exists(self.path("docs", "posts", "tom.html")))
+        self.assertIn("/posts/tom", read(self.path("docs", "blog", "index.html")))
+
+    def test_listing_may_not_overwrite_a_page(self):
+        write(self.path("content", "blog", "index.md"), "# Blog")
+        with self.assertRaises(ValueError):
+            self.build()
+
+
+if __name__ == "__main__":
+    unittest.main()
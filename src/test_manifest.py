@@ -0,0 +1,107 @@
+import os
+import unittest
+
+from manifest import load_manifest, save_manifest, new_manifest, file_entry, stale_outputs
+from site_fixture import SiteTestCase, TempDirTestCase, read, write
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestManifest(TempDirTestCase):
+    def test_load_missing_manifest(self):
+        self.assertEqual(load_manifest(self.path("nope.json")), new_manifest())
+
+    def test_load_corrupt_manifest(self):
+        write(self.path("bad.json"), "{not json")
+        self.assertEqual(load_manifest(self.path("bad.json")), new_manifest())
+
+    def test_save_and_load_roundtrip(self):
+        manifest = new_manifest()
+        manifest["basepath"] = "/repo/"
+        save_manifest(self.path(".build", "manifest.json"), manifest)
+        self.assertEqual(load_manifest(self.path(".build", "manifest.json")), manifest)
+
+    def test_file_entry_reuses_hash_when_stat_matches(self):
+        write(self.path("a.md"), "# A")
+        entry = file_entry(self.path("a.md"), "out")
+        previous = dict(entry, hash="cached")
+        self.assertEqual(file_entry(self.path("a.md"), "out", previous)["hash"], "cached")
+
+    def test_stale_outputs(self):
+        old = new_manifest()
+        old["pages"] = {"a.md": {"dest": "a.html"}, "b.md": {"dest": "b.html"}}
+        new = new_manifest()
+        new["pages"] = {"a.md": {"dest": "a.html"}}
+        self.assertListEqual(stale_outputs(old, new), ["b.html"])
+
+        # Same source, new output name
+        new["static"] = {"index.css": {"dest": "index.2b3c.css"}}
+        old["static"] = {"index.css": {"dest": "index.1a2b.css"}}
+        self.assertListEqual(stale_outputs(old, new), ["b.html", "index.1a2b.css"])
+
+
+class TestIncrementalBuild(SiteTestCase):
+    template = TEMPLATE
+    pages = {"index.md": "# Home", "blog/post.md": "# Post"}
+
+    def test_incremental_build_skips_unchanged(self):
+        out = self.build()
+        self.assertIn("2 pages rendered, 1 files copied", out)
+        self.assertTrue(os.path.exists(self.path("docs", "blog", "post.html")))
+
+        out = self.build()
+        self.assertIn("0 pages rendered, 0 files copied", out)
+
+        write(self.path("content", "index.md"), "# Home again")
+        out = self.build()
+        self.assertIn("1 pages rendered, 0 files copied", out)
+
+    def test_template_or_basepath_change_renders_all_pages(self):
+        self.build()
+
+        out = self.build(basepath="/repo/")
+        self.assertIn("2 pages rendered, 0 files copied", out)
+
+        write(self.path("template.html"), TEMPLATE + "<footer></footer>")
+        out = self.build(basepath="/repo/")
+        self.assertIn("2 pages rendered, 0 files copied", out)
+
+    def test_partial_or_data_change_renders_dependent_pages(self):
+        write(self.path("template.html"), "{{> partials/head.html }}{{ Content }}")
+        write(self.path("partials", "head.html"), "<title>{{ data.site.name }}: {{ Title }}</title>")
+        write(self.path("data", "site.json"), '{"name": "Site"}')
+        self.build()
+
+        write(self.path("partials", "unused.html"), "nothing includes this")
+        self.assertIn("0 pages rendered", self.build())
+
+        write(self.path("data", "site.json"), '{"name": "Renamed"}')
+        out = self.build(explain=True)
+        self.assertIn(f"Rebuilding {self.path('content', 'index.md')}: {self.path('data', 'site.json')} changed", out)
+        self.assertIn("2 pages rendered, 0 files copied", out)
+        self.assertTrue(read(self.path("docs", "index.html")).startswith("<title>Renamed: Home</title>"))
+
+    def test_removed_source_deletes_output(self):
+        self.build()
+
+        os.remove(self.path("content", "blog", "post.md"))
+        out = self.build()
+        self.assertIn("1 outputs removed", out)
+        self.assertFalse(os.path.exists(self.path("docs", "blog")))
+        self.assertTrue(os.path.exists(self.path("docs", "index.html")))
+
+    def test_without_a_manifest_unwritten_outputs_are_removed(self):
+        # As after a full build, which leaves no manifest behind
+        self.build()
+        os.remove(self.path(".build", "manifest.json"))
+
+        os.remove(self.path("content", "blog", "post.md"))
+        out = self.build()
+        self.assertIn("1 outputs removed", out)
+        self.assertFalse(os.path.exists(self.path("docs", "blog")))
+        self.assertTrue(os.path.exists(self.path("docs", "index.html")))
+        self.assertTrue(os.path.exists(self.path("docs", "index.css")))
+
+
+if __name__ == "__main__":
+    unittest.main()
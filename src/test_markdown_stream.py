@@ -0,0 +1,62 @@
+import io
+import os
+import tempfile
+import unittest
+
+from markdown_helpers import (
+    markdown_to_blocks,
+    iter_markdown_blocks,
+    markdown_to_html_node,
+    MarkdownStream,
+)
+from main import render_page, render_page_streaming
+
+DOCUMENTS = [
+    "# Title\n\nA paragraph\nover two lines.\n\n- one\n- two",
+    "  This is a paragraph.  \n\n  \n\nThis is another paragraph.",
+    "Intro first\n\n\n\n## Sub\n\n# Late title\n\n1. a\n2. b\n\n> quote\n> more\n",
+    "# T\n\n```\ncode here\n```\n\ntext with ![img](/i.png) and [link](/x)",
+]
+
+
+class TestMarkdownStream(unittest.TestCase):
+    def test_blocks_match_markdown_to_blocks(self):
+        for doc in DOCUMENTS:
+            lines = io.StringIO(doc)
+            self.assertListEqual(list(iter_markdown_blocks(lines)), markdown_to_blocks(doc))
+
+    def test_stream_matches_markdown_to_html_node(self):
+        for doc in DOCUMENTS[:1] + DOCUMENTS[2:]:
+            stream = MarkdownStream(io.StringIO(doc))
+            stream.find_title()
+            out = []
+            stream.write_html(out)
+            self.assertEqual("".join(out), markdown_to_html_node(doc).to_html())
+
+    def test_title_found_without_reading_everything(self):
+        stream = MarkdownStream(io.StringIO("# Title\n\n" + "para\n\n" * 1000))
+        self.assertEqual(stream.find_title(), "Title")
+        self.assertEqual(len(stream.buffered), 1)
+
+    def test_missing_title(self):
+        stream = MarkdownStream(io.StringIO("no title\n\nanywhere"))
+        with self.assertRaises(Exception):
+            stream.find_title()
+
+    def test_streaming_render_matches_render_page(self):
+        with tempfile.TemporaryDirectory() as root:
+            template = os.path.join(root, "template.html")
+            with open(template, "w") as f:
+                f.write('<link href="/index.css"><title>{{ Title }}</title>{{ Content }}')
+            source = os.path.join(root, "page.md")
+            with open(source, "w") as f:
+                f.write(DOCUMENTS[3])
+
+            render_page(source, template, os.path.join(root, "a.html"), "/repo/")
+            render_page_streaming(source, template, os.path.join(root, "b.html"), "/repo/")
+            with open(os.path.join(root, "a.html")) as a, open(os.path.join(root, "b.html")) as b:
+                self.assertEqual(a.read(), b.read())
+
+
+if __name__ == "__main__":
+    unittest.main()
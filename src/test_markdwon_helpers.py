@@ -1,4 +1,5 @@
 import unittest
+import markdown_helpers
 from markdown_helpers import (
     extract_markdown_images, 
     extract_markdown_links, 
@@ -9,7 +10,9 @@ from markdown_helpers import (
     markdown_to_html_node,
     extract_title,
     split_nodes_delimiter,
-    text_to_textnodes
+    text_to_textnodes,
+    register_block_handler,
+    register_block_classifier,
 )
 from textnode import TextNode, TextType
 from block_type import BlockType
@@ -232,3 +235,34 @@ This is a paragraph.
         """
         with self.assertRaises(Exception):
             extract_title(markdown)
+
+    def test_block_to_block_type_single_line_quote_is_paragraph(self):
+        self.assertEqual(block_to_block_type("> just one line"), BlockType.PARAGRAPH)
+
+    def test_block_to_block_type_heading_needs_space_on_first_line(self):
+        self.assertEqual(block_to_block_type("#\nnot a heading"), BlockType.PARAGRAPH)
+
+    def test_block_to_block_type_mixed_list_is_paragraph(self):
+        self.assertEqual(block_to_block_type("- one\n2. two"), BlockType.PARAGRAPH)
+
+
+class TestBlockRegistry(unittest.TestCase):
+    def setUp(self):
+        self.handlers = dict(markdown_helpers.BLOCK_HANDLERS)
+        self.classifiers = list(markdown_helpers.BLOCK_CLASSIFIERS)
+
+    def tearDown(self):
+        markdown_helpers.BLOCK_HANDLERS.clear()
+        markdown_helpers.BLOCK_HANDLERS.update(self.handlers)
+        markdown_helpers.BLOCK_CLASSIFIERS[:] = self.classifiers
+
+    def test_register_block_handler_overrides_builtin(self):
+        register_block_handler(BlockType.QUOTE, lambda block: LeafNode("aside", block))
+        html = markdown_to_html_node("> a\n> b").to_html()
+        self.assertEqual(html, "<div><aside>> a\n> b</aside></div>")
+
+    def test_register_new_block_type(self):
+        register_block_classifier(lambda block: "rule" if block == "---" else None)
+        register_block_handler("rule", lambda block: LeafNode("hr", ""))
+        html = markdown_to_html_node("# Title\n\n---").to_html()
+        self.assertEqual(html, "<div><h1>Title</h1><hr></hr></div>")
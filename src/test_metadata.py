@@ -0,0 +1,108 @@
+import os
+import tempfile
+import unittest
+
+from manifest import file_entry
+from metadata import (
+    parse_front_matter,
+    split_front_matter,
+    read_front_matter,
+    scan_page,
+    new_metadata_index,
+    page_metadata,
+)
+from site_fixture import write
+
+PAGE = """---
+date: 2024-03-01
+tags: [elves, "Gondolin"]
+summary: Balrog-slayer, returned from the Halls of Mandos
+draft: yes
+---
+# Why Glorfindel is More Impressive than Legolas
+
+Text
+"""
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_parse_front_matter(self):
+        fields = parse_front_matter([
+            "date: 2024-03-01",
+            "tags: elves, gondolin",
+            "# a comment",
+            "",
+            "title: 'Glorfindel: a study'",
+            "draft: false",
+        ])
+        self.assertDictEqual(fields, {
+            "date": "2024-03-01",
+            "tags": ["elves", "gondolin"],
+            "title": "Glorfindel: a study",
+            "draft": False,
+        })
+
+    def test_bad_values(self):
+        with self.assertRaises(ValueError):
+            parse_front_matter(["date: March 1st"])
+        with self.assertRaises(ValueError):
+            parse_front_matter(["draft: maybe"])
+        with self.assertRaises(ValueError):
+            parse_front_matter(["just some text"])
+
+    def test_split_front_matter(self):
+        fields, body = split_front_matter(PAGE)
+        self.assertEqual(fields["tags"], ["elves", "Gondolin"])
+        self.assertTrue(fields["draft"])
+        self.assertTrue(body.startswith("# Why Glorfindel"))
+
+        text = "# Title\n\n---\n\nAfter a rule"
+        self.assertEqual(split_front_matter(text), ({}, text))
+        # No closing fence: it's a thematic break, not front matter
+        text = "---\nfoo: bar\n# Title"
+        self.assertEqual(split_front_matter(text), ({}, text))
+
+    def test_read_front_matter_leaves_the_rest_streaming(self):
+        fields, lines = read_front_matter(iter(PAGE.splitlines(keepends=True)))
+        self.assertEqual(fields["date"], "2024-03-01")
+        self.assertEqual(next(lines), "# Why Glorfindel is More Impressive than Legolas\n")
+
+        fields, lines = read_front_matter(iter(["# Title\n", "Text\n"]))
+        self.assertEqual(fields, {})
+        self.assertListEqual(list(lines), ["# Title\n", "Text\n"])
+
+
+class TestMetadataIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "content", "blog", "glorfindel.md")
+        write(self.path, PAGE)
+
+    def test_scan_page(self):
+        self.assertDictEqual(scan_page(self.path), {
+            "title": "Why Glorfindel is More Impressive than Legolas",
+            "date": "2024-03-01",
+            "tags": ["elves", "Gondolin"],
+            "summary": "Balrog-slayer, returned from the Halls of Mandos",
+            "draft": True,
+        })
+
+    def test_page_metadata_rescans_only_changed_pages(self):
+        index = new_metadata_index()
+        entry = file_entry(self.path, None)
+        meta = page_metadata(index, self.path, entry, "/blog/glorfindel")
+        self.assertEqual(meta["url"], "/blog/glorfindel")
+
+        # An unchanged hash trusts what's indexed
+        index["pages"][self.path]["summary"] = "cached"
+        self.assertEqual(page_metadata(index, self.path, entry, "/blog/glorfindel")["summary"], "cached")
+
+        write(self.path, PAGE.replace("draft: yes", "draft: no"))
+        meta = page_metadata(index, self.path, file_entry(self.path, None), "/blog/glorfindel")
+        self.assertFalse(meta["draft"])
+        self.assertEqual(meta["summary"], "Balrog-slayer, returned from the Halls of Mandos")
+
+
+if __name__ == "__main__":
+    unittest.main()
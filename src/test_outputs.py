@@ -0,0 +1,89 @@
+import json
+import os
+import unittest
+
+from outputs import write_output, open_output, diff_outputs, record_changes, load_json, save_json
+from site_fixture import SiteTestCase, TempDirTestCase, read, write
+
+
+class TestWriteOutput(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.page = self.path("blog", "index.html")
+
+    def test_same_bytes_are_not_rewritten(self):
+        self.assertTrue(write_output(self.page, ["<p>", "Frodo", "</p>"]))
+        os.utime(self.page, ns=(0, 0))
+        self.assertFalse(write_output(self.page, ["<p>Frodo</p>"]))
+        self.assertEqual(os.stat(self.page).st_mtime_ns, 0)
+
+        # Same size, different bytes
+        self.assertTrue(write_output(self.page, ["<p>Bilbo</p>"]))
+        self.assertEqual(read(self.page), "<p>Bilbo</p>")
+        self.assertListEqual(os.listdir(os.path.dirname(self.page)), ["index.html"])
+
+    def test_open_output(self):
+        with open_output(self.page) as f:
+            f.write("Éowyn")
+        os.utime(self.page, ns=(0, 0))
+        with open_output(self.page) as f:
+            f.write("Éowyn")
+        self.assertEqual(os.stat(self.page).st_mtime_ns, 0)
+
+        with self.assertRaises(ValueError):
+            with open_output(self.page) as f:
+                f.write("half")
+                raise ValueError("render failed")
+        self.assertEqual(read(self.page), "Éowyn")
+        self.assertListEqual(os.listdir(os.path.dirname(self.page)), ["index.html"])
+
+    def test_json_state(self):
+        state_path = self.path(".build", "state.json")
+        self.assertDictEqual(load_json(state_path), {})
+        save_json(state_path, {"version": 2, "pages": {"a": 1}})
+        self.assertDictEqual(load_json(state_path, version=2), {"version": 2, "pages": {"a": 1}})
+        # Outdated or corrupt state starts over
+        self.assertDictEqual(load_json(state_path, lambda: {"version": 3}, 3), {"version": 3})
+        write(state_path, '{"version": 2,')
+        self.assertDictEqual(load_json(state_path), {})
+
+
+class TestChanges(SiteTestCase):
+    pages = {"index.md": "# Home\n\n[Tom](/tom)", "tom.md": "# Tom\n\nBombadil"}
+
+    def build(self):
+        super().build(compress=False)
+        return json.loads(read(self.path(".build", "changes.json")))
+
+    def test_diff_outputs(self):
+        changes = diff_outputs({"a": [1, 1], "b": [1, 1], "c": [1, 1]}, {"a": [1, 1], "b": [2, 1], "d": [1, 1]})
+        self.assertDictEqual(changes, {"added": ["d"], "changed": ["b"], "deleted": ["c"]})
+
+    def test_build_lists_changed_outputs(self):
+        changes = self.build()
+        self.assertListEqual(changes["added"][:3], ["index.css", "index.html", "search/bo.json"])
+        self.assertListEqual(changes["changed"] + changes["deleted"], [])
+
+        # Re-rendered with the same result: nothing to deploy
+        write(self.path("content", "tom.md"), "# Tom\n\nBombadil\n")
+        changes = self.build()
+        self.assertListEqual(changes["added"] + changes["changed"] + changes["deleted"], [])
+
+        write(self.path("content", "tom.md"), "# Tom\n\nGoldberry")
+        os.remove(self.path("content", "index.md"))
+        changes = self.build()
+        self.assertEqual(changes["dest"], self.path("docs"))
+        self.assertListEqual(changes["added"], ["search/go.json"])
+        self.assertListEqual(changes["changed"], ["search/documents-0.json", "search/to.json", "tom.html"])
+        self.assertListEqual(changes["deleted"], ["index.html", "search/bo.json", "search/ho.json"])
+
+    def test_edits_between_builds_count(self):
+        self.build()
+        docs = self.path("docs")
+        write(os.path.join(docs, "extra.txt"), "left by hand")
+        changes = record_changes(docs, self.path(".build"))
+        self.assertListEqual(changes["added"], ["extra.txt"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import os
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout, redirect_stderr
+from io import StringIO
+
+from parallel import map_batched, map_bounded, batched
+from main import generate_pages, collect_pages, BuildError
+
+
+def square(n):
+    return n * n
+
+
+def fail_on_three(n):
+    if n == 3:
+        raise ValueError("three is right out")
+    return n
+
+
+class TestParallel(unittest.TestCase):
+    def test_batched(self):
+        self.assertListEqual(list(batched([1, 2, 3, 4, 5], 2)), [[1, 2], [3, 4], [5]])
+
+    def test_map_batched_in_process(self):
+        results = map_batched(square, [(n,) for n in range(5)])
+        self.assertListEqual(results, [(n * n, None) for n in range(5)])
+
+    def test_map_batched_keeps_order_across_workers(self):
+        items = [(n,) for n in range(50)]
+        results = map_batched(square, items, jobs=3, batch_size=4)
+        self.assertListEqual(results, [(n * n, None) for n in range(50)])
+
+    def test_map_batched_reports_errors_per_item(self):
+        results = map_batched(fail_on_three, [(n,) for n in range(5)], jobs=2, batch_size=2)
+        self.assertEqual(results[2], (2, None))
+        self.assertEqual(results[3], (None, "ValueError: three is right out"))
+        self.assertEqual(results[4], (4, None))
+
+    def test_map_bounded_takes_items_lazily(self):
+        taken = []
+
+        def items():
+            for n in range(20):
+                taken.append(n)
+                yield n
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            results = map_bounded(executor, square, items(), max_pending=3)
+            self.assertEqual(next(results), 0)
+            # The first result only needed the first four items
+            self.assertEqual(len(taken), 4)
+            self.assertListEqual(list(results), [n * n for n in range(1, 20)])
+
+
+class TestGeneratePages(unittest.TestCase):
+    def test_parallel_build_matches_serial_and_reports_in_order(self):
+        with tempfile.TemporaryDirectory() as root:
+            template = os.path.join(root, "template.html")
+            with open(template, "w") as f:
+                f.write("<title>{{ Title }}</title>{{ Content }}")
+            for i in range(12):
+                page_dir = os.path.join(root, "content", f"p{i:02}")
+                os.makedirs(page_dir)
+                with open(os.path.join(page_dir, "index.md"), "w") as f:
+                    f.write(f"# Page {i}\n\nSome **bold** text")
+            # This one has no h1, so extract_title raises
+            with open(os.path.join(root, "content", "p05", "index.md"), "w") as f:
+                f.write("no title here")
+
+            outputs = {}
+            for jobs in (1, 4):
+                dest = os.path.join(root, f"docs{jobs}")
+                pages = collect_pages(os.path.join(root, "content"), dest)
+                with redirect_stdout(StringIO()) as out, redirect_stderr(StringIO()) as err:
+                    with self.assertRaises(BuildError) as ctx:
+                        generate_pages(pages, template, "/", jobs)
+                self.assertEqual(len(ctx.exception.failures), 1)
+                self.assertIn("p05", err.getvalue())
+                outputs[jobs] = out.getvalue().replace(dest, "docs")
+
+                with open(os.path.join(dest, "p11", "index.html")) as f:
+                    self.assertEqual(f.read(), "<title>Page 11</title><div><h1 id=\"page-11\">Page 11</h1><p>Some <b>bold</b> text</p></div>")
+
+            self.assertEqual(outputs[1], outputs[4])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+import unittest
+
+import profiling
+from profiling import stage, summarize, chrome_trace, NULL_STAGE
+
+
+class TestProfiling(unittest.TestCase):
+    def tearDown(self):
+        profiling.disable()
+
+    def test_disabled_records_nothing(self):
+        self.assertIs(stage("parse", "a.md"), NULL_STAGE)
+        with stage("parse", "a.md"):
+            pass
+        self.assertListEqual(profiling.drain(), [])
+
+    def test_enabled_records_spans(self):
+        profiling.enable()
+        with stage("parse", "a.md"):
+            pass
+        with stage("build"):
+            pass
+        spans = profiling.drain()
+        self.assertListEqual([(s[0], s[1]) for s in spans], [("parse", "a.md"), ("build", None)])
+        self.assertListEqual(profiling.drain(), [])
+
+    def test_drain_since_mark(self):
+        profiling.enable()
+        with stage("walk"):
+            pass
+        since = profiling.mark()
+        with stage("parse", "a.md"):
+            pass
+        self.assertListEqual([s[0] for s in profiling.drain(since)], ["parse"])
+        self.assertListEqual([s[0] for s in profiling.drain()], ["walk"])
+
+    def test_summarize(self):
+        ms = 1_000_000
+        spans = [
+            ("parse", "a.md", 0, 3 * ms, 2 * ms, 1),
+            ("write", "a.md", 0, 1 * ms, 1 * ms, 1),
+            ("parse", "b.md", 0, 1 * ms, 1 * ms, 1),
+            ("build", None, 0, 10 * ms, 5 * ms, 1),
+        ]
+        summary = summarize(spans, top=1)
+        self.assertEqual(summary["stages"]["parse"]["count"], 2)
+        self.assertAlmostEqual(summary["stages"]["parse"]["wall_s"], 0.004)
+        self.assertEqual(summary["pages"], 2)
+        self.assertEqual(len(summary["slowest_pages"]), 1)
+        self.assertEqual(summary["slowest_pages"][0]["page"], "a.md")
+        self.assertAlmostEqual(summary["slowest_pages"][0]["wall_s"], 0.004)
+
+    def test_chrome_trace(self):
+        trace = chrome_trace([("parse", "a.md", 5000, 2000, 1000, 7)])
+        self.assertEqual(
+            trace["traceEvents"][0],
+            {"name": "parse", "ph": "X", "ts": 5.0, "dur": 2.0, "pid": 7, "tid": 7, "args": {"cpu_us": 1.0, "page": "a.md"}},
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
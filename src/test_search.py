@@ -0,0 +1,103 @@
+import os
+import tempfile
+import unittest
+
+from markdown_helpers import markdown_to_html_node
+from search import (
+    collect_sections,
+    tokenize,
+    new_search_index,
+    index_sections,
+    build_shards,
+    write_search_files,
+    search,
+)
+from site_fixture import SiteTestCase, write
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestSearch(unittest.TestCase):
+    def test_tokenize(self):
+        self.assertListEqual(tokenize("The Ring-bearer, a hobbit of 33"), ["the", "ring", "bearer", "hobbit", "of", "33"])
+
+    def test_collect_sections_adds_heading_ids(self):
+        node = markdown_to_html_node("Intro text\n\n# Tolkien\n\nThe **Professor**\n\n## Notes\n\n## Notes\n\n![a hobbit](/h.png)")
+        sections = collect_sections(node)
+        self.assertListEqual(sections, [
+            ["", None, {"intro": 1, "text": 1}],
+            ["tolkien", "Tolkien", {"tolkien": 1, "the": 1, "professor": 1}],
+            ["notes", "Notes", {"notes": 1}],
+            ["notes-1", "Notes", {"notes": 1, "hobbit": 1}],
+        ])
+        self.assertEqual(node.children[1].to_html(), '<h1 id="tolkien">Tolkien</h1>')
+
+    def test_section_ids_stay_stable(self):
+        index = new_search_index()
+        index_sections(index, "a.md", "/a/", "A", [["", None, {"one": 1}]])
+        index_sections(index, "b.md", "/b/", "B", [["", None, {"two": 1}], ["x", "X", {"two": 2}]])
+        index_sections(index, "a.md", "/a/", "A", [["", None, {"one": 1}], ["y", "Y", {"one": 3}]])
+
+        documents, shards = build_shards(index)
+        self.assertDictEqual(documents, {0: ["/a/", "A"], 3: ["/a/#y", "Y"], 1: ["/b/", "B"], 2: ["/b/#x", "X"]})
+        self.assertDictEqual(shards["tw"], {"two": [[1, 1], [2, 2]]})
+
+    def test_write_and_search(self):
+        index = new_search_index()
+        index_sections(index, "a.md", "/a/", "A", [["", None, {"ring": 1, "hobbit": 2}]])
+        index_sections(index, "b.md", "/b/", "B", [["", None, {"hobbit": 1}]])
+        with tempfile.TemporaryDirectory() as dest:
+            outputs, written = write_search_files(index, dest)
+            self.assertListEqual(written, outputs)
+            self.assertListEqual(
+                sorted(os.listdir(os.path.join(dest, "search"))),
+                ["documents-0.json", "ho.json", "ri.json"],
+            )
+            self.assertListEqual(search(dest, "Hobbit"), [("/a/", "A", 2), ("/b/", "B", 1)])
+            self.assertListEqual(search(dest, "ring hobbit"), [("/a/", "A", 3)])
+            self.assertListEqual(search(dest, "dragon"), [])
+
+            # Only the shards touched by the change are rewritten; shards
+            # nothing uses any more are removed
+            index_sections(index, "b.md", "/b/", "B", [["", None, {"hobbit": 1, "elf": 1}]])
+            del index["pages"]["a.md"]
+            outputs, written = write_search_files(index, dest)
+            self.assertListEqual(
+                [os.path.basename(path) for path in written],
+                ["documents-0.json", "el.json", "ho.json"],
+            )
+            self.assertNotIn("ri.json", os.listdir(os.path.join(dest, "search")))
+
+
+class TestIncrementalSearch(SiteTestCase):
+    template = TEMPLATE
+    pages = {
+        "index.md": "# Home\n\nWelcome, [hobbits](/blog/post)",
+        "blog/post.md": "# Post\n\n## Second breakfast\n\nEvery hobbit eats it",
+    }
+
+    def test_index_follows_edits(self):
+        self.build()
+        docs = self.path("docs")
+        self.assertListEqual(search(docs, "hobbit"), [("/blog/post.html#second-breakfast", "Second breakfast", 1)])
+
+        write(self.path("content", "blog", "post.md"), "# Post\n\nNo more breakfasts")
+        out = self.build()
+        self.assertIn("1 pages rendered", out)
+        self.assertListEqual(search(docs, "hobbit"), [])
+        self.assertListEqual(search(docs, "breakfasts"), [("/blog/post.html#post", "Post", 1)])
+
+        os.remove(self.path("content", "blog", "post.md"))
+        self.build()
+        self.assertListEqual(search(docs, "breakfasts"), [])
+        self.assertListEqual(search(docs, "welcome"), [("/#home", "Home", 1)])
+
+    def test_urls_include_the_basepath(self):
+        self.build("/repo/")
+        self.assertListEqual(
+            search(self.path("docs"), "hobbit"), [("/repo/blog/post.html#second-breakfast", "Second breakfast", 1)]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
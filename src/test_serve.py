@@ -0,0 +1,135 @@
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from serve import rebuild, template_dependencies
+from main import build_incremental
+from metadata import load_metadata_index
+from site_fixture import read, write
+
+
+class TestServe(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+        write("template.html", "<title>{{ Title }}</title>{{ Content }}")
+        write(os.path.join("static", "index.css"), "body {}")
+        write(os.path.join("content", "index.md"), "# Home")
+        write(os.path.join("content", "blog", "post.md"), "# Post")
+        with redirect_stdout(StringIO()):
+            build_incremental("static", "content", "template.html", "docs", "/", os.path.join(".build", "manifest.json"))
+
+    def rebuild(self, changed, removed=(), listings=None, metadata_index=None):
+        with redirect_stdout(StringIO()):
+            return rebuild(changed, list(removed), "/", listings=listings, metadata_index=metadata_index)
+
+    def test_rebuild_single_page(self):
+        write(os.path.join("content", "blog", "post.md"), "# Edited")
+        count = self.rebuild([os.path.join("content", "blog", "post.md")])
+        self.assertEqual(count, 1)
+        self.assertEqual(read(os.path.join("docs", "blog", "post.html")), "<title>Edited</title><div><h1 id=\"edited\">Edited</h1></div>")
+
+    def test_rebuild_removed_page_and_static(self):
+        count = self.rebuild([], [os.path.join("content", "blog", "post.md"), os.path.join("static", "index.css")])
+        self.assertEqual(count, 2)
+        self.assertFalse(os.path.exists(os.path.join("docs", "blog")))
+        self.assertFalse(os.path.exists(os.path.join("docs", "index.css")))
+
+    def test_rebuild_template_renders_every_page(self):
+        write("template.html", "<h1>{{ Title }}</h1>")
+        count = self.rebuild(["template.html"])
+        self.assertEqual(count, 2)
+        self.assertEqual(read(os.path.join("docs", "index.html")), "<h1>Home</h1>")
+
+    def test_rebuild_partial_renders_every_page(self):
+        write("template.html", "{{> partials/head.html }}{{ Content }}")
+        write(os.path.join("partials", "head.html"), "<title>{{ Title }}</title>")
+        write(os.path.join("partials", "unused.html"), "unused")
+        dependencies = template_dependencies("/")
+        self.assertListEqual(dependencies, ["template.html", os.path.join("partials", "head.html")])
+
+        with redirect_stdout(StringIO()):
+            count = rebuild([os.path.join("partials", "unused.html")], [], "/", dependencies)
+        self.assertEqual(count, 0)
+
+        write(os.path.join("partials", "head.html"), "<h1>{{ Title }}</h1>")
+        with redirect_stdout(StringIO()):
+            count = rebuild([os.path.join("partials", "head.html")], [], "/", dependencies)
+        self.assertEqual(count, 2)
+        self.assertEqual(read(os.path.join("docs", "index.html")), "<h1>Home</h1><div><h1 id=\"home\">Home</h1></div>")
+
+    def test_rebuild_post_updates_listings_and_skips_drafts(self):
+        post = os.path.join("content", "blog", "post.md")
+        write(post, "---\ndate: 2024-01-01\n---\n# Post")
+        self.rebuild([post])
+        self.assertIn('<a href="/blog/post.html">Post</a>', read(os.path.join("docs", "blog", "index.html")))
+
+        write(post, "---\ndate: 2024-01-01\ndraft: true\n---\n# Post")
+        self.rebuild([post])
+        self.assertFalse(os.path.exists(os.path.join("docs", "blog", "post.html")))
+
+    def test_rebuild_renders_only_listings_whose_posts_changed(self):
+        post = os.path.join("content", "blog", "post.md")
+        listings = {}
+        write(post, "---\ndate: 2024-01-01\n---\n# Post")
+        # The page, the blog index, the tag and archive indexes and the 2024 archive
+        self.assertEqual(self.rebuild([post], listings=listings), 5)
+
+        # The body isn't shown on any listing
+        write(post, "---\ndate: 2024-01-01\n---\n# Post\n\nMore")
+        self.assertEqual(self.rebuild([post], listings=listings), 1)
+
+        write(post, "---\ndate: 2024-01-01\n---\n# Renamed")
+        # The tag and archive indexes don't show titles
+        self.assertEqual(self.rebuild([post], listings=listings), 3)
+        self.assertIn(">Renamed</a>", read(os.path.join("docs", "blog", "index.html")))
+
+    def test_rebuild_updates_a_carried_metadata_index(self):
+        index_path = os.path.join(".build", "metadata.json")
+        metadata_index, listings = load_metadata_index(index_path), {}
+        saved = read(index_path)
+        post = os.path.join("content", "blog", "post.md")
+        write(post, "---\ndate: 2024-01-01\n---\n# Post")
+        self.rebuild([post], listings=listings, metadata_index=metadata_index)
+        self.assertEqual(metadata_index["pages"][post]["date"], "2024-01-01")
+        self.assertIn('<a href="/blog/post.html">Post</a>', read(os.path.join("docs", "blog", "index.html")))
+
+        os.remove(post)
+        self.rebuild([], [post], listings, metadata_index)
+        self.assertNotIn(post, metadata_index["pages"])
+        self.assertFalse(os.path.exists(os.path.join("docs", "blog", "index.html")))
+        # Left for the next build to bring up to date
+        self.assertEqual(read(index_path), saved)
+
+    def test_rebuild_skips_listings_when_only_a_body_changed(self):
+        index_path = os.path.join(".build", "metadata.json")
+        metadata_index, listings = load_metadata_index(index_path), {}
+        post = os.path.join("content", "blog", "post.md")
+        write(post, "---\ndate: 2024-01-01\n---\n# Post")
+        self.rebuild([post], listings=listings, metadata_index=metadata_index)
+        listing = os.path.join("docs", "blog", "index.html")
+        os.remove(listing)
+
+        write(post, "---\ndate: 2024-01-01\n---\n# Post\n\nMore words.")
+        self.rebuild([post], listings=listings, metadata_index=metadata_index)
+        self.assertIn("More words.", read(os.path.join("docs", "blog", "post.html")))
+        self.assertFalse(os.path.exists(listing))
+
+        write(post, "---\ndate: 2024-02-01\n---\n# Post\n\nMore words.")
+        self.rebuild([post], listings=listings, metadata_index=metadata_index)
+        self.assertTrue(os.path.exists(listing))
+
+    def test_rebuild_listing_url_collision_raises(self):
+        write(os.path.join("content", "blog", "post.md"), "---\ndate: 2024-01-01\n---\n# Post")
+        page = os.path.join("content", "blog", "index.md")
+        write(page, "# Blog")
+        with self.assertRaises(ValueError):
+            self.rebuild([page])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,78 @@
+import os
+import unittest
+from xml.dom import minidom
+
+from site_fixture import SiteTestCase, TempDirTestCase, read, write
+from sitemap import write_sitemap, remove_stale, absolute_url
+
+SITE_URL = "https://example.com/repo/"
+
+
+def locs(path):
+    return [node.firstChild.data for node in minidom.parse(path).getElementsByTagName("loc")]
+
+
+class TestSitemap(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.docs = self.path("docs")
+
+    def test_absolute_url(self):
+        self.assertEqual(absolute_url(SITE_URL, "/blog/tom/"), "https://example.com/repo/blog/tom/")
+        self.assertEqual(absolute_url("https://example.com", "/"), "https://example.com/")
+
+    def test_single_file(self):
+        entries = [("/b/", "2024-01-01"), ("/", None), ("/a/", None)]
+        digests, written = write_sitemap(entries, SITE_URL, self.docs, {})
+        self.assertListEqual(written, [self.path("docs", "sitemap.xml")])
+        self.assertListEqual(locs(self.path("docs", "sitemap.xml")), [SITE_URL, SITE_URL + "a/", SITE_URL + "b/"])
+        self.assertIn("<lastmod>2024-01-01</lastmod>", read(self.path("docs", "sitemap.xml")))
+
+    def test_shards_skip_unchanged_and_remove_stale(self):
+        entries = [(f"/{i}/", None) for i in range(10, 15)]
+        digests, written = write_sitemap(entries, SITE_URL, self.docs, {}, per_shard=2)
+        self.assertEqual(len(written), 4)
+        self.assertListEqual(locs(self.path("docs", "sitemap.xml")), [SITE_URL + f"sitemap-{n}.xml" for n in (1, 2, 3)])
+        self.assertListEqual(locs(self.path("docs", "sitemap-2.xml")), [SITE_URL + "12/", SITE_URL + "13/"])
+
+        # Only the shard holding the new URL changes
+        digests, written = write_sitemap(entries + [("/14a/", None)], SITE_URL, self.docs, digests, per_shard=2)
+        self.assertListEqual(written, [self.path("docs", "sitemap-3.xml")])
+
+        previous = digests
+        digests, written = write_sitemap(entries[:2], SITE_URL, self.docs, previous, per_shard=2)
+        # Back to one file, so every shard goes
+        stale = [self.path("docs", f"sitemap-{n}.xml") for n in (1, 2, 3)]
+        self.assertListEqual(sorted(remove_stale(previous, digests)), stale)
+        self.assertListEqual(locs(self.path("docs", "sitemap.xml")), [SITE_URL + "10/", SITE_URL + "11/"])
+
+
+class TestIncrementalSitemap(SiteTestCase):
+    pages = {
+        "index.md": "# Home\n\n[Post](/post.html)",
+        "post.md": "---\ndate: 2024-01-01\nsummary: First\n---\n# Post",
+    }
+
+    def build(self, site_url=SITE_URL):
+        return super().build(site_url=site_url)
+
+    def test_written_from_the_page_list(self):
+        self.assertIn("Sitemap and feeds: 3 files, 3 updated", self.build())
+        self.assertIn(SITE_URL + "post.html", locs(self.path("docs", "sitemap.xml")))
+        self.assertIn(SITE_URL + "blog/", locs(self.path("docs", "sitemap.xml")))
+        self.assertIn("<title>Post</title>", read(self.path("docs", "feed.xml")))
+        self.assertIn("Sitemap and feeds: 3 files, 0 updated", self.build())
+
+        # The body of a post is in neither
+        write(self.path("content", "post.md"), "---\ndate: 2024-01-01\nsummary: First\n---\n# Post\n\nMore")
+        self.assertIn("Sitemap and feeds: 3 files, 0 updated", self.build())
+        write(self.path("content", "post.md"), "---\ndate: 2024-01-01\nsummary: Second\n---\n# Post")
+        self.assertIn("Sitemap and feeds: 3 files, 2 updated", self.build())
+
+        self.build(site_url=None)
+        self.assertFalse(os.path.exists(self.path("docs", "sitemap.xml")))
+        self.assertFalse(os.path.exists(self.path("docs", "atom.xml")))
+
+
+if __name__ == "__main__":
+    unittest.main()
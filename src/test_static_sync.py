@@ -0,0 +1,70 @@
+import os
+import tempfile
+import time
+import unittest
+
+from site_fixture import read, write
+from static_sync import sync_static, needs_copy, copy_file, prune_outputs
+
+
+class TestStaticSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.src = os.path.join(self.tmp.name, "static")
+        self.dest = os.path.join(self.tmp.name, "docs")
+        write(os.path.join(self.src, "index.css"), "body {}")
+        write(os.path.join(self.src, "images", "a.png"), "png")
+        self.pairs = [
+            (os.path.join(self.src, "index.css"), os.path.join(self.dest, "index.css")),
+            (os.path.join(self.src, "images", "a.png"), os.path.join(self.dest, "images", "a.png")),
+        ]
+
+    def test_copies_then_skips_unchanged(self):
+        result = sync_static(self.pairs)
+        self.assertEqual(len(result.copied), 2)
+        self.assertEqual(read(os.path.join(self.dest, "images", "a.png")), "png")
+
+        result = sync_static(self.pairs)
+        self.assertListEqual(result.copied, [])
+        self.assertEqual(result.unchanged, 2)
+
+    def test_changed_file_is_recopied(self):
+        sync_static(self.pairs)
+        write(os.path.join(self.src, "index.css"), "body { color: red }")
+        result = sync_static(self.pairs)
+        self.assertListEqual(result.copied, [self.pairs[0]])
+        self.assertEqual(read(os.path.join(self.dest, "index.css")), "body { color: red }")
+
+    def test_checksum_skips_touched_but_identical_file(self):
+        sync_static(self.pairs)
+        source = os.path.join(self.src, "index.css")
+        os.utime(source, ns=(time.time_ns(), time.time_ns() + 5_000_000_000))
+        self.assertTrue(needs_copy(source, os.path.join(self.dest, "index.css")))
+        self.assertFalse(needs_copy(source, os.path.join(self.dest, "index.css"), checksum=True))
+        # The mtimes now match, so a plain comparison is enough next time
+        self.assertFalse(needs_copy(source, os.path.join(self.dest, "index.css")))
+
+    def test_hardlink_replaced_not_written_through(self):
+        source, dest = self.pairs[0]
+        os.makedirs(self.dest)
+        copy_file(source, dest, link="hardlink")
+        self.assertEqual(os.stat(source).st_ino, os.stat(dest).st_ino)
+
+        write(os.path.join(self.tmp.name, "other.css"), "other")
+        copy_file(os.path.join(self.tmp.name, "other.css"), dest, link="copy")
+        self.assertEqual(read(source), "body {}")
+        self.assertEqual(read(dest), "other")
+
+    def test_prune_outputs(self):
+        sync_static(self.pairs)
+        write(os.path.join(self.dest, "blog", "post.html"), "page")
+        write(os.path.join(self.dest, "old", "gone.html"), "stale")
+        removed = prune_outputs(self.dest, [dest for _, dest in self.pairs] + [os.path.join(self.dest, "blog", "post.html")])
+        self.assertListEqual(removed, [os.path.join(self.dest, "old", "gone.html")])
+        self.assertFalse(os.path.exists(os.path.join(self.dest, "old")))
+        self.assertTrue(os.path.exists(os.path.join(self.dest, "blog", "post.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import os
+import tempfile
+import unittest
+
+from htmlnode import LeafNode, ParentNode
+from site_fixture import write
+from template import Template, load_template, expand_template, minify_html, rewrite_root_urls
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile_segments_and_slots(self):
+        template = Template("<title>{{ Title }}</title><main>{{ Content }}</main>")
+        self.assertListEqual(template.segments, ["<title>", "</title><main>", "</main>"])
+        self.assertListEqual(template.slot_names, ["Title", "Content"])
+
+    def test_render(self):
+        template = Template("<title>{{ Title }}</title>{{ Content }}")
+        node = ParentNode("p", [LeafNode("b", "hi")])
+        self.assertEqual(template.render(Title="Home", Content=node), "<title>Home</title><p><b>hi</b></p>")
+
+    def test_unknown_slot_left_alone(self):
+        template = Template("{{ Title }} {{ Author }}")
+        self.assertEqual(template.render(Title="Home"), "Home {{ Author }}")
+
+    def test_basepath_applied_to_template_once(self):
+        template = Template('<link href="/index.css"><img src="/logo.png">{{ Content }}', "/repo/")
+        self.assertEqual(
+            template.render(Content="x"),
+            '<link href="/repo/index.css"><img src="/repo/logo.png">x',
+        )
+
+    def test_rewrite_root_urls(self):
+        node = ParentNode("div", [
+            LeafNode("a", "home", {"href": "/blog"}),
+            LeafNode("a", "out", {"href": "https://boot.dev"}),
+            ParentNode("pre", [LeafNode("code", 'href="/not-a-link"')]),
+        ])
+        rewrite_root_urls(node, "/repo/")
+        self.assertEqual(
+            node.to_html(),
+            '<div><a href="/repo/blog">home</a><a href="https://boot.dev">out</a><pre><code>href="/not-a-link"</code></pre></div>',
+        )
+
+    def test_load_template_cached_until_mtime_changes(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            with open(path, "w") as f:
+                f.write("one {{ Content }}")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+            self.assertIsNot(load_template(path, "/repo/"), first)
+
+            with open(path, "w") as f:
+                f.write("two {{ Content }}")
+            stat = os.stat(path)
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            self.assertEqual(load_template(path).render(Content="x"), "two x")
+
+    def test_expand_partials_and_data(self):
+        with tempfile.TemporaryDirectory() as root:
+            write(os.path.join(root, "template.html"), "{{> partials/head.html }}<main>{{ Content }}</main>")
+            write(os.path.join(root, "partials", "head.html"), "<title>{{ data.site.name }}</title>{{> nav.html }}")
+            write(os.path.join(root, "partials", "nav.html"), '<a href="/">{{ data.site.links.home }}</a>')
+            write(os.path.join(root, "data", "site.json"), '{"name": "Tolkien Fan Club", "links": {"home": "Home"}}')
+
+            source, dependencies = expand_template(os.path.join(root, "template.html"))
+            self.assertEqual(source, '<title>Tolkien Fan Club</title><a href="/">Home</a><main>{{ Content }}</main>')
+            self.assertListEqual(dependencies, [
+                os.path.join(root, "template.html"),
+                os.path.join(root, "partials", "head.html"),
+                os.path.join(root, "partials", "nav.html"),
+                os.path.join(root, "data", "site.json"),
+            ])
+
+    def test_expand_errors(self):
+        with tempfile.TemporaryDirectory() as root:
+            write(os.path.join(root, "a.html"), "{{> b.html }}")
+            write(os.path.join(root, "b.html"), "{{> a.html }}")
+            with self.assertRaisesRegex(ValueError, "include cycle"):
+                expand_template(os.path.join(root, "a.html"))
+
+            write(os.path.join(root, "c.html"), "{{ data.site.missing }}")
+            write(os.path.join(root, "data", "site.json"), "{}")
+            with self.assertRaisesRegex(ValueError, "has no key missing"):
+                expand_template(os.path.join(root, "c.html"))
+
+    def test_load_template_reloads_when_partial_changes(self):
+        with tempfile.TemporaryDirectory() as root:
+            path = os.path.join(root, "template.html")
+            partial = os.path.join(root, "partial.html")
+            write(path, "{{> partial.html }}{{ Content }}")
+            write(partial, "one ")
+            first = load_template(path)
+            self.assertIs(load_template(path), first)
+
+            write(partial, "two ")
+            stat = os.stat(partial)
+            os.utime(partial, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+            self.assertEqual(load_template(path).render(Content="x"), "two x")
+
+    def test_minify_html(self):
+        source = (
+            "<!doctype html>\n<html>\n  <head>\n    <title>{{ Title }}</title>\n  </head>\n"
+            "  <!-- layout -->\n  <body>\n    <p>Hi   <b>there</b>\n <i>you</i></p>\n"
+            "    <pre>  keep\n    this  </pre>\n    <article>\n      {{ Content }}\n    </article>\n  </body>\n</html>\n"
+        )
+        self.assertEqual(
+            minify_html(source),
+            "<!doctype html><html><head><title>{{ Title }}</title></head><body>"
+            "<p>Hi <b>there</b> <i>you</i></p><pre>  keep\n    this  </pre><article>{{ Content }}</article></body></html>",
+        )
+
+    def test_minified_template_minifies_values(self):
+        template = Template("<main>\n  {{ Content }}\n</main>", minify=True)
+        node = ParentNode("ul", [ParentNode("li", [LeafNode("a", "x", {"href": "/a"})])])
+        self.assertEqual(template.render(Content=node), "<main><ul><li><a href=/a>x</a></ul></main>")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -28,3 +28,107 @@ class TestTextToTextNodes(unittest.TestCase):
             TextNode("link", TextType.LINK, "https://boot.dev"),
         ]
         self.assertListEqual(text_to_textnodes(text), expected_nodes)
+
+    def test_nested_emphasis(self):
+        nodes = text_to_textnodes("**bold _and italic_** done")
+        expected_nodes = [
+            TextNode(
+                "bold and italic",
+                TextType.BOLD,
+                None,
+                [
+                    TextNode("bold ", TextType.TEXT),
+                    TextNode("and italic", TextType.ITALIC),
+                ],
+            ),
+            TextNode(" done", TextType.TEXT),
+        ]
+        self.assertListEqual(nodes, expected_nodes)
+
+    def test_bold_italic_run_of_three(self):
+        self.assertListEqual(
+            text_to_textnodes("***bold italic*** text"),
+            [
+                TextNode("bold italic", TextType.BOLD, None, [TextNode("bold italic", TextType.ITALIC)]),
+                TextNode(" text", TextType.TEXT),
+            ],
+        )
+        # The run closing first decides which emphasis sits inside
+        self.assertListEqual(
+            text_to_textnodes("___bold__ italic_"),
+            [
+                TextNode(
+                    "bold italic",
+                    TextType.ITALIC,
+                    None,
+                    [TextNode("bold", TextType.BOLD), TextNode(" italic", TextType.TEXT)],
+                ),
+            ],
+        )
+        self.assertListEqual(
+            text_to_textnodes("**bold *italic***"),
+            [
+                TextNode(
+                    "bold italic",
+                    TextType.BOLD,
+                    None,
+                    [TextNode("bold ", TextType.TEXT), TextNode("italic", TextType.ITALIC)],
+                ),
+            ],
+        )
+
+    def test_bracket_before_an_image(self):
+        self.assertListEqual(
+            text_to_textnodes("The map [below] shows it: ![map](/images/map.png)"),
+            [
+                TextNode("The map [below] shows it: ", TextType.TEXT),
+                TextNode("map", TextType.IMAGE, "/images/map.png"),
+            ],
+        )
+
+    def test_image_inside_link_brackets(self):
+        self.assertListEqual(
+            text_to_textnodes("[![badge](b.svg)](https://x)"),
+            [
+                TextNode("[", TextType.TEXT),
+                TextNode("badge", TextType.IMAGE, "b.svg"),
+                TextNode("](https://x)", TextType.TEXT),
+            ],
+        )
+
+    def test_long_paragraph_of_unclosed_brackets(self):
+        # Each [ that opens no link is given up at the next bracket or
+        # space; scanning on to the end from every one took seconds here
+        text = "see [n] and " * 10000 + "[end](/end)"
+        nodes = text_to_textnodes(text)
+        self.assertListEqual(nodes, [TextNode(text[:-11], TextType.TEXT), TextNode("end", TextType.LINK, "/end")])
+
+    def test_unclosed_delimiter_is_plain_text(self):
+        self.assertListEqual(
+            text_to_textnodes("5 * 3 is **not** 8"),
+            [
+                TextNode("5 * 3 is ", TextType.TEXT),
+                TextNode("not", TextType.BOLD),
+                TextNode(" 8", TextType.TEXT),
+            ],
+        )
+
+    def test_code_and_urls_are_literal(self):
+        text = "Use `**kwargs` or see [my_docs](https://a.dev/some_page)"
+        expected_nodes = [
+            TextNode("Use ", TextType.TEXT),
+            TextNode("**kwargs", TextType.CODE),
+            TextNode(" or see ", TextType.TEXT),
+            TextNode("my_docs", TextType.LINK, "https://a.dev/some_page"),
+        ]
+        self.assertListEqual(text_to_textnodes(text), expected_nodes)
+
+    def test_underscore_delimiters(self):
+        self.assertListEqual(
+            text_to_textnodes("__bold__ and _italic_"),
+            [
+                TextNode("bold", TextType.BOLD),
+                TextNode(" and ", TextType.TEXT),
+                TextNode("italic", TextType.ITALIC),
+            ],
+        )
@@ -25,3 +25,7 @@ class TestTextNode(unittest.TestCase):
     def test_repr(self):
         node = TextNode("This is a text node", TextType.TEXT, None)
         self.assertEqual(repr(node), "TextNode('This is a text node', <TextType.TEXT: 'text'>, None)")
+
+    def test_no_instance_dict(self):
+        node = TextNode("This is a text node", TextType.TEXT)
+        self.assertFalse(hasattr(node, "__dict__"))
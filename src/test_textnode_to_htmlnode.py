@@ -37,3 +37,13 @@ class TestTextNodeToHTMLNode(unittest.TestCase):
         node = TextNode("This is an invalid node", "INVALID_TYPE")
         with self.assertRaises(ValueError):
             text_node_to_html_node(node)
+
+    def test_nested_emphasis(self):
+        node = TextNode(
+            "bold italic",
+            TextType.BOLD,
+            None,
+            [TextNode("bold ", TextType.TEXT), TextNode("italic", TextType.ITALIC)],
+        )
+        html_node = text_node_to_html_node(node)
+        self.assertEqual(html_node.to_html(), "<b>bold <i>italic</i></b>")
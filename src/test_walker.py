@@ -0,0 +1,74 @@
+import os
+import sys
+import unittest
+
+from main import collect_files
+from site_fixture import SiteTestCase, TempDirTestCase, write
+from walker import walk_files
+
+
+class TestWalkFiles(TempDirTestCase):
+    def setUp(self):
+        super().setUp()
+        self.root = self.path("static")
+        for rel_path in ("b.css", "a.css", "img/z.png", "img/.DS_Store", "fonts/x.woff", "a/b/c.txt", ".git/HEAD"):
+            write(os.path.join(self.root, *rel_path.split("/")), "")
+
+    def rel_paths(self, ignore=()):
+        return [rel_path for rel_path, _ in walk_files(self.root, ignore)]
+
+    def test_same_order_as_a_sorted_os_walk(self):
+        expected = []
+        for dir_path, dir_names, file_names in os.walk(self.root):
+            dir_names.sort()
+            expected.extend(os.path.join(dir_path, name) for name in sorted(file_names))
+        self.assertListEqual([entry.path for _, entry in walk_files(self.root)], expected)
+        self.assertListEqual(self.rel_paths()[:3], ["a.css", "b.css", ".git/HEAD"])
+
+    def test_ignore_patterns(self):
+        self.assertListEqual(self.rel_paths([".*", "img/*.png"]), ["a.css", "b.css", "a/b/c.txt", "fonts/x.woff"])
+        # A directory pattern prunes everything under it
+        self.assertListEqual(self.rel_paths(["a", "img", ".*"]), ["a.css", "b.css", "fonts/x.woff"])
+
+    def test_missing_root_and_symlinked_dirs(self):
+        self.assertListEqual(list(walk_files(self.path("missing"))), [])
+        if hasattr(os, "symlink"):
+            os.symlink(os.path.join(self.root, "fonts"), os.path.join(self.root, "linked"))
+            self.assertNotIn("linked/x.woff", self.rel_paths())
+
+    def test_deeper_than_the_recursion_limit(self):
+        deep = os.path.join(self.root, *["d"] * 150)
+        write(os.path.join(deep, "deep.txt"), "")
+        limit = sys.getrecursionlimit()
+        self.addCleanup(sys.setrecursionlimit, limit)
+        sys.setrecursionlimit(100)
+        entries = list(walk_files(os.path.join(self.root, "d")))
+        sys.setrecursionlimit(limit)
+        self.assertListEqual([entry.path for _, entry in entries], [os.path.join(deep, "deep.txt")])
+
+
+class TestIgnoredSources(SiteTestCase):
+    pages = {"index.md": "# Home", "notes/todo.md": "# Todo"}
+
+    def setUp(self):
+        super().setUp()
+        write(self.path("static", "logo.psd"), "layers")
+
+    def build(self, ignore=()):
+        return super().build(ignore=ignore)
+
+    def test_collect_files(self):
+        pairs = collect_files(self.path("static"), self.path("docs"), ["*.psd"])
+        self.assertListEqual(pairs, [(self.path("static", "index.css"), self.path("docs", "index.css"))])
+
+    def test_newly_ignored_outputs_are_removed(self):
+        self.build()
+        self.assertTrue(os.path.exists(self.path("docs", "notes", "todo.html")))
+        self.build(["*.psd", "notes"])
+        self.assertFalse(os.path.exists(self.path("docs", "logo.psd")))
+        self.assertFalse(os.path.exists(self.path("docs", "notes")))
+        self.assertTrue(os.path.exists(self.path("docs", "index.html")))
+
+
+if __name__ == "__main__":
+    unittest.main()
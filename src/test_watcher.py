@@ -0,0 +1,96 @@
+import os
+import unittest
+
+from site_fixture import TempDirTestCase, write
+from watcher import snapshot, diff_snapshots, InotifyWatcher, PollingWatcher, libc
+
+PAGE = os.path.join("content", "blog", "post.md")
+
+
+class WatcherTests:
+    """The same changes, seen through each way of watching."""
+
+    watcher_class = None
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(self.tmp.name)
+        write("template.html", "{{ Content }}")
+        write("main.sh", "")
+        write(os.path.join("content", "index.md"), "# Home")
+        write(PAGE, "# Post")
+        self.watcher = self.watcher_class(["content"], ["template.html"])
+        self.addCleanup(self.watcher.close)
+
+    def changes(self):
+        return self.watcher.changes()
+
+    def test_nothing_changed(self):
+        self.assertEqual(self.changes(), ([], []))
+
+    def test_edit_add_and_remove(self):
+        write(PAGE, "# Post, edited")
+        write(os.path.join("content", "new", "deeper", "page.md"), "# New")
+        os.remove(os.path.join("content", "index.md"))
+        self.assertEqual(
+            self.changes(),
+            ([PAGE, os.path.join("content", "new", "deeper", "page.md")], [os.path.join("content", "index.md")]),
+        )
+        # The new directory is watched too
+        write(os.path.join("content", "new", "deeper", "page.md"), "# New, edited")
+        self.assertEqual(self.changes(), ([os.path.join("content", "new", "deeper", "page.md")], []))
+
+    def test_saved_by_rename(self):
+        # How most editors save
+        write(PAGE + ".tmp", "# Post, saved")
+        os.replace(PAGE + ".tmp", PAGE)
+        write("template.html.tmp", "<main>{{ Content }}</main>")
+        os.replace("template.html.tmp", "template.html")
+        self.assertEqual(self.changes(), ([PAGE, "template.html"], []))
+
+    def test_removed_directory(self):
+        os.remove(PAGE)
+        os.rmdir(os.path.join("content", "blog"))
+        self.assertEqual(self.changes(), ([], [PAGE]))
+
+    def test_only_watched_files_outside_the_trees(self):
+        write("main.sh", "edited")
+        write(os.path.join("partials", "head.html"), "<title>")
+        self.assertEqual(self.changes(), ([], []))
+
+        self.watcher.set_files(["template.html", os.path.join("partials", "head.html")])
+        write(os.path.join("partials", "head.html"), "<title>{{ Title }}</title>")
+        self.assertEqual(self.changes(), ([os.path.join("partials", "head.html")], []))
+
+
+class TestPollingWatcher(WatcherTests, TempDirTestCase):
+    watcher_class = PollingWatcher
+
+
+@unittest.skipIf(libc is None, "inotify is Linux only")
+class TestInotifyWatcher(WatcherTests, TempDirTestCase):
+    watcher_class = InotifyWatcher
+
+    def test_wait_returns_on_a_change(self):
+        write(PAGE, "# Post, edited")
+        self.watcher.wait(10)
+        self.assertEqual(self.changes(), ([PAGE], []))
+
+
+class TestSnapshots(TempDirTestCase):
+    def test_diff_snapshots(self):
+        paths = [self.path("content"), self.path("static"), self.path("template.html")]
+        write(self.path("content", "index.md"), "# Home")
+        write(self.path("static", "index.css"), "body {}")
+        before = snapshot(paths)
+        write(self.path("content", "index.md"), "# Home, edited")
+        os.remove(self.path("static", "index.css"))
+        write(self.path("content", "new.md"), "# New")
+        changed, removed = diff_snapshots(before, snapshot(paths))
+        self.assertListEqual(changed, [self.path("content", "index.md"), self.path("content", "new.md")])
+        self.assertListEqual(removed, [self.path("static", "index.css")])
+
+
+if __name__ == "__main__":
+    unittest.main()
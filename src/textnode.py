@@ -9,17 +9,26 @@ class TextType(Enum):
     IMAGE = "image"
 
 class TextNode:
-    def __init__(self, text, text_type, url=None):
+    # No per-instance __dict__: one large document creates hundreds of thousands of these
+    __slots__ = ("text", "text_type", "url", "children")
+
+    # children is only set for emphasis that wraps other inline nodes,
+    # e.g. **bold _and italic_**. text then holds the plain text content.
+    def __init__(self, text, text_type, url=None, children=None):
         self.text = text
         self.text_type = text_type
         self.url = url
+        self.children = children
 
     def __eq__(self, other):
         return (
             self.text == other.text
             and self.text_type == other.text_type
             and self.url == other.url
+            and self.children == other.children
         )
 
     def __repr__(self):
+        if self.children is not None:
+            return f"TextNode({self.text!r}, {self.text_type!r}, {self.url!r}, {self.children!r})"
         return f"TextNode({self.text!r}, {self.text_type!r}, {self.url!r})"
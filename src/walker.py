@@ -0,0 +1,40 @@
+import os
+from fnmatch import fnmatch
+
+
+def is_ignored(rel_path, name, ignore):
+    # A pattern without a slash matches names at any depth (".*", "*.psd");
+    # one with a slash matches the path from the root ("drafts/*")
+    return any(fnmatch(rel_path if "/" in pattern else name, pattern) for pattern in ignore)
+
+
+def walk_files(root, ignore=()):
+    """
+    Yields (path relative to root, "/"-separated; os.DirEntry) for every
+    file under root, in the same order on every filesystem: a directory's
+    files sorted by name, then each of its subdirectories in turn. Walks
+    with an explicit stack of directory paths rather than recursion, and
+    each entry's type (and, through entry.stat(), its stat) comes from the
+    scan. Entries matching an ignore pattern are skipped, along with
+    everything under them. Symlinked directories aren't followed; a
+    missing root yields nothing.
+    """
+    stack = [(root, "")]
+    while stack:
+        dir_path, rel_dir = stack.pop()
+        try:
+            with os.scandir(dir_path) as scan:
+                entries = sorted(scan, key=lambda entry: entry.name)
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        subdirs = []
+        for entry in entries:
+            rel_path = f"{rel_dir}{entry.name}"
+            if ignore and is_ignored(rel_path, entry.name, ignore):
+                continue
+            if entry.is_dir():
+                if not entry.is_symlink():
+                    subdirs.append((entry.path, rel_path + "/"))
+            else:
+                yield rel_path, entry
+        stack.extend(reversed(subdirs))
@@ -0,0 +1,222 @@
+import ctypes
+import errno
+import os
+import select
+import struct
+import sys
+import time
+
+from walker import walk_files
+
+try:
+    libc = ctypes.CDLL(None, use_errno=True)
+    libc.inotify_init1.argtypes = [ctypes.c_int]
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+except (OSError, AttributeError, TypeError):  # inotify is Linux only
+    libc = None
+
+# From <sys/inotify.h>
+IN_ATTRIB = 0x4
+IN_CLOSE_WRITE = 0x8
+IN_MOVED_FROM = 0x40
+IN_MOVED_TO = 0x80
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_IGNORED = 0x8000
+IN_ONLYDIR = 0x1000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+# A file counts as changed once it's closed after writing, not on every
+# write, so a page is never rendered from half a save. IN_CREATE is only
+# acted on for directories; a new file is reported when it's closed
+WATCH_MASK = IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def snapshot(paths):
+    """
+    Returns {path: (mtime_ns, size)} for every file under the given files
+    and directories. Each entry costs at most one stat.
+    """
+    stats = {}
+    for path in paths:
+        if os.path.isfile(path):
+            st = os.stat(path)
+            stats[path] = (st.st_mtime_ns, st.st_size)
+            continue
+        for _, entry in walk_files(path):
+            st = entry.stat()
+            stats[entry.path] = (st.st_mtime_ns, st.st_size)
+    return stats
+
+
+def diff_snapshots(old, new):
+    changed = sorted(path for path, stat in new.items() if old.get(path) != stat)
+    removed = sorted(path for path in old if path not in new)
+    return changed, removed
+
+
+class PollingWatcher:
+    """
+    Finds changes by comparing stat snapshots of every watched file. Works
+    everywhere, but each check costs a stat per file.
+    """
+
+    def __init__(self, trees, files):
+        self.trees = list(trees)
+        self.files = list(files)
+        self.previous = snapshot(self.trees + self.files)
+
+    def wait(self, timeout):
+        time.sleep(timeout)
+
+    def changes(self):
+        current = snapshot(self.trees + self.files)
+        changed, removed = diff_snapshots(self.previous, current)
+        self.previous = current
+        return changed, removed
+
+    def set_files(self, files):
+        # New files are watched from their current state; dropped ones
+        # are forgotten
+        for path in set(self.files) - set(files):
+            self.previous.pop(path, None)
+        self.previous.update(snapshot(set(files) - set(self.files)))
+        self.files = list(files)
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Has the kernel report changes (Linux inotify), so a check costs nothing
+    while nothing happens, however big the site. Every directory under the
+    trees is watched, plus the directory holding each watched file; a
+    change is only reported once the files it names have been statted.
+    Raises OSError where inotify isn't available or its watch limit is
+    reached.
+    """
+
+    def __init__(self, trees, files):
+        if libc is None:
+            raise OSError(errno.ENOSYS, "inotify is not available")
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.trees = list(trees)
+        self.files = set()
+        self.dirs = {}  # watch descriptor -> directory, as paths are reported
+        self.known = set()  # files under the trees, as of the last check
+        self.touched = set()
+        self.overflowed = False
+        try:
+            for tree in self.trees:
+                self.known.update(self.add_tree(tree))
+            self.set_files(files)
+        except OSError:
+            self.close()
+            raise
+
+    def add_watch(self, dir_path):
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(dir_path or "."), WATCH_MASK | IN_ONLYDIR)
+        if wd < 0:
+            error = ctypes.get_errno()
+            if error in (errno.ENOENT, errno.ENOTDIR):
+                return
+            raise OSError(error, f"Can't watch {dir_path}")
+        self.dirs[wd] = dir_path
+
+    def add_tree(self, root):
+        # Watches root and every directory under it. Returns the files in it
+        files = []
+        for dir_path, _, file_names in os.walk(root):
+            self.add_watch(dir_path)
+            files.extend(os.path.join(dir_path, name) for name in file_names)
+        return files
+
+    def in_tree(self, path):
+        return any(path.startswith(tree + os.sep) for tree in self.trees)
+
+    def set_files(self, files):
+        files = set(files)
+        for path in files - self.files:
+            self.add_watch(os.path.dirname(path))
+        self.files = files
+
+    def wait(self, timeout):
+        select.select([self.fd], [], [], timeout)
+
+    def read_events(self):
+        while True:
+            try:
+                data = os.read(self.fd, 1 << 16)
+            except BlockingIOError:
+                return
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+                offset += EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    self.overflowed = True
+                elif mask & IN_IGNORED:
+                    self.dirs.pop(wd, None)
+                elif wd in self.dirs:
+                    self.handle(os.path.join(self.dirs[wd], name), mask)
+
+    def handle(self, path, mask):
+        if not mask & IN_ISDIR:
+            if not mask & IN_CREATE:
+                self.touched.add(path)
+        elif mask & (IN_CREATE | IN_MOVED_TO):
+            # Files may have been written before the watch was in place
+            if self.in_tree(path):
+                try:
+                    self.touched.update(self.add_tree(path))
+                except OSError as e:
+                    print(f"Not watching {path}: {e}", file=sys.stderr)
+        elif mask & (IN_DELETE | IN_MOVED_FROM):
+            self.touched.update(known for known in self.known if known.startswith(path + os.sep))
+
+    def changes(self):
+        """Returns (changed, removed), sorted, since the last call."""
+        self.read_events()
+        touched, self.touched = self.touched, set()
+        if self.overflowed:
+            # Events were dropped: check everything
+            self.overflowed = False
+            touched.update(self.known, self.files)
+            for tree in self.trees:
+                touched.update(entry.path for _, entry in walk_files(tree))
+        changed, removed = [], []
+        for path in touched:
+            if not self.in_tree(path) and path not in self.files:
+                continue
+            if os.path.isfile(path):
+                changed.append(path)
+                if self.in_tree(path):
+                    self.known.add(path)
+            elif path in self.known or path in self.files:
+                removed.append(path)
+                self.known.discard(path)
+        return sorted(changed), sorted(removed)
+
+    def close(self):
+        os.close(self.fd)
+
+
+def open_watcher(trees, files):
+    """
+    Watches every file under the directories in trees, plus the given
+    files, which set_files() can later replace. Uses inotify where it can
+    and falls back to polling.
+    """
+    try:
+        return InotifyWatcher(trees, files)
+    except OSError:
+        return PollingWatcher(trees, files)